@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+2L Aggregate - Merge learnings from many project trees into one store
+
+Discovers every .2L/plan-*/iteration-*/learnings.yaml under a set of roots
+(each root may be a project or a directory of projects) and merges them
+into one global learnings file as a map-reduce:
+
+    map     A process pool reads, hashes and parses the files and
+            normalizes each into a merge_iterations() input tuple
+            (learnings, discovered_in, duration, healing rounds, files
+            modified). Learnings without a project name get the name of
+            the directory holding their .2L tree.
+    reduce  One locked merge_iterations() call (2l-yaml-helpers.py) over
+            all parsed files in discovery order: roots as given, files in
+            natural (plan/iteration) order. The result is the same as
+            merging the files one by one in that order.
+
+A manifest next to the store (<store>.aggregated.json) records the size,
+mtime and content hash of every file merged, and files already in it are
+skipped on the next run. A file whose size or mtime changed is re-read;
+if only its mtime did, it is skipped and its manifest entry refreshed,
+otherwise it is merged again. The manifest is ignored when the store does
+not exist.
+
+Usage:
+    python3 2l-aggregate.py Production-test/ghstats Production-test/ShipLog \
+        --global-learnings ~/.2L/global-learnings.yaml [--workers 8]
+    python3 2l-aggregate.py ~/projects --dry-run
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import tempfile
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+yaml_io = importlib.import_module('2l-yaml-io')
+helpers = importlib.import_module('2l-yaml-helpers')
+instrument = importlib.import_module('2l-instrument')
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = '.aggregated.json'
+
+LEARNINGS_GLOB = os.path.join('plan-*', 'iteration-*', 'learnings.yaml')
+
+# Directories never searched for .2L trees
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv'}
+
+
+def manifest_path_for(global_learnings_path):
+    """Manifest path for a global learnings store (<store>.aggregated.json)."""
+    return global_learnings_path + MANIFEST_SUFFIX
+
+
+def load_manifest(global_learnings_path):
+    """
+    Files already merged into a store.
+
+    Returns:
+        files: Dict of real path -> {'size', 'mtime_ns', 'sha'} (empty if
+        the store or manifest is missing, or the manifest is unreadable)
+    """
+    if not os.path.exists(global_learnings_path):
+        return {}
+    try:
+        with open(manifest_path_for(global_learnings_path), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(global_learnings_path, files):
+    """Write the manifest atomically (temp + rename)."""
+    manifest_path = manifest_path_for(global_learnings_path)
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path) or '.', prefix='.tmp_',
+                                          suffix='.json')
+    try:
+        with os.fdopen(temp_fd, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+
+def discover_learnings(roots, seen=None):
+    """
+    Find iteration learnings files under each root.
+
+    A root is searched for .2L directories at any depth (skipping
+    SKIP_DIRS and the inside of .2L trees).
+
+    Args:
+        roots: Directories to search, in reporting order
+        seen: Optional set of real paths already listed (updated), to
+            continue a discovery across calls
+
+    Returns:
+        found: List of (root, [paths]) in root order, paths in natural
+            (project/plan/iteration) order; a file reachable from several
+            roots is listed under the first
+    """
+    seen = set() if seen is None else seen
+    found = []
+    for root in roots:
+        paths = []
+        for dir_path, dir_names, _ in os.walk(root):
+            if '.2L' in dir_names:
+                paths.extend(glob.glob(os.path.join(dir_path, '.2L', LEARNINGS_GLOB)))
+            dir_names[:] = [d for d in dir_names if d != '.2L' and d not in SKIP_DIRS]
+
+        unique = []
+        for path in sorted(paths, key=helpers.natural_sort_key):
+            real_path = os.path.realpath(path)
+            if real_path not in seen:
+                seen.add(real_path)
+                unique.append(path)
+        found.append((root, unique))
+    return found
+
+
+def _unchanged(entry, stat):
+    return entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+
+def _map_learnings(path):
+    """
+    Read, hash and parse one learnings file (runs in a pool worker).
+
+    Returns:
+        result: Dict with path, size, mtime_ns, sha, seconds and iteration
+            (a merge_iterations() input tuple)
+
+    Raises:
+        ValueError: If the file cannot be read or parsed
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+        iteration_data = yaml_io.parse_yaml(raw) or {}
+    except (OSError, yaml_io.yaml.YAMLError) as e:
+        raise ValueError(f"{path}: {e}")
+    if not isinstance(iteration_data, dict):
+        raise ValueError(f"{path}: not a learnings document")
+
+    if not iteration_data.get('project'):
+        # .2L/plan-N/iteration-M/learnings.yaml -> the directory holding .2L
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(path)))))
+        iteration_data['project'] = os.path.basename(project_dir)
+
+    discovered_in, duration, healing, files = helpers.infer_iteration_metadata(path, iteration_data)
+    return {
+        'path': path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha': yaml_io.content_hash(raw),
+        'seconds': time.perf_counter() - start,
+        'iteration': (iteration_data, discovered_in, duration, healing, files),
+    }
+
+
+def aggregate(roots, global_learnings_path, workers=None, similarity='exact',
+              similarity_threshold=None, journal=False, dry_run=False):
+    """
+    Merge all new learnings files under roots into a global learnings store.
+
+    Args:
+        roots: Directories to search (see discover_learnings)
+        global_learnings_path: Store to merge into (YAML, or .db for SQLite)
+        workers: Parser processes (default: CPU count; 1 = in this process)
+        similarity: 'exact' or 'minhash' (see merge_iterations)
+        similarity_threshold: Jaccard threshold for 'minhash' mode
+        journal: Append changes to the journal instead of rewriting the file
+        dry_run: Parse and report, but do not merge or update the manifest
+
+    Returns:
+        stats: Dict with 'roots' (per-root dicts: root, files, skipped,
+            merged, learnings, discover_seconds, parse_seconds), files,
+            merged, learnings, map_seconds, lock_wait_seconds,
+            reduce_seconds and elapsed_seconds
+
+    Raises:
+        ValueError: If a learnings file cannot be parsed (nothing is merged)
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    manifest = load_manifest(global_learnings_path)
+
+    per_root = []
+    pending = []  # (root stats, path) in discovery order
+    seen = set()
+    for root in roots:
+        discover_start = time.perf_counter()
+        (_, paths), = discover_learnings([root], seen)
+        root_stats = {'root': root, 'files': len(paths), 'skipped': 0, 'merged': 0, 'learnings': 0,
+                      'discover_seconds': time.perf_counter() - discover_start, 'parse_seconds': 0.0}
+        per_root.append(root_stats)
+        for path in paths:
+            real_path = os.path.realpath(path)
+            if _unchanged(manifest.get(real_path), os.stat(path)):
+                root_stats['skipped'] += 1
+            else:
+                pending.append((root_stats, path))
+
+    # Map: parse in parallel (order preserved)
+    map_start = time.perf_counter()
+    jobs = [path for _, path in pending]
+    if workers > 1 and len(jobs) > 1:
+        # Workers do not report spans: the pool's wall time counts as load
+        with instrument.span('load'), ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_map_learnings, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        with instrument.span('load'):
+            results = [_map_learnings(path) for path in jobs]
+    map_seconds = time.perf_counter() - map_start
+
+    # Drop files whose content is already merged (touched, not changed)
+    iterations = []
+    merged = {}
+    refreshed = {}
+    for (root_stats, _), result in zip(pending, results):
+        root_stats['parse_seconds'] += result['seconds']
+        real_path = os.path.realpath(result['path'])
+        entry = {'size': result['size'], 'mtime_ns': result['mtime_ns'], 'sha': result['sha']}
+        if manifest.get(real_path, {}).get('sha') == result['sha']:
+            root_stats['skipped'] += 1
+            refreshed[real_path] = entry
+            continue
+        learnings = len(result['iteration'][0].get('learnings') or [])
+        root_stats['merged'] += 1
+        root_stats['learnings'] += learnings
+        iterations.append(result['iteration'])
+        merged[real_path] = entry
+
+    # Reduce: one merge in discovery order
+    lock_wait_seconds = reduce_seconds = 0.0
+    if not dry_run and (iterations or refreshed):
+        with yaml_io.locked(global_learnings_path) as lock_wait_seconds:
+            reduce_start = time.perf_counter()
+            # Files another run merged while we were parsing
+            current = load_manifest(global_learnings_path)
+            keep = [real_path not in current or current[real_path]['sha'] != entry['sha']
+                    for real_path, entry in merged.items()]
+            iterations = [iteration for iteration, k in zip(iterations, keep) if k]
+            if iterations:
+                helpers.merge_iterations(global_learnings_path, iterations, similarity,
+                                         similarity_threshold, journal)
+            current.update(refreshed)
+            current.update(merged)
+            save_manifest(global_learnings_path, current)
+            reduce_seconds = time.perf_counter() - reduce_start
+
+    return {
+        'roots': per_root,
+        'files': sum(r['files'] for r in per_root),
+        'merged': len(iterations),
+        'learnings': sum(len(iteration[0].get('learnings') or []) for iteration in iterations),
+        'map_seconds': map_seconds,
+        'lock_wait_seconds': lock_wait_seconds,
+        'reduce_seconds': reduce_seconds,
+        'elapsed_seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L Aggregate - merge learnings from many project trees')
+    parser.add_argument('roots', nargs='+', help='Project directories or directories of projects')
+    parser.add_argument('--global-learnings', default='.2L/global-learnings.yaml',
+                        help='Store to merge into (default: .2L/global-learnings.yaml; .db for SQLite)')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--similarity', choices=helpers.SIMILARITY_MODES, default='exact',
+                        help='Pattern matching: exact root_cause (default) or minhash near-duplicates')
+    parser.add_argument('--similarity-threshold', type=float,
+                        help='Jaccard threshold for --similarity minhash (default: 0.8)')
+    parser.add_argument('--journal', action='store_true',
+                        help='Append changes to <global-learnings>.journal instead of rewriting the file')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and report without merging')
+    instrument.add_arguments(parser)
+
+    args = parser.parse_args()
+    instrument.configure('2l-aggregate', args)
+
+    for root in args.roots:
+        if not os.path.isdir(root):
+            print(f"ERROR: Not a directory: {root}", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        stats = aggregate(args.roots, args.global_learnings, args.workers, args.similarity,
+                          args.similarity_threshold, args.journal, args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for r in stats['roots']:
+        print(f"{r['root']}: {r['files']} file(s), {r['merged']} merged ({r['learnings']} learnings), "
+              f"{r['skipped']} already aggregated; discover {r['discover_seconds']:.3f}s, "
+              f"parse {r['parse_seconds']:.3f}s")
+    verb = 'Would merge' if args.dry_run else 'Merged'
+    print(f"{verb} {stats['learnings']} learnings from {stats['merged']} of {stats['files']} file(s) "
+          f"into {args.global_learnings}")
+    print(f"   Map {stats['map_seconds']:.3f}s, reduce {stats['reduce_seconds']:.3f}s "
+          f"(lock wait {stats['lock_wait_seconds']:.3f}s), total {stats['elapsed_seconds']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
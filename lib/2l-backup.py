@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+2L Backup - Ring of backup generations for files rewritten by temp + rename
+
+Writers in lib/ never modify a file in place: atomic_write_yaml() writes a
+temp file and renames it over the target, so every write leaves the old
+content on an inode of its own. A backup generation is a hard link to that
+inode, taken right before the rename, which costs one link() call however
+large the file is and copies no data. Filesystems without hard links get a
+plain copy instead.
+
+Generations live in <file>.backups/ as 000001.yaml, 000002.yaml, ...
+(numbers only grow, so the highest is the newest). Each keeps the
+modification time of the version it holds. A snapshot of a file that
+still shares its inode with the newest generation (nothing written since)
+is skipped.
+
+Retention (applied after every snapshot):
+    TWOL_BACKUP_KEEP=N            Keep the newest N generations (default: 10;
+                                  0 disables backups)
+    TWOL_BACKUP_MAX_AGE_DAYS=D    Also drop generations older than D days
+                                  (the newest one is always kept)
+
+Usage:
+    python3 2l-backup.py list .2L/global-learnings.yaml
+    python3 2l-backup.py restore .2L/global-learnings.yaml [--generation N]
+    python3 2l-backup.py snapshot .2L/global-learnings.yaml
+    python3 2l-backup.py prune .2L/global-learnings.yaml [--keep N] [--max-age-days D]
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import importlib
+from datetime import datetime
+
+BACKUP_SUFFIX = '.backups'
+DEFAULT_KEEP = 10
+
+_GENERATION = re.compile(r'(\d+)(\.[^.]*)?$')
+
+
+def backup_dir_for(file_path):
+    """Directory holding a file's generations (<file>.backups)."""
+    return file_path + BACKUP_SUFFIX
+
+
+def retention():
+    """
+    Retention settings from the environment.
+
+    Returns:
+        (keep, max_age_days): Generations to keep, and maximum age in days (None = no limit)
+    """
+    try:
+        keep = int(os.environ.get('TWOL_BACKUP_KEEP', DEFAULT_KEEP))
+    except ValueError:
+        keep = DEFAULT_KEEP
+    try:
+        max_age_days = float(os.environ['TWOL_BACKUP_MAX_AGE_DAYS'])
+    except (KeyError, ValueError):
+        max_age_days = None
+    return max(0, keep), max_age_days
+
+
+def list_generations(file_path):
+    """
+    Backup generations of a file, oldest first.
+
+    Returns:
+        generations: List of dicts with number, path, size, mtime
+    """
+    backup_dir = backup_dir_for(file_path)
+    try:
+        names = os.listdir(backup_dir)
+    except FileNotFoundError:
+        return []
+
+    generations = []
+    for name in names:
+        match = _GENERATION.fullmatch(name)
+        if not match:
+            continue
+        path = os.path.join(backup_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # Pruned concurrently
+        generations.append({'number': int(match.group(1)), 'path': path,
+                            'size': stat.st_size, 'mtime': stat.st_mtime})
+    generations.sort(key=lambda g: g['number'])
+    return generations
+
+
+def snapshot(file_path, keep=None, max_age_days=None):
+    """
+    Add the file's current content as the newest generation, then prune.
+
+    Call it right before the file is replaced (temp + rename): the link
+    then keeps the outgoing version alive after the rename.
+
+    Args:
+        file_path: File about to be replaced
+        keep: Generations to keep (default: TWOL_BACKUP_KEEP)
+        max_age_days: Maximum age (default: TWOL_BACKUP_MAX_AGE_DAYS)
+
+    Returns:
+        path: Path of the new generation, or None (no file, backups
+        disabled, or content unchanged since the newest generation)
+    """
+    env_keep, env_max_age = retention()
+    keep = env_keep if keep is None else keep
+    max_age_days = env_max_age if max_age_days is None else max_age_days
+    if keep <= 0:
+        return None
+
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+    generations = list_generations(file_path)
+    if generations:
+        newest = os.stat(generations[-1]['path'])
+        if (newest.st_ino, newest.st_dev) == (stat.st_ino, stat.st_dev):
+            return None  # Not rewritten since the last snapshot
+
+    backup_dir = backup_dir_for(file_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    extension = os.path.splitext(file_path)[1]
+    number = generations[-1]['number'] + 1 if generations else 1
+
+    while True:
+        path = os.path.join(backup_dir, f"{number:06d}{extension}")
+        try:
+            os.link(file_path, path)
+            break
+        except FileExistsError:
+            number += 1  # Another writer took this number
+        except OSError:
+            # No hard links on this filesystem: copy via temp + rename
+            temp_fd, temp_path = tempfile.mkstemp(dir=backup_dir, prefix='.tmp_')
+            os.close(temp_fd)
+            try:
+                shutil.copy2(file_path, temp_path)
+                os.replace(temp_path, path)
+            except Exception as e:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise e
+            break
+
+    prune(file_path, keep, max_age_days)
+    return path
+
+
+def prune(file_path, keep=None, max_age_days=None):
+    """
+    Drop generations beyond the retention limits (never the newest one).
+
+    Args:
+        file_path: Backed-up file
+        keep: Generations to keep (default: TWOL_BACKUP_KEEP)
+        max_age_days: Maximum age (default: TWOL_BACKUP_MAX_AGE_DAYS)
+
+    Returns:
+        removed: Number of generations removed
+    """
+    env_keep, env_max_age = retention()
+    keep = max(1, env_keep if keep is None else keep)
+    max_age_days = env_max_age if max_age_days is None else max_age_days
+
+    generations = list_generations(file_path)
+    doomed = generations[:-keep]
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        doomed += [g for g in generations[-keep:-1] if g['mtime'] < cutoff]
+
+    removed = 0
+    for generation in doomed:
+        try:
+            os.remove(generation['path'])
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def restore(file_path, number=None):
+    """
+    Replace a file with one of its generations (atomically).
+
+    The current content is snapshotted first, so a restore can be undone
+    by restoring again. The generation is copied, not linked: the ring
+    keeps its own inode.
+
+    A pending global learnings journal (2l-journal.py) was written against
+    the content being replaced, so it is removed.
+
+    Args:
+        file_path: Backed-up file
+        number: Generation number (default: newest)
+
+    Returns:
+        generation: The restored generation (dict as in list_generations)
+
+    Raises:
+        FileNotFoundError: If there is no such generation
+    """
+    generations = list_generations(file_path)
+    if number is None:
+        if not generations:
+            raise FileNotFoundError(f"No backup generations for {file_path}")
+        generation = generations[-1]
+    else:
+        generation = next((g for g in generations if g['number'] == number), None)
+        if generation is None:
+            raise FileNotFoundError(f"No backup generation {number} for {file_path}")
+
+    dir_path = os.path.dirname(file_path) or '.'
+    temp_fd, temp_path = tempfile.mkstemp(dir=dir_path, prefix='.tmp_', suffix=os.path.splitext(file_path)[1])
+    os.close(temp_fd)
+    try:
+        shutil.copy2(generation['path'], temp_path)
+        snapshot(file_path)
+        os.replace(temp_path, file_path)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+    journal_lib = importlib.import_module('2l-journal')
+    try:
+        os.remove(journal_lib.journal_path_for(file_path))
+    except FileNotFoundError:
+        pass
+    return generation
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L Backup - backup generations of 2L state files')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('list', 'List generations, oldest first'),
+                            ('snapshot', 'Add the current content as a generation'),
+                            ('restore', 'Replace the file with a generation'),
+                            ('prune', 'Apply retention limits now')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('file_path', help='Backed-up file (e.g., .2L/global-learnings.yaml)')
+        if name == 'restore':
+            p.add_argument('--generation', type=int, help='Generation number (default: newest)')
+        if name == 'prune':
+            p.add_argument('--keep', type=int, help='Generations to keep (default: TWOL_BACKUP_KEEP or 10)')
+            p.add_argument('--max-age-days', type=float, help='Drop generations older than this')
+
+    args = parser.parse_args()
+    yaml_io = importlib.import_module('2l-yaml-io')
+
+    try:
+        if args.command == 'list':
+            generations = list_generations(args.file_path)
+            if not generations:
+                print(f"No backup generations for {args.file_path}")
+            for g in generations:
+                written = datetime.fromtimestamp(g['mtime']).isoformat(timespec='seconds')
+                print(f"{g['number']:>6}  {written}  {g['size']:>10} bytes  {g['path']}")
+
+        elif args.command == 'snapshot':
+            with yaml_io.locked(args.file_path):
+                path = snapshot(args.file_path)
+            print(f"Snapshot: {path}" if path else "Nothing to snapshot (unchanged, missing, or backups disabled)")
+
+        elif args.command == 'restore':
+            with yaml_io.locked(args.file_path):
+                generation = restore(args.file_path, args.generation)
+            print(f"Restored {args.file_path} from generation {generation['number']} ({generation['path']})")
+
+        elif args.command == 'prune':
+            with yaml_io.locked(args.file_path):
+                removed = prune(args.file_path, args.keep, args.max_age_days)
+            print(f"Removed {removed} generation(s)")
+
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+2L Benchmark - Measure how the lib/ Python tools scale
+
+Usage:
+    python3 2l-benchmark.py merge --sizes 1000,10000,100000,500000 \
+                                  --learnings 50
+    python3 2l-benchmark.py yaml --sizes 1000,10000
+
+    # Every entry point (CLI) on seeded synthetic data, one child process
+    # per run so peak RSS is per run; results go to a JSON file and are
+    # compared against a saved baseline (exit 1 on regression)
+    python3 2l-benchmark.py suite --sizes 1000,10000,100000,1000000 \
+                                  --output results.json --baseline baseline.json
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import shutil
+import itertools
+import argparse
+import platform
+import tempfile
+import importlib
+import subprocess
+from datetime import datetime, timedelta
+import yaml
+
+# Allow running from any directory: lib/ modules are loaded by file name
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+yaml_helpers = importlib.import_module('2l-yaml-helpers')
+yaml_io = importlib.import_module('2l-yaml-io')
+events_lib = importlib.import_module('2l-events')
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(os.path.dirname(LIB_DIR), 'templates', 'improvement-vision.md')
+
+SEVERITIES = ['critical', 'medium', 'low']
+CATEGORIES = ['validation', 'integration', 'healing', 'typescript', 'test', 'build']
+ROOT_CAUSE_TOPICS = [
+    'tsconfig path alias not resolved in {component}',
+    'duplicate file created in {component} by two builders',
+    'integration conflict between {component} and shared types',
+    'validation skipped for {component} test suite',
+    'builder overwrote {component} without reading it first',
+    'missing environment variable in {component}',
+]
+
+SUITE_ENTRY_POINTS = ['merge_learnings', 'update_pattern_status', 'detect_recurring_patterns',
+                      'generate_improvement_vision', 'timing', 'dashboard_state']
+
+
+def generate_global_learnings(num_patterns, seed=42):
+    """
+    Generate a synthetic global learnings document.
+
+    Args:
+        num_patterns: Number of patterns to generate
+        seed: Random seed (same seed -> same document)
+
+    Returns:
+        global_data: Dict in global-learnings.yaml schema
+    """
+    rng = random.Random(seed)
+    patterns = []
+    projects = set()
+    for i in range(1, num_patterns + 1):
+        project = f"project-{rng.randrange(max(1, num_patterns // 20))}"
+        projects.add(project)
+        patterns.append({
+            'pattern_id': f"PATTERN-{i:03d}",
+            'name': f"Synthetic issue {i}",
+            'occurrences': rng.randint(1, 5),
+            'projects': [project],
+            'severity': rng.choice(SEVERITIES),
+            'root_cause': f"Root cause {i}: component {rng.randrange(1000)} misconfigured",
+            'proposed_solution': f"Fix component for issue {i}",
+            'status': 'IDENTIFIED',
+            'discovered_in': f"plan-1-iter-{rng.randint(1, 9)}",
+            'discovered_at': '2025-01-01T00:00:00',
+            'source_learnings': [f"learning-{i}"],
+            'iteration_metadata': {
+                'duration_seconds': rng.randint(60, 3600),
+                'healing_rounds': rng.randint(0, 3),
+                'files_modified': rng.randint(1, 40)
+            }
+        })
+    return {
+        'schema_version': '1.0',
+        'aggregated_at': '2025-01-01T00:00:00',
+        'total_projects': len(projects),
+        'total_learnings': num_patterns,
+        'patterns': patterns
+    }
+
+
+def generate_iteration_learnings(global_data, num_learnings, seed=7):
+    """
+    Generate a synthetic iteration learnings document.
+
+    Roughly half the learnings repeat an existing root cause so both the
+    merge and the append paths are exercised.
+
+    Args:
+        global_data: Global learnings the iteration will be merged into
+        num_learnings: Number of learnings to generate
+        seed: Random seed
+
+    Returns:
+        iteration_data: Dict in learnings.yaml schema
+    """
+    rng = random.Random(seed)
+    patterns = global_data['patterns']
+    learnings = []
+    for i in range(num_learnings):
+        if patterns and rng.random() < 0.5:
+            source = rng.choice(patterns)
+            root_cause, severity = source['root_cause'], source['severity']
+        else:
+            topic = ROOT_CAUSE_TOPICS[i % len(ROOT_CAUSE_TOPICS)]
+            root_cause = topic.format(component=f"module-{i % max(1, num_learnings // 2)}")
+            severity = rng.choice(SEVERITIES)
+        learnings.append({
+            'id': f"bench-learning-{i}",
+            'iteration': 'plan-1-iter-1',
+            'category': rng.choice(CATEGORIES),
+            'issue': f"Benchmark issue {i}",
+            'severity': severity,
+            'root_cause': root_cause,
+            'solution': f"Benchmark solution {i}",
+            'recurrence_risk': 'high' if severity == 'critical' else 'medium',
+            'affected_files': [f"src/module-{rng.randrange(100)}/index.ts"]
+        })
+    # Same top-level shape as the validator's learning capture
+    return {
+        'schema_version': '1.0',
+        'project': 'bench-project',
+        'plan': 'plan-1',
+        'iteration': 'iteration-1',
+        'created_at': '2025-01-01T00:00:00',
+        'learnings': learnings
+    }
+
+
+def generate_events(num_events, seed=11):
+    """
+    Generate a synthetic orchestration event stream.
+
+    Plans run iterations through the /2l-mvp phases; each phase spawns a
+    few agents that log agent_spawn, agent_start and agent_complete, so the
+    stream has the same event mix and span structure as a real run.
+
+    Args:
+        num_events: Number of events to generate
+        seed: Random seed
+
+    Returns:
+        events: Iterator of event dicts in events.jsonl schema
+    """
+    return itertools.islice(_event_stream(random.Random(seed)), num_events)
+
+
+def _event_stream(rng):
+    clock = datetime(2025, 1, 1)
+    phases = [('exploration', 'explorer', 2), ('planning', 'planner', 1), ('building', 'builder', 4),
+              ('integration', 'integrator', 2), ('validation', 'validator', 1)]
+    plan = 0
+
+    def event(event_type, data, phase, agent_id='orchestrator'):
+        nonlocal clock
+        clock += timedelta(seconds=rng.randint(1, 30))
+        return events_lib.make_event(event_type, data, phase, agent_id,
+                                     timestamp=clock.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+    while True:
+        plan += 1
+        yield event('plan_start', f"Plan plan-{plan} started in MASTER mode", 'initialization')
+        for iteration in range(1, rng.randint(2, 4)):
+            yield event('iteration_start', f"Iteration {iteration}: Synthetic iteration", 'initialization')
+            for phase, kind, agents in phases:
+                yield event('phase_change', f"Starting {phase.capitalize()} phase", phase)
+                for n in range(1, rng.randint(1, agents) + 1):
+                    agent_id = f"{kind}-{n}"
+                    yield event('agent_spawn', f"{kind.capitalize()}-{n}: Synthetic task", phase, agent_id)
+                    yield event('agent_start', f"{kind.capitalize()}-{n}: Starting", phase, agent_id)
+                    clock += timedelta(seconds=rng.randint(30, 900))
+                    yield event('agent_complete', f"{kind.capitalize()}-{n}: Complete", phase, agent_id)
+            yield event('iteration_complete', f"Iteration {iteration} completed successfully", 'complete')
+
+
+def write_events(path, num_events, seed=11):
+    """Write generate_events() output as JSONL."""
+    with open(path, 'wb') as f:
+        for event in generate_events(num_events, seed):
+            f.write(events_lib.encode_event(event))
+
+
+def legacy_merge(global_data, iteration_data, *metadata):
+    """
+    Reference merge using per-learning scans (the pre-index algorithm).
+
+    Args:
+        global_data: Parsed global learnings (modified in place)
+        iteration_data: Parsed iteration learnings
+        metadata: discovered_in, duration_seconds, healing_rounds, files_modified
+
+    Returns:
+        global_data: The same dict
+    """
+    discovered_in, duration_seconds, healing_rounds, files_modified = metadata
+    project_name = iteration_data.get('project', 'unknown')
+    for learning in iteration_data.get('learnings', []):
+        pattern = {
+            'pattern_id': yaml_helpers.generate_pattern_id(global_data['patterns']),
+            'name': learning['issue'][:60],
+            'occurrences': 1,
+            'projects': [project_name],
+            'severity': learning['severity'],
+            'root_cause': learning['root_cause'],
+            'proposed_solution': learning['solution'],
+            'status': 'IDENTIFIED',
+            'discovered_in': discovered_in,
+            'discovered_at': '',
+            'source_learnings': [learning['id']],
+            'iteration_metadata': {
+                'duration_seconds': duration_seconds,
+                'healing_rounds': healing_rounds,
+                'files_modified': files_modified
+            }
+        }
+        existing = yaml_helpers.find_similar_pattern(global_data['patterns'], pattern)
+        if existing:
+            existing['occurrences'] += 1
+            if project_name not in existing['projects']:
+                existing['projects'].append(project_name)
+            existing['source_learnings'].append(learning['id'])
+        else:
+            global_data['patterns'].append(pattern)
+            global_data['total_learnings'] += 1
+
+    all_projects = set()
+    for pattern in global_data['patterns']:
+        all_projects.update(pattern.get('projects', []))
+    global_data['total_projects'] = len(all_projects)
+    return global_data
+
+
+def strip_timestamps(global_data):
+    """Blank out wall-clock fields so two merges can be compared exactly."""
+    global_data['aggregated_at'] = ''
+    for pattern in global_data['patterns']:
+        pattern['discovered_at'] = ''
+    return global_data
+
+
+def bench_merge(sizes, num_learnings, legacy_limit):
+    """
+    Time merge_learnings_data against the legacy scan-per-learning merge.
+
+    Args:
+        sizes: List of global pattern counts to benchmark
+        num_learnings: Learnings merged per run
+        legacy_limit: Largest size to also run the legacy merge on
+
+    Returns:
+        results: List of result dicts, one per size
+    """
+    metadata = ('plan-1-iter-1', 600, 1, 10)
+    results = []
+    for size in sizes:
+        global_data = generate_global_learnings(size)
+        iteration_data = generate_iteration_learnings(global_data, num_learnings)
+
+        indexed_data = copy.deepcopy(global_data)
+        start = time.perf_counter()
+        yaml_helpers.merge_learnings_data(indexed_data, iteration_data, *metadata)
+        indexed_seconds = time.perf_counter() - start
+
+        result = {'patterns': size, 'learnings': num_learnings,
+                  'indexed_seconds': indexed_seconds}
+
+        if size <= legacy_limit:
+            legacy_data = copy.deepcopy(global_data)
+            start = time.perf_counter()
+            legacy_merge(legacy_data, iteration_data, *metadata)
+            result['legacy_seconds'] = time.perf_counter() - start
+            result['identical'] = strip_timestamps(indexed_data) == strip_timestamps(legacy_data)
+
+        results.append(result)
+    return results
+
+
+def print_merge_results(results):
+    """Print merge benchmark results as a table."""
+    print(f"{'patterns':>10} {'learnings':>10} {'indexed (s)':>12} {'legacy (s)':>12} {'speedup':>9} {'identical':>10}")
+    for r in results:
+        if 'legacy_seconds' in r:
+            speedup = r['legacy_seconds'] / r['indexed_seconds'] if r['indexed_seconds'] else float('inf')
+            legacy = f"{r['legacy_seconds']:.4f}"
+            speedup = f"{speedup:.1f}x"
+            identical = 'yes' if r['identical'] else 'NO'
+        else:
+            legacy, speedup, identical = '-', '-', '-'
+        print(f"{r['patterns']:>10} {r['learnings']:>10} {r['indexed_seconds']:>12.4f} {legacy:>12} {speedup:>9} {identical:>10}")
+
+
+def bench_yaml(sizes):
+    """
+    Time the pure-Python and LibYAML load/dump paths on the same document.
+
+    Args:
+        sizes: List of global pattern counts to benchmark
+
+    Returns:
+        results: List of result dicts, one per size
+    """
+    results = []
+    for size in sizes:
+        global_data = generate_global_learnings(size)
+        result = {'patterns': size}
+
+        start = time.perf_counter()
+        python_text = yaml.dump(global_data, Dumper=yaml.SafeDumper,
+                                default_flow_style=False, sort_keys=False)
+        result['python_dump_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        python_data = yaml.load(python_text, Loader=yaml.SafeLoader)
+        result['python_load_seconds'] = time.perf_counter() - start
+
+        if yaml_io.BACKEND == 'libyaml':
+            start = time.perf_counter()
+            c_text = yaml_io.dump_yaml(global_data)
+            result['c_dump_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            c_data = yaml_io.parse_yaml(python_text)
+            result['c_load_seconds'] = time.perf_counter() - start
+
+            result['identical'] = c_text == python_text and c_data == python_data
+
+        results.append(result)
+    return results
+
+
+def print_yaml_results(results):
+    """Print YAML backend benchmark results as a table."""
+    print(yaml_io.backend_report())
+    print(f"{'patterns':>10} {'py load (s)':>12} {'c load (s)':>11} {'py dump (s)':>12} {'c dump (s)':>11} {'identical':>10}")
+    for r in results:
+        if 'c_load_seconds' in r:
+            c_load = f"{r['c_load_seconds']:.4f}"
+            c_dump = f"{r['c_dump_seconds']:.4f}"
+            identical = 'yes' if r['identical'] else 'NO'
+        else:
+            c_load, c_dump, identical = '-', '-', '-'
+        print(f"{r['patterns']:>10} {r['python_load_seconds']:>12.4f} {c_load:>11} "
+              f"{r['python_dump_seconds']:>12.4f} {c_dump:>11} {identical:>10}")
+
+
+# Runs a lib/ script as __main__ and records its own peak RSS on exit.
+# The child's rusage would also count the benchmark process it was forked
+# from (ru_maxrss survives exec), so the peak is read from VmHWM, which
+# starts over at exec; ru_maxrss is the fallback where /proc is missing.
+_MEASURE_WRAPPER = """
+import os, sys, runpy, resource
+script, report = sys.argv[1], os.environ['TWOL_BENCH_RSS_FILE']
+sys.argv = sys.argv[1:]
+sys.path[0] = os.path.dirname(os.path.abspath(script))
+def peak_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+try:
+    runpy.run_path(script, run_name='__main__')
+finally:
+    with open(report, 'w') as f:
+        f.write(str(peak_kb()))
+"""
+
+
+def run_measured(script, args, cwd):
+    """
+    Run a lib/ script in a child interpreter and measure it.
+
+    Args:
+        script: Path to the script
+        args: Command-line arguments
+        cwd: Working directory
+
+    Returns:
+        result: Dict with wall_seconds, peak_rss_kb and returncode
+    """
+    rss_file = os.path.join(cwd, '.peak_rss')
+    env = dict(os.environ, TWOL_BENCH_RSS_FILE=rss_file)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-c', _MEASURE_WRAPPER, script] + args, cwd=cwd, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    wall_seconds = time.perf_counter() - start
+
+    try:
+        with open(rss_file) as f:
+            peak_rss_kb = int(f.read())
+    except (OSError, ValueError):
+        peak_rss_kb = None
+    result = {'wall_seconds': wall_seconds, 'peak_rss_kb': peak_rss_kb, 'returncode': process.returncode}
+    if process.returncode != 0:
+        result['error'] = process.stderr.decode('utf-8', errors='replace').strip()[-500:]
+    return result
+
+
+def prepare_suite_data(data_dir, size, event_size, num_learnings, seed):
+    """
+    Write the seeded input files for one suite size.
+
+    Returns:
+        paths: Dict of input file paths
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    global_data = generate_global_learnings(size, seed=seed)
+    paths = {
+        'global': os.path.join(data_dir, 'global-learnings.yaml'),
+        'learnings': os.path.join(data_dir, 'learnings.yaml'),
+        'patterns': os.path.join(data_dir, 'patterns.json'),
+        'events': os.path.join(data_dir, 'events.jsonl'),
+        'pattern_id': global_data['patterns'][len(global_data['patterns']) // 2]['pattern_id'],
+    }
+    with open(paths['global'], 'w') as f:
+        yaml_io.dump_yaml(global_data, f)
+    with open(paths['learnings'], 'w') as f:
+        yaml_io.dump_yaml(generate_iteration_learnings(global_data, num_learnings, seed=seed + 1), f)
+    write_events(paths['events'], event_size, seed=seed + 2)
+
+    # Detector output feeds the vision generator
+    result = subprocess.run([sys.executable, os.path.join(LIB_DIR, '2l-pattern-detector.py'),
+                             '--global-learnings', paths['global'], '--output', paths['patterns']],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Pattern detection failed: {result.stderr.strip()}")
+    return paths
+
+
+def suite_command(entry_point, paths, run_dir, vision_limit):
+    """
+    Script and arguments for one entry point, run inside run_dir.
+
+    Inputs that an entry point reads through the sidecar cache or modifies
+    are copied into run_dir first, so every run starts from the same file
+    with a cold cache.
+
+    Returns:
+        (script, args)
+    """
+    def fresh(name):
+        target = os.path.join(run_dir, os.path.basename(paths[name]))
+        shutil.copyfile(paths[name], target)
+        return target
+
+    if entry_point == 'merge_learnings':
+        return os.path.join(LIB_DIR, '2l-yaml-helpers.py'), [
+            'merge_learnings', '--iteration-learnings', paths['learnings'],
+            '--global-learnings', fresh('global'), '--discovered-in', 'plan-1-iter-1',
+            '--duration', '600', '--healing-rounds', '1', '--files-modified', '10']
+    if entry_point == 'update_pattern_status':
+        return os.path.join(LIB_DIR, '2l-yaml-helpers.py'), [
+            'update_pattern_status', '--pattern-id', paths['pattern_id'], '--status', 'IMPLEMENTED',
+            '--metadata-json', '{"implemented_in_plan": "plan-2"}', '--global-learnings', fresh('global')]
+    if entry_point == 'detect_recurring_patterns':
+        return os.path.join(LIB_DIR, '2l-pattern-detector.py'), [
+            '--global-learnings', fresh('global'), '--output', os.path.join(run_dir, 'patterns.json')]
+    if entry_point == 'generate_improvement_vision':
+        return os.path.join(LIB_DIR, '2l-vision-generator.py'), [
+            '--patterns-json', paths['patterns'], '--template', TEMPLATE_PATH,
+            '--output-dir', run_dir, '--plan-id', 'plan-2', '--limit', str(vision_limit)]
+    if entry_point == 'timing':
+        return os.path.join(LIB_DIR, '2l-timing.py'), [
+            '--events-file', paths['events'], '--output', os.path.join(run_dir, 'timing.json')]
+    if entry_point == 'dashboard_state':
+        fresh('events')
+        return os.path.join(LIB_DIR, '2l-dashboard-state.py'), ['--state-dir', run_dir, 'refresh']
+    raise ValueError(f"Unknown entry point: {entry_point}")
+
+
+def bench_suite(sizes, event_sizes, entry_points, num_learnings=50, repeat=1,
+                vision_limit=1000, seed=42, work_dir=None):
+    """
+    Time every entry point across sizes on seeded synthetic data.
+
+    Args:
+        sizes: Global pattern counts (global-learnings.yaml size)
+        event_sizes: events.jsonl event counts, paired with sizes by position
+            (the last one is reused if there are fewer)
+        entry_points: Names from SUITE_ENTRY_POINTS
+        num_learnings: Learnings in the iteration learnings.yaml
+        repeat: Runs per measurement (fastest wall time, largest RSS kept)
+        vision_limit: Visions generated per generate_improvement_vision run
+        seed: Base random seed
+        work_dir: Directory for generated data (default: temporary, removed)
+
+    Returns:
+        results: List of result dicts, one per (entry point, size)
+    """
+    owns_work_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='2l-bench-')
+    results = []
+    try:
+        for i, size in enumerate(sizes):
+            event_size = event_sizes[min(i, len(event_sizes) - 1)]
+            print(f"Generating data: {size} patterns, {event_size} events...", file=sys.stderr)
+            paths = prepare_suite_data(os.path.join(work_dir, f"data-{size}"), size, event_size,
+                                       num_learnings, seed)
+            for entry_point in entry_points:
+                best = None
+                for _ in range(repeat):
+                    run_dir = os.path.join(work_dir, 'run')
+                    shutil.rmtree(run_dir, ignore_errors=True)
+                    os.makedirs(run_dir)
+                    script, script_args = suite_command(entry_point, paths, run_dir, vision_limit)
+                    run = run_measured(script, script_args, run_dir)
+                    if best is None or run['returncode'] != 0:
+                        best = run
+                    else:
+                        best['wall_seconds'] = min(best['wall_seconds'], run['wall_seconds'])
+                        best['peak_rss_kb'] = max(best['peak_rss_kb'] or 0, run['peak_rss_kb'] or 0) or None
+                    if run['returncode'] != 0:
+                        break
+                scale = event_size if entry_point in ('timing', 'dashboard_state') else size
+                result = {'entry_point': entry_point, 'size': scale}
+                result.update(best)
+                results.append(result)
+                print(f"  {entry_point:<28} {scale:>9} {best['wall_seconds']:>9.3f}s", file=sys.stderr)
+    finally:
+        if owns_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def suite_report(results, config):
+    """Results file contents: environment, configuration and measurements."""
+    return {
+        'schema_version': '1.0',
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'yaml_backend': yaml_io.BACKEND,
+        'config': config,
+        'results': results,
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance, min_seconds=0.5):
+    """
+    Compare suite results with a saved baseline report.
+
+    A measurement regresses when wall time or peak RSS grows by more than
+    tolerance (a fraction); wall times under min_seconds in both runs are
+    treated as noise.
+
+    Returns:
+        comparisons: List of dicts (entry_point, size, ratios, regressed)
+    """
+    previous = {(r['entry_point'], r['size']): r for r in baseline.get('results', [])}
+    comparisons = []
+    for r in results:
+        base = previous.get((r['entry_point'], r['size']))
+        if base is None or r['returncode'] != 0 or base.get('returncode', 0) != 0:
+            continue
+        wall_ratio = r['wall_seconds'] / base['wall_seconds'] if base['wall_seconds'] else None
+        rss_ratio = (r['peak_rss_kb'] / base['peak_rss_kb']
+                     if r['peak_rss_kb'] and base.get('peak_rss_kb') else None)
+        slower = (wall_ratio is not None and wall_ratio > 1 + tolerance
+                  and max(r['wall_seconds'], base['wall_seconds']) >= min_seconds)
+        bigger = rss_ratio is not None and rss_ratio > 1 + tolerance
+        comparisons.append({
+            'entry_point': r['entry_point'], 'size': r['size'],
+            'wall_ratio': wall_ratio, 'rss_ratio': rss_ratio,
+            'regressed': slower or bigger,
+        })
+    return comparisons
+
+
+def print_suite_results(results, comparisons=None):
+    """Print suite results (and baseline ratios) as a table."""
+    ratios = {(c['entry_point'], c['size']): c for c in comparisons or []}
+    header = f"{'entry point':<28} {'size':>9} {'wall (s)':>10} {'peak RSS (MiB)':>15}"
+    if comparisons is not None:
+        header += f" {'wall vs base':>13} {'RSS vs base':>12}"
+    print(header)
+    for r in results:
+        if r['returncode'] != 0:
+            print(f"{r['entry_point']:<28} {r['size']:>9} FAILED (exit {r['returncode']}): {r.get('error', '')}")
+            continue
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r['peak_rss_kb'] else '-'
+        line = f"{r['entry_point']:<28} {r['size']:>9} {r['wall_seconds']:>10.3f} {rss:>15}"
+        c = ratios.get((r['entry_point'], r['size']))
+        if c:
+            wall = f"{c['wall_ratio']:.2f}x" if c['wall_ratio'] is not None else '-'
+            rss = f"{c['rss_ratio']:.2f}x" if c['rss_ratio'] is not None else '-'
+            line += f" {wall:>13} {rss:>12}" + ('  REGRESSION' if c['regressed'] else '')
+        elif comparisons is not None:
+            line += f" {'-':>13} {'-':>12}"
+        print(line)
+
+
+def parse_sizes(value):
+    """Parse a comma-separated list of sizes (e.g., "1000,10000")."""
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark 2L lib/ Python tools')
+    parser.add_argument('benchmark', choices=['merge', 'yaml', 'suite'])
+    parser.add_argument('--sizes', type=parse_sizes,
+                        help='Comma-separated global pattern counts '
+                             '(default: 1000,10000,100000,500000; suite: 1000,10000,100000,1000000)')
+    parser.add_argument('--learnings', type=int, default=50,
+                        help='Learnings merged per run (default: 50)')
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help='Largest size to also run the legacy merge on (default: 100000)')
+
+    # suite options
+    parser.add_argument('--event-sizes', type=parse_sizes,
+                        help='suite: events.jsonl sizes, paired with --sizes (default: same as --sizes)')
+    parser.add_argument('--entry-points', default=','.join(SUITE_ENTRY_POINTS),
+                        help=f"suite: comma-separated subset of {','.join(SUITE_ENTRY_POINTS)}")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='suite: runs per measurement, fastest kept (default: 1)')
+    parser.add_argument('--vision-limit', type=int, default=1000,
+                        help='suite: visions per generate_improvement_vision run (default: 1000)')
+    parser.add_argument('--seed', type=int, default=42, help='suite: base random seed (default: 42)')
+    parser.add_argument('--work-dir', help='suite: keep generated data here (default: temporary)')
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help='suite: results JSON file (default: benchmark-results.json)')
+    parser.add_argument('--baseline', help='suite: results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='suite: allowed slowdown/growth vs baseline as a fraction (default: 0.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.5,
+                        help='suite: wall times below this are noise, never regressions (default: 0.5)')
+
+    args = parser.parse_args()
+    if args.sizes is None:
+        args.sizes = parse_sizes('1000,10000,100000,1000000' if args.benchmark == 'suite'
+                                 else '1000,10000,100000,500000')
+
+    if args.benchmark == 'merge':
+        results = bench_merge(args.sizes, args.learnings, args.legacy_limit)
+        print_merge_results(results)
+        if any(r.get('identical') is False for r in results):
+            print("ERROR: Indexed merge output differs from legacy merge", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.benchmark == 'yaml':
+        results = bench_yaml(args.sizes)
+        print_yaml_results(results)
+        if any(r.get('identical') is False for r in results):
+            print("ERROR: LibYAML output differs from pure-Python output", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.benchmark == 'suite':
+        entry_points = [e.strip() for e in args.entry_points.split(',') if e.strip()]
+        unknown = [e for e in entry_points if e not in SUITE_ENTRY_POINTS]
+        if unknown:
+            parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+        if args.repeat < 1:
+            parser.error('--repeat must be at least 1')
+
+        try:
+            baseline = None
+            if args.baseline:
+                with open(args.baseline, 'r') as f:
+                    baseline = json.load(f)
+
+            event_sizes = args.event_sizes or args.sizes
+            results = bench_suite(args.sizes, event_sizes, entry_points, args.learnings, args.repeat,
+                                  args.vision_limit, args.seed, args.work_dir)
+            config = {'sizes': args.sizes, 'event_sizes': event_sizes, 'entry_points': entry_points,
+                      'learnings': args.learnings, 'repeat': args.repeat,
+                      'vision_limit': args.vision_limit, 'seed': args.seed}
+            with open(args.output, 'w') as f:
+                json.dump(suite_report(results, config), f, indent=2)
+                f.write('\n')
+
+            comparisons = compare_to_baseline(results, baseline, args.tolerance, args.min_seconds) if baseline else None
+            print_suite_results(results, comparisons)
+            print(f"\nResults written to {args.output}")
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if any(r['returncode'] != 0 for r in results):
+            print("ERROR: Some entry points failed", file=sys.stderr)
+            sys.exit(1)
+        if comparisons and any(c['regressed'] for c in comparisons):
+            print(f"ERROR: Regression beyond {args.tolerance:.0%} of baseline", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+2L Dashboard Server - Static files plus an incremental events feed
+
+Serves the .2L directory (dashboard/index.html, events.jsonl) like
+`python3 -m http.server`, and adds two endpoints so the dashboard only
+transfers events it has not seen yet:
+
+    GET /events?since=<cursor>
+        Complete lines appended after the cursor (application/x-ndjson).
+        The next cursor is returned in the X-Events-Cursor header;
+        X-Events-More: 1 means the response was capped and more is ready.
+
+    GET /events/stream?since=<cursor>
+        Server-Sent Events: one `data:` line per event, with the cursor
+        after it as the event id (EventSource sends it back as
+        Last-Event-ID when it reconnects).
+
+GET /dashboard/state.json brings the dashboard state snapshot (see
+2l-dashboard-state.py) up to date before serving it, so a new page starts
+from the snapshot and only requests events after its cursor.
+
+A cursor is "<inode>:<byte offset>" in events.jsonl (a bare offset is
+accepted too; no cursor means the start of the file). The inode lets the
+feed follow rotation (see 2l-event-log.py): a cursor into a segment that
+has since been archived finishes that segment before moving on to the new
+events.jsonl (EventLog.read_from). The file is tailed by stat polling, which needs no
+dependencies and is cheap at the dashboard's event rates.
+
+Usage:
+    python3 2l-dashboard-server.py --port 8080 [--state-dir .2L]
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+event_log_lib = importlib.import_module('2l-event-log')
+dashboard_state = importlib.import_module('2l-dashboard-state')
+
+POLL_INTERVAL = 0.5  # seconds between stat checks while streaming
+HEARTBEAT_INTERVAL = 15  # seconds between SSE keep-alive comments
+
+
+class DashboardHandler(SimpleHTTPRequestHandler):
+    """Static files from the state directory, plus /events and /events/stream."""
+
+    def __init__(self, *args, event_log=None, **kwargs):
+        self.event_log = event_log
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass  # Run in the background; the dashboard polls constantly
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/' + dashboard_state.SNAPSHOT_PATH.replace(os.sep, '/'):
+            # Serve a current snapshot; a failed refresh still serves the last one
+            try:
+                dashboard_state.refresh_snapshot(self.event_log.state_dir, dashboard_state.DEFAULT_MAX_AGE)
+            except OSError:
+                pass
+        if url.path not in ('/events', '/events/stream'):
+            return super().do_GET()
+
+        query = parse_qs(url.query)
+        since = self.headers.get('Last-Event-ID') or query.get('since', [None])[0]
+        try:
+            cursor = event_log_lib.parse_cursor(since)
+        except ValueError:
+            self.send_error(400, f"Invalid cursor: {since}")
+            return
+
+        if url.path == '/events':
+            self._send_events(cursor)
+        else:
+            self._stream_events(cursor)
+
+    def _send_events(self, cursor):
+        payload, cursor, more = self.event_log.read_from(cursor)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('X-Events-Cursor', event_log_lib.format_cursor(*cursor))
+        self.send_header('X-Events-More', '1' if more else '0')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_events(self, cursor):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.close_connection = True
+
+        last_write = time.monotonic()
+        try:
+            while True:
+                payload, cursor, more = self.event_log.read_from(cursor)
+                messages = [b'data: ' + line + b'\n\n' for line in payload.splitlines() if line.strip()]
+                if messages:
+                    # The id goes on the last event of the batch: resuming from it skips the whole batch
+                    messages[-1] = (b'id: ' + event_log_lib.format_cursor(*cursor).encode() + b'\n') + messages[-1]
+                    self.wfile.write(b''.join(messages))
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                    if more:
+                        continue
+                elif time.monotonic() - last_write >= HEARTBEAT_INTERVAL:
+                    self.wfile.write(b': keep-alive\n\n')
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                time.sleep(POLL_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Browser closed the page
+
+
+def serve(state_dir, port, bind='127.0.0.1'):
+    """Serve the dashboard until interrupted."""
+    handler = partial(DashboardHandler, directory=state_dir, event_log=event_log_lib.EventLog(state_dir))
+    server = ThreadingHTTPServer((bind, port), handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the 2L dashboard with an incremental events feed')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--bind', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--state-dir', default='.2L', help='2L state directory to serve (default: .2L)')
+    args = parser.parse_args()
+
+    try:
+        serve(args.state_dir, args.port, args.bind)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+2L Dashboard State - Snapshot of derived dashboard state
+
+The dashboard derives its header (status, phase, iteration), metrics,
+active agents and timeline from the events. Replaying a long log in the
+browser on every page load freezes the tab, so the same derivation runs
+here and is saved to .2L/dashboard/state.json together with the cursor
+(see 2l-event-log.py) of the last event it covers. The dashboard applies
+the snapshot, then asks the feed only for events after that cursor.
+
+The snapshot is refreshed incrementally (only bytes appended since the
+last refresh are read) by the event writers (EventWriter flushes, and
+log_2l_event on lifecycle events) and by the dashboard server before it
+serves the snapshot.
+
+Usage:
+    python3 2l-dashboard-state.py refresh [--max-age SECONDS]
+    python3 2l-dashboard-state.py show
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import importlib
+import tempfile
+
+yaml_io = importlib.import_module('2l-yaml-io')
+event_log_lib = importlib.import_module('2l-event-log')
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = os.path.join('dashboard', 'state.json')  # Under the state directory
+RECENT_EVENTS = 50  # Matches MAX_EVENTS_DISPLAY in the dashboard
+DEFAULT_MAX_AGE = 5.0  # seconds
+
+_ITERATION = re.compile(r'Iteration (\d+)')
+
+
+class DashboardState:
+    """
+    Dashboard state derived from events, mirroring processEvent() in
+    2l-dashboard-template.html.
+    """
+
+    def __init__(self):
+        self.cursor = (None, 0)
+        self.total_events = 0
+        self.plan = None
+        self.status = None
+        self.start_time = None
+        self.iteration = None
+        self.phase = None
+        self.active_agents = {}
+        self.event_counts = {}
+        self.recent_events = []
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        state = cls()
+        state.cursor = event_log_lib.parse_cursor(snapshot.get('cursor'))
+        state.total_events = snapshot.get('total_events', 0)
+        state.plan = snapshot.get('plan')
+        state.status = snapshot.get('status')
+        state.start_time = snapshot.get('start_time')
+        state.iteration = snapshot.get('iteration')
+        state.phase = snapshot.get('phase')
+        state.active_agents = snapshot.get('active_agents', {})
+        state.event_counts = snapshot.get('event_counts', {})
+        state.recent_events = snapshot.get('recent_events', [])
+        return state
+
+    def to_snapshot(self):
+        return {
+            'version': SNAPSHOT_VERSION,
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'cursor': event_log_lib.format_cursor(*self.cursor),
+            'total_events': self.total_events,
+            'plan': self.plan,
+            'status': self.status,
+            'start_time': self.start_time,
+            'iteration': self.iteration,
+            'phase': self.phase,
+            'active_agents': self.active_agents,
+            'event_counts': self.event_counts,
+            'recent_events': self.recent_events,
+        }
+
+    def apply(self, event):
+        """Update state with one event."""
+        event_type = event.get('event_type')
+        data = str(event.get('data', ''))
+        self.total_events += 1
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+
+        if event_type == 'plan_start':
+            self.plan = event_log_lib.plan_from_event(event)
+            self.start_time = event.get('timestamp')
+            self.status = 'Running'
+        elif event_type == 'iteration_start':
+            match = _ITERATION.search(data)
+            self.iteration = match.group(1) if match else '-'
+        elif event_type == 'phase_change':
+            self.phase = data.replace('Phase: ', '', 1).replace('Starting ', '', 1)
+        elif event_type == 'agent_start':
+            self.active_agents[event.get('agent_id')] = {
+                'task': event.get('data'),
+                'start_time': event.get('timestamp'),
+            }
+        elif event_type == 'agent_complete':
+            self.active_agents.pop(event.get('agent_id'), None)
+        elif event_type == 'iteration_complete':
+            self.status = 'Complete'
+
+        self.recent_events.append(event)
+        if len(self.recent_events) > RECENT_EVENTS:
+            del self.recent_events[0]
+
+    def catch_up(self, event_log):
+        """
+        Apply every event appended since the state's cursor.
+
+        Returns:
+            count: Number of events applied
+        """
+        count = 0
+        while True:
+            payload, cursor, more = event_log.read_from(self.cursor)
+            for line in payload.splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    self.apply(event)
+                    count += 1
+            self.cursor = cursor
+            if not more:
+                return count
+
+
+def snapshot_path(state_dir='.2L'):
+    return os.path.join(state_dir, SNAPSHOT_PATH)
+
+
+def load_snapshot(state_dir='.2L'):
+    """Current snapshot dict, or None if missing/unreadable."""
+    try:
+        with open(snapshot_path(state_dir), 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get('version') == SNAPSHOT_VERSION else None
+
+
+def _write_snapshot(path, snapshot):
+    temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(temp_fd, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(temp_path, path)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+
+def refresh_snapshot(state_dir='.2L', max_age=0.0):
+    """
+    Bring the snapshot up to date with the event log.
+
+    Args:
+        state_dir: 2L state directory
+        max_age: Skip the refresh if the snapshot file is younger than this (seconds)
+
+    Returns:
+        snapshot: The snapshot dict (None if there are no events yet)
+    """
+    path = snapshot_path(state_dir)
+    event_log = event_log_lib.EventLog(state_dir)
+    if not os.path.exists(event_log.active_path) and not os.path.exists(path):
+        return None
+    try:
+        if max_age and time.time() - os.path.getmtime(path) < max_age:
+            return load_snapshot(state_dir)
+    except OSError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with yaml_io.locked(path):
+        snapshot = load_snapshot(state_dir)
+        state = DashboardState.from_snapshot(snapshot) if snapshot else DashboardState()
+        if state.catch_up(event_log) or snapshot is None:
+            snapshot = state.to_snapshot()
+            _write_snapshot(path, snapshot)
+        else:
+            os.utime(path)  # Checked just now: restart the max_age clock
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the 2L dashboard state snapshot')
+    parser.add_argument('--state-dir', default='.2L', help='2L state directory (default: .2L)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    refresh = sub.add_parser('refresh', help='Apply new events to the snapshot')
+    refresh.add_argument('--max-age', type=float, default=0.0,
+                         help='Skip if the snapshot was refreshed within this many seconds')
+    sub.add_parser('show', help='Print the current snapshot')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'refresh':
+            snapshot = refresh_snapshot(args.state_dir, args.max_age)
+            if snapshot is not None:
+                print(f"Snapshot covers {snapshot['total_events']} events (cursor {snapshot['cursor']})")
+        elif args.command == 'show':
+            print(json.dumps(load_snapshot(args.state_dir), indent=2, ensure_ascii=False))
+
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
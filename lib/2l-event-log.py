@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+2L Event Log - Rotated event segments with a plan/iteration/time index
+
+.2L/events.jsonl is the active segment: every writer (log_2l_event, the
+buffered writer in 2l-events.py) keeps appending to it. Rotation renames
+it into .2L/events/segment-NNNNNN.jsonl and the next append starts a new
+active segment. Segments are rotated when a new plan starts and when the
+active segment outgrows a size limit.
+
+.2L/events/index.json maps contiguous runs of events to byte ranges:
+
+    {"segment": "segment-000003.jsonl", "plan": "plan-5", "iteration": 7,
+     "start": 0, "end": 18342, "events": 96,
+     "first_timestamp": "...", "last_timestamp": "..."}
+
+Plan and iteration come from plan_start ("Plan <id> ...") and
+iteration_start ("Iteration <n>...") events, carried across segments.
+The active segment is indexed incrementally (only bytes appended since
+the last refresh are scanned), so a query for "plan-5 iteration 7" seeks
+straight to its byte ranges instead of scanning history.
+
+Usage:
+    python3 2l-event-log.py index
+    python3 2l-event-log.py query --plan plan-5 --iteration 7
+    python3 2l-event-log.py query --since 2025-10-10T00:00:00Z
+    python3 2l-event-log.py rotate [--max-bytes N] [--split-plans]
+    python3 2l-event-log.py follow
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import importlib
+import tempfile
+
+yaml_io = importlib.import_module('2l-yaml-io')
+
+INDEX_VERSION = 1
+ACTIVE_NAME = 'events.jsonl'
+SEGMENT_DIR = 'events'
+INDEX_NAME = 'index.json'
+DEFAULT_SEGMENT_BYTES = int(os.environ.get('TWOL_EVENTS_SEGMENT_BYTES', 4 * 1024 * 1024))
+
+MAX_READ_BYTES = 1024 * 1024  # Per read_from() call
+
+_PLAN_START = re.compile(r'Plan (\S+)')
+_ITERATION_START = re.compile(r'Iteration (\d+)')
+
+
+def plan_from_event(event):
+    """Plan ID announced by a plan_start event (None for other events)."""
+    if event.get('event_type') != 'plan_start':
+        return None
+    match = _PLAN_START.match(str(event.get('data', '')))
+    return match.group(1) if match else 'unknown'
+
+
+def iteration_from_event(event):
+    """Iteration number announced by an iteration_start event (None otherwise)."""
+    if event.get('event_type') != 'iteration_start':
+        return None
+    match = _ITERATION_START.match(str(event.get('data', '')))
+    return int(match.group(1)) if match else None
+
+
+def parse_cursor(value):
+    """
+    Parse a read cursor (see EventLog.read_from).
+
+    Args:
+        value: "<inode>:<offset>", "<offset>", or None/"" for the start
+
+    Returns:
+        (inode, offset): inode is None when the cursor did not name a file
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not value:
+        return None, 0
+    inode, _, offset = value.rpartition(':')
+    offset = int(offset)
+    if offset < 0:
+        raise ValueError(f"Negative offset in cursor: {value}")
+    return (int(inode) if inode else None), offset
+
+
+def format_cursor(inode, offset):
+    return f"{inode}:{offset}"
+
+
+def _empty_index():
+    return {
+        'version': INDEX_VERSION,
+        'segments': [],
+        'runs': [],
+        'state': {'plan': None, 'iteration': None},
+        'active': {'identity': None, 'bytes_indexed': 0},
+    }
+
+
+class EventLog:
+    """
+    Segmented events log under a .2L directory.
+
+    Index updates and rotation run under an advisory lock on the index;
+    appends never take it.
+    """
+
+    def __init__(self, state_dir='.2L'):
+        self.state_dir = state_dir
+        self.active_path = os.path.join(state_dir, ACTIVE_NAME)
+        self.segment_dir = os.path.join(state_dir, SEGMENT_DIR)
+        self.index_path = os.path.join(self.segment_dir, INDEX_NAME)
+
+    def segment_path(self, name):
+        """Path of a segment by index name (the active segment is events.jsonl)."""
+        if name == ACTIVE_NAME:
+            return self.active_path
+        return os.path.join(self.segment_dir, name)
+
+    # -- index -----------------------------------------------------------
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return _empty_index()
+        if index.get('version') != INDEX_VERSION:
+            return _empty_index()
+        return index
+
+    def _save_index(self, index):
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.segment_dir, prefix='.tmp_', suffix='.json')
+        try:
+            with os.fdopen(temp_fd, 'w') as f:
+                json.dump(index, f, indent=1)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise e
+
+    def _lock(self):
+        os.makedirs(self.segment_dir, exist_ok=True)
+        return yaml_io.locked(self.index_path)
+
+    def _scan(self, index, name, start):
+        """
+        Index complete lines of a segment from byte offset start.
+
+        Returns:
+            end: Offset just past the last complete line
+        """
+        try:
+            with open(self.segment_path(name), 'rb') as f:
+                f.seek(start)
+                raw = f.read()
+        except FileNotFoundError:
+            return start
+
+        runs = index['runs']
+        state = index['state']
+        offset = start
+        while True:
+            newline = raw.find(b'\n', offset - start)
+            if newline == -1:
+                break  # Partial line still being written
+            line_start, offset = offset, start + newline + 1
+            try:
+                event = json.loads(raw[line_start - start:offset - start])
+            except ValueError:
+                continue  # Unreadable line: skipped by readers too
+            if not isinstance(event, dict):
+                continue
+
+            plan = plan_from_event(event)
+            if plan is not None:
+                state['plan'], state['iteration'] = plan, None
+            iteration = iteration_from_event(event)
+            if iteration is not None:
+                state['iteration'] = iteration
+
+            timestamp = event.get('timestamp', '')
+            run = runs[-1] if runs else None
+            if (run and run['segment'] == name and run['end'] == line_start
+                    and run['plan'] == state['plan'] and run['iteration'] == state['iteration']):
+                run['end'] = offset
+                run['events'] += 1
+                run['last_timestamp'] = max(run['last_timestamp'], timestamp)
+            else:
+                runs.append({
+                    'segment': name, 'plan': state['plan'], 'iteration': state['iteration'],
+                    'start': line_start, 'end': offset, 'events': 1,
+                    'first_timestamp': timestamp, 'last_timestamp': timestamp,
+                })
+        return offset
+
+    def _refresh_locked(self, index):
+        """Catch the index up with the active segment. Returns True if changed."""
+        active = index['active']
+        try:
+            stat = os.stat(self.active_path)
+        except FileNotFoundError:
+            return False
+
+        changed = False
+        identity = [stat.st_dev, stat.st_ino]
+        if active['identity'] != identity or stat.st_size < active['bytes_indexed']:
+            # New active segment (or one replaced outside rotate()): index it from scratch
+            runs = index['runs'] = [r for r in index['runs'] if r['segment'] != ACTIVE_NAME]
+            index['state'] = {'plan': runs[-1]['plan'], 'iteration': runs[-1]['iteration']} if runs \
+                else {'plan': None, 'iteration': None}
+            active['identity'] = identity
+            active['bytes_indexed'] = 0
+            changed = True
+
+        if stat.st_size > active['bytes_indexed']:
+            active['bytes_indexed'] = self._scan(index, ACTIVE_NAME, active['bytes_indexed'])
+            changed = True
+        return changed
+
+    def refresh(self):
+        """
+        Bring the index up to date with the active segment.
+
+        Returns:
+            index: The current index dict
+        """
+        with self._lock():
+            index = self._load_index()
+            if self._refresh_locked(index):
+                self._save_index(index)
+        return index
+
+    # -- rotation --------------------------------------------------------
+
+    def rotate(self, split_plans=False):
+        """
+        Move the active segment into the archive (no-op if it is empty).
+
+        Args:
+            split_plans: Also split the archived segment at plan boundaries
+                (one segment per plan; used to migrate an old mixed log)
+
+        Returns:
+            names: List of new segment names (empty if nothing was rotated)
+        """
+        with self._lock():
+            index = self._load_index()
+            self._refresh_locked(index)
+            if not os.path.exists(self.active_path) or os.path.getsize(self.active_path) == 0:
+                return []
+
+            name = self._next_segment_name(index)
+            os.rename(self.active_path, self.segment_path(name))
+
+            # Writers that opened the file before the rename may have added lines
+            active = index['active']
+            for run in index['runs']:
+                if run['segment'] == ACTIVE_NAME:
+                    run['segment'] = name
+            size = self._scan(index, name, active['bytes_indexed'])
+            index['segments'].append({'file': name, 'bytes': size})
+            index['active'] = {'identity': None, 'bytes_indexed': 0}
+
+            names = [name]
+            if split_plans:
+                names = self._split_by_plan(index, name)
+            self._save_index(index)
+            return names
+
+    def maybe_rotate(self, max_bytes=DEFAULT_SEGMENT_BYTES, new_plan=None):
+        """
+        Rotate if the active segment is too large, or before a new plan's
+        first event when the active segment belongs to another plan.
+
+        Args:
+            max_bytes: Size limit of the active segment
+            new_plan: Plan ID about to start (from a plan_start event)
+
+        Returns:
+            names: New segment names (empty if no rotation happened)
+        """
+        try:
+            size = os.path.getsize(self.active_path)
+        except OSError:
+            return []
+        if size == 0:
+            return []
+        if new_plan is not None:
+            index = self.refresh()
+            if index['state']['plan'] != new_plan:
+                return self.rotate()
+        if size >= max_bytes:
+            return self.rotate()
+        return []
+
+    def _next_segment_name(self, index):
+        numbers = [int(m.group(1)) for m in
+                   (re.match(r'segment-(\d+)\.jsonl$', s['file']) for s in index['segments']) if m]
+        return f"segment-{max(numbers, default=0) + 1:06d}.jsonl"
+
+    def _split_by_plan(self, index, name):
+        """Split an archived segment into one segment per plan run."""
+        runs = [r for r in index['runs'] if r['segment'] == name]
+        chunks = []
+        for run in runs:
+            if chunks and chunks[-1]['plan'] == run['plan']:
+                chunks[-1]['runs'].append(run)
+            else:
+                chunks.append({'plan': run['plan'], 'runs': [run]})
+        if len(chunks) <= 1:
+            return [name]
+
+        source_path = self.segment_path(name)
+        names = []
+        with open(source_path, 'rb') as source:
+            for i, chunk in enumerate(chunks):
+                start = 0 if i == 0 else chunk['runs'][0]['start']
+                end = chunks[i + 1]['runs'][0]['start'] if i + 1 < len(chunks) else os.path.getsize(source_path)
+                chunk_name = self._next_segment_name(index)
+                source.seek(start)
+                with open(self.segment_path(chunk_name), 'wb') as target:
+                    target.write(source.read(end - start))
+                for run in chunk['runs']:
+                    run['segment'] = chunk_name
+                    run['start'] -= start
+                    run['end'] -= start
+                index['segments'].append({'file': chunk_name, 'bytes': end - start})
+                names.append(chunk_name)
+        index['segments'] = [s for s in index['segments'] if s['file'] != name]
+        os.remove(source_path)
+        return names
+
+    # -- reading ---------------------------------------------------------
+
+    def find_runs(self, plan=None, iteration=None, since=None, until=None):
+        """
+        Index runs matching a plan, iteration and/or timestamp range.
+
+        Args:
+            plan: Plan ID (e.g., "plan-5")
+            iteration: Iteration number
+            since: Earliest timestamp (ISO 8601, inclusive)
+            until: Latest timestamp (ISO 8601, inclusive)
+
+        Returns:
+            runs: List of run dicts, in log order
+        """
+        index = self.refresh()
+        return [
+            run for run in index['runs']
+            if (plan is None or run['plan'] == plan)
+            and (iteration is None or run['iteration'] == iteration)
+            and (since is None or run['last_timestamp'] >= since)
+            and (until is None or run['first_timestamp'] <= until)
+        ]
+
+    def read_events(self, plan=None, iteration=None, since=None, until=None):
+        """
+        Events matching the filters, reading only the indexed byte ranges.
+
+        Yields:
+            event: Event dict, in log order
+        """
+        for run in self.find_runs(plan, iteration, since, until):
+            try:
+                with open(self.segment_path(run['segment']), 'rb') as f:
+                    f.seek(run['start'])
+                    raw = f.read(run['end'] - run['start'])
+            except FileNotFoundError:
+                continue
+            for line in raw.splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                timestamp = event.get('timestamp', '')
+                if (since is None or timestamp >= since) and (until is None or timestamp <= until):
+                    yield event
+
+    def find_rotated(self, inode):
+        """Archived segment that used to be events.jsonl with this inode (None if gone)."""
+        try:
+            names = sorted((n for n in os.listdir(self.segment_dir)
+                            if n.startswith('segment-') and n.endswith('.jsonl')), reverse=True)
+        except FileNotFoundError:
+            return None
+        for name in names:  # Newest first: usually the first one
+            path = os.path.join(self.segment_dir, name)
+            try:
+                if os.stat(path).st_ino == inode:
+                    return path
+            except FileNotFoundError:
+                continue
+        return None
+
+    @staticmethod
+    def _read_lines(path, offset, limit):
+        """Complete lines from offset, at most about limit bytes. Returns (data, end)."""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(limit)
+            if len(data) == limit:
+                # Capped mid-stream: extend to the end of the current line
+                data += f.readline()
+        end = data.rfind(b'\n') + 1
+        return data[:end], offset + end
+
+    def read_from(self, cursor, limit=MAX_READ_BYTES):
+        """
+        Raw lines appended to events.jsonl after a cursor.
+
+        A cursor is (inode, offset) in the active segment. When that file
+        has since been rotated, the rest of the archived segment is read
+        before moving on to the new events.jsonl.
+
+        Args:
+            cursor: (inode, offset) from parse_cursor
+            limit: Approximate size cap in bytes
+
+        Returns:
+            (payload, cursor, more): Complete JSONL lines, the cursor after
+            them, and whether more data was already available
+        """
+        inode, offset = cursor
+        try:
+            stat = os.stat(self.active_path)
+        except FileNotFoundError:
+            return b'', (inode, offset), False
+
+        chunks = []
+        if inode is not None and inode != stat.st_ino:
+            # The cursor's file was rotated away: finish it first
+            segment = self.find_rotated(inode)
+            if segment is not None:
+                data, end = self._read_lines(segment, offset, limit)
+                chunks.append(data)
+                limit -= len(data)
+                if os.path.getsize(segment) > end:
+                    return data, (inode, end), True
+            offset = 0
+        elif offset > stat.st_size:
+            # Truncated or replaced in place: start over
+            offset = 0
+
+        data, end = b'', offset
+        if limit > 0:
+            data, end = self._read_lines(self.active_path, offset, limit)
+        chunks.append(data)
+        capped = limit <= 0 or len(data) >= limit
+        more = capped and os.path.getsize(self.active_path) > end
+        return b''.join(chunks), (stat.st_ino, end), more
+
+    def follow(self, from_start=False, poll_interval=0.5, idle_timeout=None):
+        """
+        Yield events as they are appended to the active segment.
+
+        Rotation is followed: the old segment is read to its end before
+        switching to the new events.jsonl.
+
+        Args:
+            from_start: Start at the beginning of the active segment (default: its end)
+            poll_interval: Seconds between checks for new data
+            idle_timeout: Stop after this many seconds without new events
+
+        Yields:
+            event: Event dict
+        """
+        current = None
+        pending = b''
+        idle_since = time.monotonic()
+        try:
+            while True:
+                if current is None:
+                    try:
+                        current = open(self.active_path, 'rb')
+                    except FileNotFoundError:
+                        from_start = True  # Everything in it will be new
+                    else:
+                        if not from_start:
+                            current.seek(0, os.SEEK_END)
+                        from_start = True  # Segments after a rotation are read in full
+
+                chunk = current.read() if current else b''
+                if chunk:
+                    pending += chunk
+                    *lines, pending = pending.split(b'\n')
+                    for line in lines:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+                    idle_since = time.monotonic()
+                    continue
+
+                if current is not None:
+                    try:
+                        rotated = os.stat(self.active_path).st_ino != os.fstat(current.fileno()).st_ino
+                    except FileNotFoundError:
+                        rotated = True
+                    if rotated:
+                        current.close()
+                        current, pending = None, b''
+                        continue
+
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    return
+                time.sleep(poll_interval)
+        finally:
+            if current is not None:
+                current.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L segmented event log')
+    parser.add_argument('--state-dir', default='.2L', help='2L state directory (default: .2L)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('index', help='Update the index and print segment/run summary')
+
+    query = sub.add_parser('query', help='Print matching events as JSONL')
+    query.add_argument('--plan', help='Plan ID (e.g., plan-5)')
+    query.add_argument('--iteration', type=int, help='Iteration number')
+    query.add_argument('--since', help='Earliest timestamp (ISO 8601)')
+    query.add_argument('--until', help='Latest timestamp (ISO 8601)')
+
+    rotate = sub.add_parser('rotate', help='Archive the active segment')
+    rotate.add_argument('--max-bytes', type=int,
+                        help='Only rotate if the active segment is at least this large')
+    rotate.add_argument('--plan-start', metavar='DATA',
+                        help='plan_start event data about to be logged: rotate if it starts another plan')
+    rotate.add_argument('--split-plans', action='store_true',
+                        help='Split the archived segment into one segment per plan')
+
+    follow = sub.add_parser('follow', help='Print events as they are appended')
+    follow.add_argument('--from-start', action='store_true', help='Start at the beginning of the active segment')
+    follow.add_argument('--idle-timeout', type=float, help='Exit after this many idle seconds')
+
+    args = parser.parse_args()
+    log = EventLog(args.state_dir)
+
+    try:
+        if args.command == 'index':
+            index = log.refresh()
+            print(json.dumps({'segments': index['segments'], 'runs': index['runs']}, indent=2))
+
+        elif args.command == 'query':
+            for event in log.read_events(args.plan, args.iteration, args.since, args.until):
+                print(json.dumps(event, ensure_ascii=False))
+
+        elif args.command == 'rotate':
+            if args.plan_start is not None:
+                new_plan = plan_from_event({'event_type': 'plan_start', 'data': args.plan_start})
+                names = log.maybe_rotate(args.max_bytes or DEFAULT_SEGMENT_BYTES, new_plan=new_plan)
+            elif args.max_bytes is not None:
+                names = log.maybe_rotate(args.max_bytes)
+            else:
+                names = log.rotate(split_plans=args.split_plans)
+            for name in names:
+                print(f"Rotated to {log.segment_path(name)}")
+
+        elif args.command == 'follow':
+            for event in log.follow(from_start=args.from_start, idle_timeout=args.idle_timeout):
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,43 @@
 #   source ~/.claude/lib/2l-event-logger.sh
 #   log_2l_event "event_type" "data" "phase" "agent_id"
 #
+# Lines are encoded exactly like lib/2l-events.py (the buffered Python writer
+# used by lib/ scripts): full JSON string escaping, one line per event, and
+# one append per event so lines never interleave with other writers.
+# No external processes are started (timestamp via printf's %(...)T on
+# bash >= 4.2; older shells fall back to date), except that plan_start
+# first rotates the event log segment and lifecycle events refresh the
+# dashboard state snapshot in the background.
+#
+
+# JSON-escape a string (without surrounding quotes) into the named variable
+# Arguments:
+#   $1 - name of the variable to set
+#   $2 - string to escape
+_2l_json_escape() {
+  local s="$2"
+  s="${s//\\/\\\\}"
+  s="${s//\"/\\\"}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\r'/\\r}"
+  s="${s//$'\t'/\\t}"
+  s="${s//$'\b'/\\b}"
+  s="${s//$'\f'/\\f}"
+
+  # Remaining control characters become \u00XX
+  if [[ "$s" == *[[:cntrl:]]* ]]; then
+    local i hex char
+    for (( i = 1; i < 32; i++ )); do
+      printf -v hex '%02x' "$i"
+      printf -v char "\\x$hex"
+      if [[ "$s" == *"$char"* ]]; then
+        s="${s//"$char"/\\u00$hex}"
+      fi
+    done
+  fi
+
+  printf -v "$1" '%s' "$s"
+}
 
 # Event logging function
 # Arguments:
@@ -25,27 +62,45 @@ log_2l_event() {
     return 1
   fi
 
-  # Generate ISO 8601 timestamp
-  local timestamp=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
+  # Generate ISO 8601 timestamp (UTC)
+  local timestamp
+  if ! TZ=UTC printf -v timestamp '%(%Y-%m-%dT%H:%M:%SZ)T' -1 2>/dev/null; then
+    timestamp=$(date -u +"%Y-%m-%dT%H:%M:%SZ")
+  fi
 
   # Event file location
   local event_file=".2L/events.jsonl"
 
   # Create .2L directory if needed
-  mkdir -p .2L 2>/dev/null || true
+  [ -d .2L ] || mkdir -p .2L 2>/dev/null || true
 
-  # Escape double quotes in data fields
-  event_type="${event_type//\"/\\\"}"
-  data="${data//\"/\\\"}"
-  phase="${phase//\"/\\\"}"
-  agent_id="${agent_id//\"/\\\"}"
+  # A new plan starts a new segment (see 2l-event-log.py); one fork per plan, not per event
+  if [ "$event_type" = "plan_start" ] && [ -f "$HOME/.claude/lib/2l-event-log.py" ]; then
+    python3 "$HOME/.claude/lib/2l-event-log.py" rotate --plan-start "$data" >/dev/null 2>&1 || true
+  fi
+
+  # Escape data fields for JSON
+  _2l_json_escape event_type "$event_type"
+  _2l_json_escape data "$data"
+  _2l_json_escape phase "$phase"
+  _2l_json_escape agent_id "$agent_id"
 
   # Build JSON event object
   local json_event="{\"timestamp\":\"$timestamp\",\"event_type\":\"$event_type\",\"phase\":\"$phase\",\"agent_id\":\"$agent_id\",\"data\":\"$data\"}"
 
-  # Append to event file (atomic operation, fails silently)
-  echo "$json_event" >> "$event_file" 2>/dev/null || true
+  # Append to event file (single write on an O_APPEND descriptor, fails silently)
+  printf '%s\n' "$json_event" >> "$event_file" 2>/dev/null || true
+
+  # Lifecycle events refresh the dashboard snapshot (in the background)
+  case "$1" in
+    plan_start|iteration_start|iteration_complete|phase_change)
+      if [ -d .2L/dashboard ] && [ -f "$HOME/.claude/lib/2l-dashboard-state.py" ]; then
+        ( python3 "$HOME/.claude/lib/2l-dashboard-state.py" refresh >/dev/null 2>&1 & )
+      fi
+      ;;
+  esac
 }
 
-# Export function for use in other scripts
+# Export functions for use in other scripts
+export -f _2l_json_escape
 export -f log_2l_event
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+2L Events - Buffered writer for .2L/events.jsonl
+
+Events are JSON-encoded with json.dumps (so quotes, backslashes, newlines
+and control characters in any field stay valid JSONL), buffered in memory
+and appended in batches. A batch is flushed when it reaches flush_bytes,
+when flush_interval seconds have passed since its first event, or at exit.
+
+Each flush is a single write() of whole lines on an O_APPEND descriptor,
+so lines from concurrent writers (other processes, log_2l_event in bash)
+never interleave.
+
+Writers to .2L/events.jsonl also rotate it (see 2l-event-log.py): before
+a plan_start event for a different plan, and once it outgrows the
+segment size limit. Once a dashboard has been set up (.2L/dashboard/
+exists), flushes also keep its state snapshot current (see
+2l-dashboard-state.py), at most every few seconds.
+
+Usage (from other lib/ scripts):
+    events = importlib.import_module('2l-events')
+    events.log_event('phase_change', 'Starting validation', phase='validation')
+
+    with events.EventWriter('.2L/events.jsonl') as writer:
+        writer.emit('agent_spawn', 'Builder-1: API', phase='building', agent_id='builder-1')
+
+CLI:
+    python3 2l-events.py log EVENT_TYPE DATA [PHASE] [AGENT_ID]
+
+    # Many events through one process: NUL-terminated records on stdin,
+    # fields separated by \\x1f (event_type, phase, agent_id, data)
+    producer | python3 2l-events.py stream
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import select
+import argparse
+import importlib
+from datetime import datetime, timezone
+
+DEFAULT_EVENTS_FILE = '.2L/events.jsonl'
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+FIELD_SEPARATOR = b'\x1f'
+RECORD_TERMINATOR = b'\0'
+
+
+def utc_timestamp():
+    """Current UTC time as ISO 8601 with a Z suffix (second precision)."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def make_event(event_type, data, phase='unknown', agent_id='orchestrator', timestamp=None):
+    """
+    Build an event dict in events.jsonl schema (and key order).
+
+    Args:
+        event_type: Type of event (plan_start, agent_spawn, etc.)
+        data: Event data/message (any JSON-serializable value)
+        phase: Current orchestration phase
+        agent_id: Agent identifier
+        timestamp: ISO 8601 timestamp (default: now, UTC)
+
+    Returns:
+        event: Dict with timestamp, event_type, phase, agent_id, data
+    """
+    return {
+        'timestamp': timestamp or utc_timestamp(),
+        'event_type': event_type,
+        'phase': phase,
+        'agent_id': agent_id,
+        'data': data,
+    }
+
+
+def encode_event(event):
+    """One JSONL line (bytes, newline-terminated) for an event dict."""
+    line = json.dumps(event, separators=(',', ':'), ensure_ascii=False, default=str)
+    return (line + '\n').encode('utf-8')
+
+
+def append_lines(events_path, payload):
+    """
+    Append whole lines to the events file with a single O_APPEND write.
+
+    Args:
+        events_path: Path to events.jsonl (parent directory is created)
+        payload: Bytes made of complete newline-terminated lines
+
+    Returns:
+        size: File size after the write
+    """
+    if not payload:
+        return os.path.getsize(events_path) if os.path.exists(events_path) else 0
+    dir_path = os.path.dirname(events_path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    fd = os.open(events_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        written = os.write(fd, payload)
+        # Regular files take the whole buffer; finish a short write regardless
+        while written < len(payload):
+            written += os.write(fd, payload[written:])
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+class EventWriter:
+    """
+    Buffer events in memory and append them to events.jsonl in batches.
+
+    Thresholds are checked as events are emitted; the buffer is also
+    flushed by flush(), close(), leaving a with-block, and at interpreter
+    exit.
+    """
+
+    def __init__(self, events_path=DEFAULT_EVENTS_FILE, flush_bytes=DEFAULT_FLUSH_BYTES,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, rotate=None):
+        """
+        Args:
+            events_path: Path to events.jsonl
+            flush_bytes: Flush once this many bytes are buffered (0 = every event)
+            flush_interval: Flush once the oldest buffered event is this many seconds old
+            rotate: Rotate segments (default: if the file is named events.jsonl)
+        """
+        self.events_path = events_path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        if rotate is None:
+            rotate = os.path.basename(events_path) == 'events.jsonl'
+        self.event_log = None
+        if rotate:
+            event_log_lib = importlib.import_module('2l-event-log')
+            self.event_log = event_log_lib.EventLog(os.path.dirname(events_path) or '.')
+            self.segment_bytes = event_log_lib.DEFAULT_SEGMENT_BYTES
+            self._plan_from_event = event_log_lib.plan_from_event
+            self.dashboard_dir = os.path.join(os.path.dirname(events_path) or '.', 'dashboard')
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._first_buffered_at = None
+        self.events_written = 0
+        self.flushes = 0
+        atexit.register(self.flush)
+
+    def emit(self, event_type, data, phase='unknown', agent_id='orchestrator', timestamp=None):
+        """
+        Buffer one event (see make_event for arguments).
+
+        Returns:
+            event: The event dict that was buffered
+        """
+        event = make_event(event_type, data, phase, agent_id, timestamp)
+        self.write_event(event)
+        return event
+
+    def write_event(self, event):
+        """Buffer a pre-built event dict."""
+        line = encode_event(event)
+        if self._first_buffered_at is None:
+            self._first_buffered_at = time.monotonic()
+        # plan_start events start a new batch so the segment can rotate first
+        new_plan = None
+        if self.event_log is not None and event.get('event_type') == 'plan_start':
+            new_plan = self._plan_from_event(event)
+        self._buffer.append((line, new_plan))
+        self._buffered_bytes += len(line)
+        if self.due():
+            self.flush()
+
+    def due(self):
+        """True if the buffer has reached its size or age threshold."""
+        if not self._buffer:
+            return False
+        if self._buffered_bytes >= self.flush_bytes:
+            return True
+        return time.monotonic() - self._first_buffered_at >= self.flush_interval
+
+    def seconds_until_due(self):
+        """Seconds until the age threshold is reached (None if buffer is empty)."""
+        if not self._buffer:
+            return None
+        return max(0.0, self.flush_interval - (time.monotonic() - self._first_buffered_at))
+
+    def flush(self):
+        """Append all buffered events (one write per batch between plan starts)."""
+        if not self._buffer:
+            return
+        buffered = self._buffer
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._first_buffered_at = None
+
+        batches = []
+        for line, new_plan in buffered:
+            if new_plan is not None or not batches:
+                batches.append((new_plan, []))
+            batches[-1][1].append(line)
+
+        for new_plan, lines in batches:
+            if new_plan is not None:
+                self.event_log.maybe_rotate(self.segment_bytes, new_plan=new_plan)
+            size = append_lines(self.events_path, b''.join(lines))
+            self.flushes += 1
+            if self.event_log is not None and size >= self.segment_bytes:
+                self.event_log.rotate()
+        self.events_written += len(buffered)
+
+        if self.event_log is not None and os.path.isdir(self.dashboard_dir):
+            dashboard_state = importlib.import_module('2l-dashboard-state')
+            try:
+                dashboard_state.refresh_snapshot(self.event_log.state_dir, dashboard_state.DEFAULT_MAX_AGE)
+            except (OSError, ValueError):
+                pass  # The snapshot is an optimization; events are already written
+
+    def close(self):
+        """Flush and stop flushing at exit."""
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+_writers = {}
+
+
+def get_writer(events_path=DEFAULT_EVENTS_FILE):
+    """Process-wide buffered writer for an events file (flushed at exit)."""
+    writer = _writers.get(events_path)
+    if writer is None:
+        writer = _writers[events_path] = EventWriter(events_path)
+    return writer
+
+
+def log_event(event_type, data, phase='unknown', agent_id='orchestrator', events_path=DEFAULT_EVENTS_FILE):
+    """Buffer one event on the process-wide writer for events_path."""
+    return get_writer(events_path).emit(event_type, data, phase, agent_id)
+
+
+def parse_record(record):
+    """
+    Decode one stream record: event_type, phase, agent_id, data joined by
+    \\x1f (data last, so it may contain the separator).
+
+    Returns:
+        (event_type, data, phase, agent_id), or None if event_type/data is empty
+    """
+    fields = record.decode('utf-8', errors='replace').split(FIELD_SEPARATOR.decode(), 3)
+    fields += [''] * (4 - len(fields))
+    event_type, phase, agent_id, data = fields
+    if not event_type or not data:
+        return None
+    return event_type, data, phase or 'unknown', agent_id or 'orchestrator'
+
+
+def stream_events(input_fd, writer):
+    """
+    Read NUL-terminated records from a file descriptor until EOF, buffering
+    them on writer. The age threshold is honored while waiting for input.
+
+    Args:
+        input_fd: Readable file descriptor (e.g., stdin)
+        writer: EventWriter
+
+    Returns:
+        count: Number of events accepted
+    """
+    pending = b''
+    count = 0
+    while True:
+        timeout = writer.seconds_until_due()
+        ready, _, _ = select.select([input_fd], [], [], timeout)
+        if not ready:
+            writer.flush()
+            continue
+        chunk = os.read(input_fd, 65536)
+        if not chunk:
+            break
+        pending += chunk
+        *records, pending = pending.split(RECORD_TERMINATOR)
+        for record in records:
+            fields = parse_record(record)
+            if fields:
+                writer.emit(*fields)
+                count += 1
+        if writer.due():
+            writer.flush()
+
+    # A final record without terminator is still a complete event
+    fields = parse_record(pending) if pending else None
+    if fields:
+        writer.emit(*fields)
+        count += 1
+    writer.flush()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append 2L orchestration events to events.jsonl')
+    parser.add_argument('--events-file', default=DEFAULT_EVENTS_FILE,
+                        help=f'Events file (default: {DEFAULT_EVENTS_FILE})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    log = sub.add_parser('log', help='Append one event')
+    log.add_argument('event_type')
+    log.add_argument('data')
+    log.add_argument('phase', nargs='?', default='unknown')
+    log.add_argument('agent_id', nargs='?', default='orchestrator')
+
+    stream = sub.add_parser('stream', help='Append NUL-terminated records from stdin in batches')
+    stream.add_argument('--flush-bytes', type=int, default=DEFAULT_FLUSH_BYTES,
+                        help=f'Flush after this many buffered bytes (default: {DEFAULT_FLUSH_BYTES})')
+    stream.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help=f'Flush after this many seconds (default: {DEFAULT_FLUSH_INTERVAL})')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'log':
+            if not args.event_type or not args.data:
+                parser.error('event_type and data must be non-empty')
+            with EventWriter(args.events_file, flush_bytes=0) as writer:
+                writer.emit(args.event_type, args.data, args.phase, args.agent_id)
+
+        elif args.command == 'stream':
+            with EventWriter(args.events_file, args.flush_bytes, args.flush_interval) as writer:
+                stream_events(sys.stdin.fileno(), writer)
+
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+2L Instrument - Span timings and profiling for the lib/ Python tools
+
+Code marks the stages of its work as named spans:
+
+    instrument = importlib.import_module('2l-instrument')
+    with instrument.span('merge'):
+        ...
+
+Spans in use: load (YAML/JSON parsing, journal replay), merge, update,
+score (filter + impact scoring + ranking), classify, render, write,
+atomic_write, journal_append and backup. Each span name accumulates a
+call count and total wall-clock seconds. A span nested inside a span of
+the same name (load_learnings -> load_yaml_with_hash) is counted once, by
+the outer one; spans of different names may nest and then overlap.
+
+Nothing is recorded until instrumentation is enabled; until then span()
+returns a shared no-op context manager. Enable it per run with the CLI
+flags (see add_arguments) or the environment:
+
+    TWOL_TIMING=1          Print span totals to stderr at exit
+    TWOL_TIMING_EVENTS=1   Append one tool_timing event with the span
+                           totals to .2L/events.jsonl at exit (only if
+                           .2L exists); a path instead of 1 names the
+                           events file
+    TWOL_PROFILE=1         Run under cProfile and print the top functions
+                           by cumulative time to stderr at exit; a path
+                           instead of 1 also saves the raw stats there
+                           (for pstats/snakeviz)
+
+Worker processes (vision generator --workers N) do not report; their time
+shows up in the parent's span around the pool.
+
+Usage (CLI):
+    python3 2l-instrument.py show run.prof [--sort cumulative] [--limit 30]
+"""
+
+import os
+import sys
+import time
+import atexit
+import argparse
+
+PROFILE_LIMIT = 25  # Functions printed by the profile report
+
+_spans = {}        # name -> [count, seconds], in first-use order
+_active = set()    # Span names currently open (re-entrancy guard)
+_enabled = False
+_tool = None
+_timing = False
+_events_path = None
+_profiler = None
+_profile_path = None
+_start = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.name not in _active:
+            _active.add(self.name)
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            elapsed = time.perf_counter() - self.start
+            _active.discard(self.name)
+            totals = _spans.get(self.name)
+            if totals is None:
+                _spans[self.name] = [1, elapsed]
+            else:
+                totals[0] += 1
+                totals[1] += elapsed
+        return False
+
+
+def span(name):
+    """
+    Context manager timing one named span (a no-op unless enabled).
+
+    Args:
+        name: Span name (e.g., 'load', 'merge', 'atomic_write')
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timings():
+    """
+    Span totals recorded so far.
+
+    Returns:
+        spans: Dict of name -> {'count', 'seconds'}, in first-use order
+    """
+    return {name: {'count': count, 'seconds': seconds} for name, (count, seconds) in _spans.items()}
+
+
+def reset():
+    """Forget recorded span totals."""
+    _spans.clear()
+
+
+def format_timings(spans=None):
+    """One-line summary: "load 0.512s (x2), merge 0.101s, ..."."""
+    spans = timings() if spans is None else spans
+    parts = []
+    for name, totals in spans.items():
+        count = f" (x{totals['count']})" if totals['count'] > 1 else ''
+        parts.append(f"{name} {totals['seconds']:.3f}s{count}")
+    return ', '.join(parts) or 'no spans'
+
+
+def add_arguments(parser):
+    """Add --timing, --timing-events and --profile to an argparse parser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--timing', action='store_true',
+                       help='Print span timings (load, merge, score, ...) to stderr at exit')
+    group.add_argument('--timing-events', action='store_true',
+                       help='Append span timings to .2L/events.jsonl as a tool_timing event')
+    group.add_argument('--profile', action='store_true',
+                       help='Profile with cProfile and print the top functions to stderr '
+                            '(set TWOL_PROFILE=<path> to also save the stats)')
+
+
+def _env_flag(value):
+    """(enabled, path) for an env var that takes 1 or a path."""
+    if not value or value == '0':
+        return False, None
+    return True, None if value == '1' else value
+
+
+def configure(tool, args=None):
+    """
+    Enable instrumentation for this process from CLI flags and environment.
+
+    Called once from a tool's main(); a no-op if nothing asks for timing
+    or profiling.
+
+    Args:
+        tool: Name reported in summaries and tool_timing events
+            (e.g., "2l-yaml-helpers merge_learnings")
+        args: Parsed argparse namespace with add_arguments() flags (optional)
+    """
+    global _enabled, _tool, _timing, _events_path, _profiler, _profile_path, _start
+
+    _tool = tool
+    _timing = _timing or bool(getattr(args, 'timing', False)) or os.environ.get('TWOL_TIMING') == '1'
+
+    events, events_path = _env_flag(os.environ.get('TWOL_TIMING_EVENTS'))
+    if getattr(args, 'timing_events', False) or events:
+        _events_path = events_path or os.path.join('.2L', 'events.jsonl')
+
+    profile, _profile_path = _env_flag(os.environ.get('TWOL_PROFILE'))
+    if (getattr(args, 'profile', False) or profile) and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+    if (_timing or _events_path or _profiler) and not _enabled:
+        _enabled = True
+        _start = time.perf_counter()
+        atexit.register(_report)
+
+
+def _emit_event(total):
+    if os.path.basename(_events_path) == 'events.jsonl' and not os.path.isdir(os.path.dirname(_events_path) or '.'):
+        return  # No 2L project here
+    import importlib
+    events = importlib.import_module('2l-events')
+    data = f"{_tool}: total {total:.3f}s; {format_timings()}"
+    with events.EventWriter(_events_path, flush_bytes=0) as writer:
+        writer.emit('tool_timing', data, agent_id=_tool.split()[0])
+
+
+def _report():
+    total = time.perf_counter() - _start
+
+    if _profiler is not None:
+        import io
+        import pstats
+        _profiler.disable()
+        if _profile_path:
+            _profiler.dump_stats(_profile_path)
+            print(f"profile: stats saved to {_profile_path}", file=sys.stderr)
+        out = io.StringIO()
+        pstats.Stats(_profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LIMIT)
+        sys.stderr.write(out.getvalue())
+
+    if _timing:
+        print(f"timing: {_tool}: total {total:.3f}s; {format_timings()}", file=sys.stderr)
+
+    if _events_path:
+        try:
+            _emit_event(total)
+        except OSError as e:
+            print(f"WARNING: Could not log tool_timing event: {e}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L Instrument - inspect saved profiles')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    show = sub.add_parser('show', help='Print a profile saved via TWOL_PROFILE=<path>')
+    show.add_argument('profile_path')
+    show.add_argument('--sort', default='cumulative', help='pstats sort key (default: cumulative)')
+    show.add_argument('--limit', type=int, default=PROFILE_LIMIT,
+                      help=f'Functions to print (default: {PROFILE_LIMIT})')
+
+    args = parser.parse_args()
+
+    import pstats
+    try:
+        pstats.Stats(args.profile_path).sort_stats(args.sort).print_stats(args.limit)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
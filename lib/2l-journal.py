@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+2L Journal - Append-only write-ahead log for global learnings
+
+In journaled mode, writers do not rewrite global-learnings.yaml. Each change
+is appended to <file>.journal as one JSON line holding a transaction:
+
+    {"version": 1, "base": "<content hash of the snapshot>"}      <- header
+    {"at": "...", "records": [{"op": "put", "pattern": {...}},
+                              {"op": "meta", "fields": {...}}]}     <- txn
+
+Records:
+    put  - insert or replace a pattern by pattern_id
+    meta - set top-level fields (aggregated_at, total_projects, ...)
+
+Readers load the YAML snapshot and replay the journal over it. The header
+pins the journal to the snapshot it was written against; once the snapshot
+is rewritten (full write or compaction) the old journal no longer matches
+and is ignored, so a crash between "rename snapshot" and "remove journal"
+can never replay stale records.
+
+Crash safety: each transaction is a single write() of one newline-terminated
+line on an O_APPEND descriptor, followed by fsync. A torn final line (no
+newline, or invalid JSON) is skipped by readers and trimmed before the next
+append, so a transaction is either fully applied or not at all.
+"""
+
+import os
+import json
+import importlib
+from datetime import datetime
+
+yaml_io = importlib.import_module('2l-yaml-io')
+instrument = importlib.import_module('2l-instrument')
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = '.journal'
+DEFAULT_COMPACT_THRESHOLD = 256 * 1024  # bytes
+
+
+def journal_path_for(learnings_path):
+    """
+    Journal path for a learnings snapshot.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+
+    Returns:
+        journal_path: Path to the append-only journal
+    """
+    return learnings_path + JOURNAL_SUFFIX
+
+
+def journal_size(learnings_path):
+    """Size of the journal in bytes (0 if absent)."""
+    try:
+        return os.path.getsize(journal_path_for(learnings_path))
+    except OSError:
+        return 0
+
+
+def read_journal(learnings_path):
+    """
+    Read the journal header and all complete transactions.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+
+    Returns:
+        (header, transactions, good_bytes): Header dict (None if absent or
+        unreadable), list of transaction dicts, and the byte length of the
+        valid prefix (anything after it is a torn write)
+    """
+    try:
+        with open(journal_path_for(learnings_path), 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None, [], 0
+
+    header = None
+    transactions = []
+    good_bytes = 0
+    offset = 0
+    while True:
+        end = raw.find(b'\n', offset)
+        if end == -1:
+            break  # Torn or empty tail
+        try:
+            entry = json.loads(raw[offset:end])
+        except ValueError:
+            break  # Torn write followed by garbage: stop at last good txn
+        if header is None:
+            if entry.get('version') != JOURNAL_VERSION or 'base' not in entry:
+                return None, [], 0
+            header = entry
+        else:
+            transactions.append(entry)
+        offset = end + 1
+        good_bytes = offset
+
+    return header, transactions, good_bytes
+
+
+def apply_records(global_data, records, positions=None):
+    """
+    Apply journal records to parsed global learnings in place.
+
+    Args:
+        global_data: Parsed global learnings dict
+        records: List of record dicts (put/meta)
+        positions: Optional pattern_id -> list index map, kept up to date
+
+    Returns:
+        positions: The pattern_id -> index map
+    """
+    patterns = global_data.setdefault('patterns', [])
+    if positions is None:
+        positions = {}
+        for i, pattern in enumerate(patterns):
+            positions.setdefault(pattern.get('pattern_id'), i)
+
+    for record in records:
+        op = record.get('op')
+        if op == 'put':
+            pattern = record['pattern']
+            pattern_id = pattern['pattern_id']
+            if pattern_id in positions:
+                patterns[positions[pattern_id]] = pattern
+            else:
+                positions[pattern_id] = len(patterns)
+                patterns.append(pattern)
+        elif op == 'meta':
+            global_data.update(record['fields'])
+        else:
+            raise ValueError(f"Unknown journal record op: {op}")
+
+    return positions
+
+
+def load_learnings(learnings_path):
+    """
+    Load global learnings: snapshot plus any pending journal transactions.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+
+    Returns:
+        global_data: Parsed and replayed global learnings dict
+
+    Raises:
+        FileNotFoundError: If the snapshot does not exist
+    """
+    with instrument.span('load'):
+        global_data, digest = yaml_io.load_yaml_with_hash(learnings_path)
+        header, transactions, _ = read_journal(learnings_path)
+
+        if header is not None and header['base'] == digest and transactions:
+            positions = None
+            for txn in transactions:
+                positions = apply_records(global_data, txn['records'], positions)
+
+    return global_data
+
+
+def append_transaction(learnings_path, records):
+    """
+    Durably append one transaction to the journal.
+
+    The snapshot must exist: the journal header records its content hash.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+        records: List of record dicts (put/meta)
+    """
+    journal_path = journal_path_for(learnings_path)
+    header, _, good_bytes = read_journal(learnings_path)
+    base = yaml_io.file_hash(learnings_path)
+    if base is None:
+        raise FileNotFoundError(f"Global learnings file not found: {learnings_path}")
+
+    payload = b''
+    if header is None or header['base'] != base:
+        # No journal, or one left over from an older snapshot: start fresh
+        good_bytes = 0
+        payload += _encode({'version': JOURNAL_VERSION, 'base': base})
+
+    payload += _encode({'at': datetime.now().isoformat(), 'records': records})
+
+    with instrument.span('journal_append'):
+        fd = os.open(journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            # Trim any torn tail (or stale journal) before appending
+            if os.fstat(fd).st_size != good_bytes:
+                os.ftruncate(fd, good_bytes)
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _encode(entry):
+    # default=str keeps hand-edited YAML timestamps (datetime objects) writable
+    return (json.dumps(entry, separators=(',', ':'), ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+def write_snapshot(learnings_path, global_data, backup=False):
+    """
+    Atomically rewrite the snapshot and retire the journal.
+
+    The new snapshot's hash no longer matches the journal header, so even
+    if removing the journal fails the old records are never replayed.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+        global_data: Full global learnings dict (journal already applied)
+        backup: Keep the replaced snapshot as a backup generation
+    """
+    yaml_io.atomic_write_yaml(learnings_path, global_data, backup=backup)
+    try:
+        os.remove(journal_path_for(learnings_path))
+    except FileNotFoundError:
+        pass
+
+
+def compact(learnings_path, threshold_bytes=DEFAULT_COMPACT_THRESHOLD, force=False):
+    """
+    Fold the journal back into the YAML snapshot once it is large enough.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+        threshold_bytes: Minimum journal size that triggers compaction
+        force: Compact whenever the journal has pending transactions
+
+    Returns:
+        compacted: Number of transactions folded in (0 if skipped)
+    """
+    size = journal_size(learnings_path)
+    if size == 0 or (not force and size < threshold_bytes):
+        return 0
+
+    global_data, digest = yaml_io.load_yaml_with_hash(learnings_path)
+    header, transactions, _ = read_journal(learnings_path)
+
+    if header is None or header['base'] != digest or not transactions:
+        # Stale or empty journal (snapshot already current): just drop it
+        try:
+            os.remove(journal_path_for(learnings_path))
+        except FileNotFoundError:
+            pass
+        return 0
+
+    positions = None
+    for txn in transactions:
+        positions = apply_records(global_data, txn['records'], positions)
+
+    write_snapshot(learnings_path, global_data)
+    return len(transactions)
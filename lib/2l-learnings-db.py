@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+2L Learnings DB - SQLite storage backend for global learnings
+
+global-learnings.yaml is one document: answering "IDENTIFIED patterns with
+occurrences >= 2 and severity >= medium" or "the pattern with ID X" means
+parsing all of it. A project can keep its knowledge base in SQLite instead
+(.2L/global-learnings.db). The lib/ tools choose the backend from the path
+they are given: a .db/.sqlite/.sqlite3 path is a database (is_database), so
+switching a project is an import plus passing the new path.
+
+Each pattern is stored as its JSON document plus the columns queries use:
+
+    patterns(seq, pattern_id, number, status, severity, severity_rank,
+             occurrences, root_cause, doc)
+        indexes: status (+ severity_rank, occurrences), severity,
+                 occurrences, root_cause (+ severity)
+    meta(key, position, value)    top-level fields (schema_version, ...);
+                                  a 'patterns' row marks where the list goes
+    projects(name)                distinct projects (total_projects)
+
+seq is the rowid and keeps document order, so exports and "first pattern
+with this root cause" lookups during merges behave exactly like the YAML
+list. Missing fields get the defaults the tools assume (status IDENTIFIED,
+occurrences 0, severity low).
+
+Every change runs in one SQLite transaction (WAL journal), which replaces
+the temp-file + rename and journal modes of the YAML backend.
+
+Usage:
+    python3 2l-learnings-db.py import .2L/global-learnings.yaml .2L/global-learnings.db
+    python3 2l-learnings-db.py export .2L/global-learnings.db .2L/global-learnings.yaml
+    python3 2l-learnings-db.py get .2L/global-learnings.db --id PATTERN-003
+    python3 2l-learnings-db.py query .2L/global-learnings.db --min-occurrences 2 --min-severity medium
+    python3 2l-learnings-db.py stats .2L/global-learnings.db
+"""
+
+import os
+import sys
+import errno
+import json
+import sqlite3
+import argparse
+import importlib
+import contextlib
+
+journal_lib = importlib.import_module('2l-journal')
+instrument = importlib.import_module('2l-instrument')
+
+SCHEMA_VERSION = 1
+DATABASE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# Same ranking as the pattern detector (unknown severities rank as low)
+SEVERITY_RANK = {'critical': 3, 'medium': 2, 'low': 1}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patterns (
+    seq INTEGER PRIMARY KEY,
+    pattern_id TEXT NOT NULL UNIQUE,
+    number INTEGER,
+    status TEXT NOT NULL,
+    severity TEXT,
+    severity_rank INTEGER NOT NULL,
+    occurrences INTEGER NOT NULL,
+    root_cause TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patterns_status ON patterns (status, severity_rank, occurrences);
+CREATE INDEX IF NOT EXISTS idx_patterns_severity ON patterns (severity);
+CREATE INDEX IF NOT EXISTS idx_patterns_occurrences ON patterns (occurrences);
+CREATE INDEX IF NOT EXISTS idx_patterns_root_cause ON patterns (root_cause, severity);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY
+);
+"""
+
+_UPSERT = """
+INSERT INTO patterns (pattern_id, number, status, severity, severity_rank, occurrences, root_cause, doc)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (pattern_id) DO UPDATE SET
+    number = excluded.number, status = excluded.status, severity = excluded.severity,
+    severity_rank = excluded.severity_rank, occurrences = excluded.occurrences,
+    root_cause = excluded.root_cause, doc = excluded.doc
+"""
+
+
+def is_database(path):
+    """True if a global learnings path names a SQLite store."""
+    return str(path).endswith(DATABASE_SUFFIXES)
+
+
+def severity_rank(severity):
+    """Rank of a severity name (critical 3, medium 2, anything else 1)."""
+    return SEVERITY_RANK.get(severity, 1)
+
+
+def _encode(value):
+    # default=str keeps hand-edited YAML timestamps (datetime objects) storable
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _row(pattern):
+    """Column values for one pattern dict (see _UPSERT)."""
+    occurrences = pattern.get('occurrences', 0)
+    if not isinstance(occurrences, (int, float)):
+        occurrences = 0
+    number = None
+    try:
+        number = int(str(pattern.get('pattern_id')).split('-')[1])
+    except (IndexError, ValueError):
+        pass
+    return (
+        pattern['pattern_id'],
+        number,
+        pattern.get('status', 'IDENTIFIED'),
+        pattern.get('severity'),
+        severity_rank(pattern.get('severity', 'low')),
+        occurrences,
+        pattern.get('root_cause'),
+        _encode(pattern),
+    )
+
+
+class LearningsDB:
+    """
+    Global learnings in a SQLite file.
+
+    Reads go straight to the indexed tables; writers wrap their changes in
+    transaction() so a merge or status update is applied all at once.
+    """
+
+    def __init__(self, path, create=True):
+        """
+        Args:
+            path: Database file
+            create: Create the file (and schema) if missing
+
+        Raises:
+            FileNotFoundError: If the file does not exist and create is False
+        """
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run the block in one write transaction (rolled back on error)."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    # -- reads ----------------------------------------------------------------
+
+    def get_pattern(self, pattern_id):
+        """Pattern dict by ID, or None."""
+        row = self.conn.execute('SELECT doc FROM patterns WHERE pattern_id = ?', (pattern_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_pattern(self, root_cause, severity):
+        """First pattern (in document order) with this root cause and severity, or None."""
+        row = self.conn.execute(
+            'SELECT doc FROM patterns WHERE root_cause = ? AND severity = ? ORDER BY seq LIMIT 1',
+            (root_cause, severity)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_patterns(self):
+        """Every pattern dict, in document order."""
+        for (doc,) in self.conn.execute('SELECT doc FROM patterns ORDER BY seq'):
+            yield json.loads(doc)
+
+    def query_patterns(self, status='IDENTIFIED', min_occurrences=0, min_severity='low'):
+        """
+        Patterns with a status, at least min_occurrences and at least min_severity.
+
+        Args:
+            status: Pattern status to match
+            min_occurrences: Minimum occurrences
+            min_severity: Minimum severity ('critical', 'medium', 'low'; unknown = medium)
+
+        Yields:
+            pattern: Matching pattern dict, in document order
+        """
+        rows = self.conn.execute(
+            'SELECT doc FROM patterns WHERE status = ? AND severity_rank >= ? AND occurrences >= ? ORDER BY seq',
+            (status, SEVERITY_RANK.get(min_severity, 2), min_occurrences))
+        for (doc,) in rows:
+            yield json.loads(doc)
+
+    def count_patterns(self):
+        return self.conn.execute('SELECT COUNT(*) FROM patterns').fetchone()[0]
+
+    def max_pattern_number(self):
+        """Highest N among PATTERN-NNN IDs (0 if none)."""
+        return self.conn.execute('SELECT COALESCE(MAX(number), 0) FROM patterns').fetchone()[0]
+
+    def projects(self):
+        """Set of every project named by a pattern."""
+        return {name for (name,) in self.conn.execute('SELECT name FROM projects')}
+
+    def get_meta(self):
+        """Top-level fields (everything but patterns), in document order."""
+        return {key: json.loads(value)
+                for key, value in self.conn.execute('SELECT key, value FROM meta ORDER BY position')
+                if key != 'patterns'}
+
+    # -- writes (call inside transaction()) -------------------------------------
+
+    def put_patterns(self, patterns):
+        """
+        Insert or replace patterns by pattern_id (new ones go to the end).
+
+        Args:
+            patterns: Iterable of pattern dicts
+        """
+        for pattern in patterns:
+            self.conn.execute(_UPSERT, _row(pattern))
+            projects = pattern.get('projects') or []
+            self.conn.executemany('INSERT OR IGNORE INTO projects (name) VALUES (?)',
+                                  [(str(name),) for name in projects])
+
+    def set_meta(self, fields):
+        """
+        Set top-level fields; new keys go after existing ones.
+
+        Args:
+            fields: Dict of field -> value (a 'patterns' value is not
+                stored, only the position of the key)
+        """
+        position = self.conn.execute('SELECT COALESCE(MAX(position), -1) FROM meta').fetchone()[0]
+        for key, value in fields.items():
+            position += 1
+            self.conn.execute(
+                'INSERT INTO meta (key, position, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                (key, position, 'null' if key == 'patterns' else _encode(value)))
+
+    # -- YAML schema ------------------------------------------------------------
+
+    def import_document(self, global_data):
+        """
+        Replace the store's contents with a parsed global learnings document.
+
+        Patterns with an ID seen earlier in the list are skipped (readers of
+        the YAML file use the first one too).
+
+        Returns:
+            (imported, skipped): Pattern counts
+        """
+        with self.transaction():
+            self.conn.execute('DELETE FROM patterns')
+            self.conn.execute('DELETE FROM meta')
+            self.conn.execute('DELETE FROM projects')
+
+            self.set_meta(global_data)
+
+            seen = set()
+            imported = skipped = 0
+            for pattern in global_data.get('patterns') or []:
+                if pattern['pattern_id'] in seen:
+                    skipped += 1
+                    continue
+                seen.add(pattern['pattern_id'])
+                self.put_patterns([pattern])
+                imported += 1
+        return imported, skipped
+
+    def export_document(self):
+        """
+        The store as a global learnings document (same layout as the YAML file).
+
+        Returns:
+            global_data: Dict with the top-level fields and a patterns list
+        """
+        global_data = {}
+        for key, value in self.conn.execute('SELECT key, value FROM meta ORDER BY position'):
+            global_data[key] = json.loads(value)
+        global_data['patterns'] = list(self.iter_patterns())  # Keeps its position if recorded
+        return global_data
+
+
+def open_database(path, create=True):
+    """LearningsDB for a path (see LearningsDB)."""
+    with instrument.span('load'):
+        return LearningsDB(path, create=create)
+
+
+def import_yaml(yaml_path, db_path):
+    """
+    Load global-learnings.yaml (snapshot + pending journal) into a database.
+
+    Returns:
+        (imported, skipped): Pattern counts
+    """
+    global_data = journal_lib.load_learnings(yaml_path)
+    with open_database(db_path) as db:
+        return db.import_document(global_data)
+
+
+def export_yaml(db_path, yaml_path):
+    """
+    Write a database out as global-learnings.yaml (atomic write).
+
+    Returns:
+        count: Number of patterns written
+    """
+    with open_database(db_path, create=False) as db:
+        global_data = db.export_document()
+    journal_lib.write_snapshot(yaml_path, global_data)
+    return len(global_data['patterns'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L Learnings DB - SQLite backend for global learnings')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Replace a database with the contents of a YAML file')
+    imp.add_argument('yaml_path')
+    imp.add_argument('db_path')
+
+    exp = sub.add_parser('export', help='Write a database out as YAML')
+    exp.add_argument('db_path')
+    exp.add_argument('yaml_path')
+
+    get = sub.add_parser('get', help='Print one pattern as JSON')
+    get.add_argument('db_path')
+    get.add_argument('--id', required=True, help='Pattern ID (e.g., PATTERN-003)')
+
+    query = sub.add_parser('query', help='Print matching patterns as NDJSON')
+    query.add_argument('db_path')
+    query.add_argument('--status', default='IDENTIFIED', help='Status (default: IDENTIFIED)')
+    query.add_argument('--min-occurrences', type=int, default=0, help='Minimum occurrences (default: 0)')
+    query.add_argument('--min-severity', default='low', help='Minimum severity (default: low)')
+
+    stats = sub.add_parser('stats', help='Pattern counts by status and severity')
+    stats.add_argument('db_path')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'import':
+            imported, skipped = import_yaml(args.yaml_path, args.db_path)
+            print(f"Imported {imported} patterns into {args.db_path}")
+            if skipped:
+                print(f"   Skipped {skipped} duplicate pattern ID(s)")
+
+        elif args.command == 'export':
+            count = export_yaml(args.db_path, args.yaml_path)
+            print(f"Exported {count} patterns to {args.yaml_path}")
+
+        elif args.command == 'get':
+            with open_database(args.db_path, create=False) as db:
+                pattern = db.get_pattern(args.id)
+            if pattern is None:
+                print(f"ERROR: Pattern {args.id} not found", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(pattern, indent=2))
+
+        elif args.command == 'query':
+            with open_database(args.db_path, create=False) as db:
+                for pattern in db.query_patterns(args.status, args.min_occurrences, args.min_severity):
+                    print(json.dumps(pattern))
+
+        elif args.command == 'stats':
+            with open_database(args.db_path, create=False) as db:
+                print(json.dumps({
+                    'patterns': db.count_patterns(),
+                    'projects': len(db.projects()),
+                    'by_status': dict(db.conn.execute(
+                        'SELECT status, COUNT(*) FROM patterns GROUP BY status ORDER BY status')),
+                    'by_severity': dict(db.conn.execute(
+                        'SELECT severity, COUNT(*) FROM patterns GROUP BY severity ORDER BY severity')),
+                }, indent=2))
+
+    except (OSError, sqlite3.Error, ValueError, KeyError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
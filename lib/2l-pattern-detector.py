@@ -7,14 +7,73 @@ Usage:
                                    --min-occurrences 2 \
                                    --min-severity medium \
                                    --output patterns.json
+
+    # Only the 5 highest-impact patterns, one JSON object per line
+    python3 2l-pattern-detector.py --global-learnings .2L/global-learnings.yaml \
+                                   --top 5 --format ndjson
+
+A --global-learnings path ending in .db selects the SQLite backend (see
+2l-learnings-db.py): the status/occurrence/severity filter runs as an
+indexed query, so only candidate patterns are read.
+
+NDJSON output: the first line holds the summary fields (patterns_found,
+min_occurrences, min_severity, detected_at, top), each following line one
+pattern in rank order.
+
+Results for YAML stores are memoized in <file>.detect-cache/, one entry per
+(content hash of the snapshot and pending journal, min_occurrences,
+min_severity). An unchanged store is answered from the cache with the
+original ranking and detected_at, without parsing; --top is cut from the
+cached full ranking. Entries are evicted least recently used beyond
+TWOL_DETECT_CACHE_ENTRIES (default: 16). --no-cache skips the cache; a
+"detect cache:" line on stderr reports hit or miss.
+
+Scoring: --decay-half-life DAYS multiplies each impact score by
+0.5 ** (age in days / DAYS), age measured from discovered_at, so recent
+patterns rank higher (decayed results are not cached). With NumPy
+installed, large candidate sets (--scoring auto, at least
+VECTORIZE_MIN_PATTERNS) are scored as columns in one vectorized pass and
+ranked with argpartition; the scores and order match the Python loop
+exactly when decay is off. Without NumPy the Python loop is used.
 """
 
-import yaml
+import os
 import json
+import heapq
+import pickle
+import hashlib
+import tempfile
 import argparse
+import importlib
 import sys
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # Optional: scoring falls back to the Python loop
+    np = None
+
+yaml_io = importlib.import_module('2l-yaml-io')
+journal_lib = importlib.import_module('2l-journal')
+instrument = importlib.import_module('2l-instrument')
+learnings_db = importlib.import_module('2l-learnings-db')
+
+DETECT_CACHE_VERSION = 1
+DETECT_CACHE_SUFFIX = '.detect-cache'
+DEFAULT_DETECT_CACHE_ENTRIES = 16
+
+SCORING_MODES = ('auto', 'python', 'numpy')
+
+# --scoring auto vectorizes candidate sets at least this large
+VECTORIZE_MIN_PATTERNS = 5000
+
+SEVERITY_WEIGHTS = {
+    'critical': 10,
+    'medium': 5,
+    'low': 1
+}
+SEVERITY_ORDER = {'critical': 3, 'medium': 2, 'low': 1}
+
 
 def calculate_impact_score(pattern):
     """
@@ -29,14 +88,8 @@ def calculate_impact_score(pattern):
         impact_score: Float score (higher = more impactful)
     """
     # Severity weights
-    severity_weights = {
-        'critical': 10,
-        'medium': 5,
-        'low': 1
-    }
-
     severity = pattern.get('severity', 'low')
-    severity_weight = severity_weights.get(severity, 1)
+    severity_weight = SEVERITY_WEIGHTS.get(severity, 1)
 
     # Occurrences
     occurrences = pattern.get('occurrences', 1)
@@ -51,57 +104,357 @@ def calculate_impact_score(pattern):
     return impact_score
 
 
-def detect_recurring_patterns(global_learnings_path, min_occurrences=2, min_severity='medium'):
+def discovered_timestamp(pattern):
+    """POSIX timestamp of a pattern's discovered_at, or None if missing/unparseable."""
+    try:
+        return datetime.fromisoformat(str(pattern['discovered_at'])).timestamp()
+    except (KeyError, ValueError):
+        return None
+
+
+def decay_factor(pattern, half_life_days, now):
+    """
+    Recency weight 0.5 ** (age_days / half_life_days) (1.0 without discovered_at).
+
+    Args:
+        pattern: Pattern dict
+        half_life_days: Age at which the weight halves
+        now: Reference POSIX timestamp
+    """
+    discovered = discovered_timestamp(pattern)
+    if discovered is None:
+        return 1.0
+    age_days = max(0.0, now - discovered) / 86400
+    return 0.5 ** (age_days / half_life_days)
+
+
+def impact_scores(patterns, half_life_days=None, now=None):
+    """
+    Impact scores of many patterns as one vectorized NumPy pass.
+
+    Severity weight, occurrences and project count (and discovery time,
+    for decay) are pulled into columns; without decay each score is
+    computed with the same float operations, in the same order, as
+    calculate_impact_score.
+
+    Args:
+        patterns: List of pattern dicts
+        half_life_days: Optional recency half-life (see decay_factor)
+        now: Reference POSIX timestamp for decay (default: now)
+
+    Returns:
+        scores: float64 array, aligned with patterns
+    """
+    count = len(patterns)
+    weights = np.fromiter((SEVERITY_WEIGHTS.get(p.get('severity', 'low'), 1) for p in patterns),
+                          dtype=np.int64, count=count)
+    occurrences = np.array([p.get('occurrences', 1) for p in patterns])
+    project_counts = np.fromiter((len(p.get('projects', [])) for p in patterns), dtype=np.int64, count=count)
+    recurrence = np.where(project_counts > 1, 1.5, 1.0)
+    scores = weights * occurrences * recurrence
+
+    if half_life_days:
+        now = datetime.now().timestamp() if now is None else now
+        discovered = np.array([discovered_timestamp(p) for p in patterns], dtype=np.float64)
+        age_days = np.maximum(0.0, np.nan_to_num(now - discovered, nan=0.0)) / 86400
+        scores = scores * np.power(0.5, age_days / half_life_days)
+    return scores.astype(np.float64, copy=False)
+
+
+def rank_order(patterns, scores, top=None):
+    """
+    Indices of patterns in rank_key order, from an impact score array.
+
+    For a top-K cut, argpartition finds the K-th highest score; only
+    patterns scoring at least that much are sorted (so ties at the cut are
+    broken by pattern_id exactly as in the full sort).
+
+    Args:
+        patterns: List of pattern dicts
+        scores: Array from impact_scores
+        top: Keep only the K highest-ranked (default: all)
+
+    Returns:
+        order: List of indices into patterns
+    """
+    candidates = np.arange(len(patterns))
+    if top is not None and top < len(patterns):
+        kth = len(patterns) - top
+        threshold = scores[np.argpartition(scores, kth)[kth]]
+        candidates = np.flatnonzero(scores >= threshold)
+
+    ids = np.array([patterns[i].get('pattern_id', '') for i in candidates.tolist()], dtype=str)
+    order = candidates[np.lexsort((ids, -scores[candidates]))]
+    return order[:top].tolist() if top is not None else order.tolist()
+
+
+def rank_key(pattern):
+    """Sort key: impact score (descending), then pattern_id (tie-breaking)."""
+    return (-pattern['impact_score'], pattern.get('pattern_id', ''))
+
+
+def iter_recurring_patterns(all_patterns, min_occurrences=2, min_severity='medium',
+                            decay_half_life=None, now=None):
+    """
+    Stream patterns through the status, occurrence and severity filters.
+
+    Each kept pattern gets its impact_score set as it passes through.
+
+    Args:
+        all_patterns: Iterable of pattern dicts
+        min_occurrences: Minimum occurrences to consider pattern recurring
+        min_severity: Minimum severity ('critical', 'medium', 'low')
+        decay_half_life: Optional recency half-life in days (see decay_factor)
+        now: Reference POSIX timestamp for decay (default: now)
+
+    Yields:
+        pattern: Recurring pattern dict (with impact_score), in input order
+    """
+    if decay_half_life and now is None:
+        now = datetime.now().timestamp()
+    for p in filter_recurring(all_patterns, min_occurrences, min_severity):
+        p['impact_score'] = calculate_impact_score(p)
+        if decay_half_life:
+            p['impact_score'] *= decay_factor(p, decay_half_life, now)
+        yield p
+
+
+def filter_recurring(all_patterns, min_occurrences=2, min_severity='medium'):
+    """Patterns passing the status, occurrence and severity filters (no scoring)."""
+    min_severity_level = SEVERITY_ORDER.get(min_severity, 2)
+
+    for p in all_patterns:
+        # Only IDENTIFIED patterns that recur often and are severe enough
+        if (p.get('status', 'IDENTIFIED') == 'IDENTIFIED'
+                and p.get('occurrences', 0) >= min_occurrences
+                and SEVERITY_ORDER.get(p.get('severity', 'low'), 1) >= min_severity_level):
+            yield p
+
+
+def vectorize(scoring, count):
+    """
+    Whether to score with NumPy.
+
+    Raises:
+        ValueError: If scoring is 'numpy' and NumPy is not installed, or unknown
+    """
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode: {scoring}")
+    if scoring == 'numpy' and np is None:
+        raise ValueError("--scoring numpy needs NumPy (pip install numpy)")
+    return np is not None and (scoring == 'numpy' or (scoring == 'auto' and count >= VECTORIZE_MIN_PATTERNS))
+
+
+def detect_recurring_patterns(global_learnings_path, min_occurrences=2, min_severity='medium',
+                              top=None, stats=None, decay_half_life=None, scoring='auto'):
     """
     Detect recurring patterns from global learnings.
 
     Args:
-        global_learnings_path: Path to global-learnings.yaml
+        global_learnings_path: Path to global-learnings.yaml (or a .db store)
         min_occurrences: Minimum occurrences to consider pattern recurring (default: 2)
         min_severity: Minimum severity ('critical', 'medium', 'low') (default: 'medium')
+        top: Keep only the K highest-ranked patterns (bounded heap, O(K) memory)
+        stats: Optional dict; 'matched' is set to the number of recurring
+            patterns before the top-K cut
+        decay_half_life: Optional recency half-life in days (see decay_factor)
+        scoring: 'auto', 'python' or 'numpy' (see module docstring)
 
     Returns:
         patterns: List of pattern dicts, sorted by impact score (descending)
     """
-    # Read global learnings
-    with open(global_learnings_path, 'r') as f:
-        global_data = yaml.safe_load(f)
+    if learnings_db.is_database(global_learnings_path):
+        # Indexed pre-filter; the same filter below still sets impact scores
+        with learnings_db.open_database(global_learnings_path, create=False) as db:
+            with instrument.span('load'):
+                candidates = list(db.query_patterns('IDENTIFIED', min_occurrences, min_severity))
+    else:
+        # Read global learnings (sidecar snapshot + pending journal)
+        candidates = journal_lib.load_learnings(global_learnings_path).get('patterns', [])
+
+    if vectorize(scoring, len(candidates)):
+        with instrument.span('score'):
+            recurring = list(filter_recurring(candidates, min_occurrences, min_severity))
+            ranked = []
+            if recurring:
+                scores = impact_scores(recurring, decay_half_life)
+                order = rank_order(recurring, scores, top)
+                score_list = scores.tolist()
+                for i in order:
+                    recurring[i]['impact_score'] = score_list[i]
+                ranked = [recurring[i] for i in order]
+        if stats is not None:
+            stats['matched'] = len(recurring)
+        return ranked
+
+    matched = 0
+
+    def counted(patterns):
+        nonlocal matched
+        for pattern in patterns:
+            matched += 1
+            yield pattern
+
+    recurring = counted(iter_recurring_patterns(candidates, min_occurrences, min_severity, decay_half_life))
+
+    # Filtering and scoring run lazily inside the sort
+    with instrument.span('score'):
+        if top is None:
+            ranked = sorted(recurring, key=rank_key)
+        else:
+            # Same order as sorted(...)[:top], without holding every match
+            ranked = heapq.nsmallest(top, recurring, key=rank_key)
+
+    if stats is not None:
+        stats['matched'] = matched
+    return ranked
 
-    all_patterns = global_data.get('patterns', [])
 
-    # Filter by status (only IDENTIFIED)
-    identified_patterns = [
-        p for p in all_patterns
-        if p.get('status', 'IDENTIFIED') == 'IDENTIFIED'
-    ]
+def detect_cache_dir_for(global_learnings_path):
+    """Directory holding memoized results for a learnings file (<file>.detect-cache)."""
+    return global_learnings_path + DETECT_CACHE_SUFFIX
 
-    # Filter by minimum occurrences
-    recurring_patterns = [
-        p for p in identified_patterns
-        if p.get('occurrences', 0) >= min_occurrences
-    ]
 
-    # Filter by minimum severity
-    severity_order = {'critical': 3, 'medium': 2, 'low': 1}
-    min_severity_level = severity_order.get(min_severity, 2)
+def detect_cache_entries():
+    """Maximum number of memoized results kept per learnings file (TWOL_DETECT_CACHE_ENTRIES)."""
+    try:
+        return max(1, int(os.environ.get('TWOL_DETECT_CACHE_ENTRIES', DEFAULT_DETECT_CACHE_ENTRIES)))
+    except ValueError:
+        return DEFAULT_DETECT_CACHE_ENTRIES
 
-    filtered_patterns = [
-        p for p in recurring_patterns
-        if severity_order.get(p.get('severity', 'low'), 1) >= min_severity_level
-    ]
 
-    # Calculate impact score for each pattern
-    for pattern in filtered_patterns:
-        pattern['impact_score'] = calculate_impact_score(pattern)
+def detect_cache_key(global_learnings_path, min_occurrences, min_severity):
+    """
+    Cache key for detection results: the learnings content plus parameters.
 
-    # Sort by impact score (descending), then by pattern_id (for tie-breaking)
-    sorted_patterns = sorted(
-        filtered_patterns,
-        key=lambda p: (-p['impact_score'], p.get('pattern_id', '')),
-        reverse=False  # False because we're using negative impact_score for descending
-    )
+    Returns:
+        key: Hex digest, or None if the learnings file does not exist
+    """
+    snapshot_hash = yaml_io.current_hash(global_learnings_path)
+    if snapshot_hash is None:
+        return None
+    journal_hash = yaml_io.file_hash(journal_lib.journal_path_for(global_learnings_path))
+    material = f"{snapshot_hash}|{journal_hash}|{min_occurrences}|{min_severity}"
+    return hashlib.blake2b(material.encode('utf-8'), digest_size=16).hexdigest()
 
-    return sorted_patterns
+
+def _read_cached_result(cache_dir, key):
+    entry_path = os.path.join(cache_dir, key + '.pickle')
+    try:
+        with open(entry_path, 'rb') as f:
+            entry = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        return None  # Unreadable entry: treated as a miss and overwritten
+    if not isinstance(entry, dict) or entry.get('version') != DETECT_CACHE_VERSION or entry.get('key') != key:
+        return None
+    try:
+        os.utime(entry_path)  # Most recently used
+    except OSError:
+        pass
+    return entry
+
+
+def _write_cached_result(cache_dir, key, entry, max_entries):
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp_', suffix='.pickle')
+    try:
+        with os.fdopen(temp_fd, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(cache_dir, key + '.pickle'))
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+    # Evict least recently used entries beyond the limit
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pickle') and not name.startswith('.tmp_'):
+            try:
+                entries.append((os.stat(os.path.join(cache_dir, name)).st_mtime_ns, name))
+            except FileNotFoundError:
+                pass
+    entries.sort()
+    for _, name in entries[:max(0, len(entries) - max_entries)]:
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def detect_with_cache(global_learnings_path, min_occurrences=2, min_severity='medium',
+                      top=None, stats=None, use_cache=True, decay_half_life=None, scoring='auto'):
+    """
+    detect_recurring_patterns, memoized on the learnings content.
+
+    SQLite stores are always queried (their indexed pre-filter is the fast
+    path), and decayed scores, which change with time, are never cached. A cache that cannot be written only costs the next run a miss.
+
+    Args:
+        global_learnings_path: Path to global-learnings.yaml (or a .db store)
+        min_occurrences: Minimum occurrences (see detect_recurring_patterns)
+        min_severity: Minimum severity (see detect_recurring_patterns)
+        top: Keep only the K highest-ranked patterns
+        stats: Optional dict; gets 'matched', 'detected_at' (when the
+            ranking was computed) and 'cache' ('hit', 'miss' or 'off')
+        use_cache: Set False to always detect (the cache is left untouched)
+        decay_half_life: Optional recency half-life in days (see decay_factor)
+        scoring: 'auto', 'python' or 'numpy' (see module docstring)
+
+    Returns:
+        patterns: List of pattern dicts, sorted by impact score (descending)
+    """
+    stats = {} if stats is None else stats
+    key = None
+    if use_cache and not decay_half_life and not learnings_db.is_database(global_learnings_path):
+        with instrument.span('load'):
+            key = detect_cache_key(global_learnings_path, min_occurrences, min_severity)
+    if key is None:
+        stats['cache'] = 'off'
+        stats['detected_at'] = datetime.now().isoformat()
+        return detect_recurring_patterns(global_learnings_path, min_occurrences, min_severity, top, stats,
+                                         decay_half_life, scoring)
+
+    cache_dir = detect_cache_dir_for(global_learnings_path)
+    with instrument.span('load'):
+        entry = _read_cached_result(cache_dir, key)
+    if entry is not None:
+        stats['cache'] = 'hit'
+    else:
+        stats['cache'] = 'miss'
+        ranked = detect_recurring_patterns(global_learnings_path, min_occurrences, min_severity, None, stats,
+                                           scoring=scoring)
+        entry = {
+            'version': DETECT_CACHE_VERSION,
+            'key': key,
+            'matched': stats['matched'],
+            'detected_at': datetime.now().isoformat(),
+            'patterns': ranked,
+        }
+        try:
+            _write_cached_result(cache_dir, key, entry, detect_cache_entries())
+        except OSError as e:
+            print(f"WARNING: Could not write detect cache: {e}", file=sys.stderr)
+
+    stats['matched'] = entry['matched']
+    stats['detected_at'] = entry['detected_at']
+    return entry['patterns'] if top is None else entry['patterns'][:top]
+
+
+def write_ndjson(output_data, stream):
+    """
+    Write detection results as NDJSON: a summary line, then one pattern per line.
+
+    Args:
+        output_data: Result dict as built by main()
+        stream: Writable text stream
+    """
+    summary = {k: v for k, v in output_data.items() if k != 'patterns'}
+    stream.write(json.dumps(summary) + '\n')
+    for pattern in output_data['patterns']:
+        stream.write(json.dumps(pattern) + '\n')
 
 
 def main():
@@ -110,32 +463,66 @@ def main():
     parser.add_argument('--min-occurrences', type=int, default=2, help='Minimum occurrences (default: 2)')
     parser.add_argument('--min-severity', default='medium', help='Minimum severity (critical/medium/low, default: medium)')
     parser.add_argument('--output', default='-', help='Output file ("-" for stdout, default: stdout)')
+    parser.add_argument('--top', type=int, help='Only output the K highest-impact patterns')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='Output format (default: json)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Detect from scratch instead of using the result cache')
+    parser.add_argument('--decay-half-life', type=float, metavar='DAYS',
+                        help='Weight impact by recency: halve it for every DAYS since discovered_at')
+    parser.add_argument('--scoring', choices=SCORING_MODES, default='auto',
+                        help='Score with the Python loop or NumPy (default: auto, NumPy for large sets if installed)')
+    instrument.add_arguments(parser)
 
     args = parser.parse_args()
+    instrument.configure('2l-pattern-detector', args)
+
+    if args.top is not None and args.top < 1:
+        parser.error('--top must be at least 1')
+    if args.decay_half_life is not None and args.decay_half_life <= 0:
+        parser.error('--decay-half-life must be positive')
 
     try:
         # Detect patterns
-        patterns = detect_recurring_patterns(
+        stats = {}
+        patterns = detect_with_cache(
             args.global_learnings,
             min_occurrences=args.min_occurrences,
-            min_severity=args.min_severity
+            min_severity=args.min_severity,
+            top=args.top,
+            stats=stats,
+            use_cache=not args.no_cache,
+            decay_half_life=args.decay_half_life,
+            scoring=args.scoring
         )
+        if stats['cache'] != 'off':
+            print(f"detect cache: {stats['cache']} ({detect_cache_dir_for(args.global_learnings)})",
+                  file=sys.stderr)
 
-        # Output as JSON
+        # patterns_found counts every recurring pattern, even with --top
         output_data = {
-            'patterns_found': len(patterns),
+            'patterns_found': stats['matched'],
             'min_occurrences': args.min_occurrences,
             'min_severity': args.min_severity,
-            'detected_at': datetime.now().isoformat(),
-            'patterns': patterns
+            'detected_at': stats['detected_at'],
         }
-
-        if args.output == '-':
-            print(json.dumps(output_data, indent=2))
-        else:
-            with open(args.output, 'w') as f:
-                json.dump(output_data, f, indent=2)
-            print(f"Patterns written to {args.output}", file=sys.stderr)
+        if args.top is not None:
+            output_data['top'] = args.top
+        output_data['patterns'] = patterns
+
+        with instrument.span('write'):
+            if args.output == '-':
+                if args.format == 'ndjson':
+                    write_ndjson(output_data, sys.stdout)
+                else:
+                    print(json.dumps(output_data, indent=2))
+            else:
+                with open(args.output, 'w') as f:
+                    if args.format == 'ndjson':
+                        write_ndjson(output_data, f)
+                    else:
+                        json.dump(output_data, f, indent=2)
+                print(f"Patterns written to {args.output}", file=sys.stderr)
 
     except FileNotFoundError as e:
         print(f"ERROR: Global learnings file not found: {e}", file=sys.stderr)
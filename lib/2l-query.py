@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+2L Query - Answer small questions about 2L state files from one process
+
+Commands like /2l-improve used to start a fresh interpreter (and re-parse
+patterns.json or global-learnings.yaml) for every question. This helper
+answers them with query subcommands, and can run as a persistent server on
+a Unix socket so one warm process serves every query in a command run.
+
+Usage:
+    python3 2l-query.py count patterns.json --key patterns
+    python3 2l-query.py exists patterns.json --id PATTERN-003
+    python3 2l-query.py top patterns.json -n 5 --template '{index}. {name} ({pattern_id})'
+    python3 2l-query.py get-fields patterns.json --id PATTERN-003 \\
+                                   --fields name,severity,impact_score:.1f
+    python3 2l-query.py extract patterns.json --id PATTERN-003 --output pattern.json
+    python3 2l-query.py next-plan-id .2L
+    python3 2l-query.py get .2L/config.yaml --key current_plan
+
+Global learnings in SQLite (a .db path, see 2l-learnings-db.py) are read
+with indexed lookups for count/exists/get-fields/extract on patterns;
+other queries export the whole store first.
+
+Persistent mode:
+    python3 2l-query.py --socket .2L/.query.sock serve &
+    python3 2l-query.py --socket .2L/.query.sock count patterns.json --key patterns
+
+Shell callers should use query_2l from 2l-query.sh, which talks to the
+socket with `nc -U` (no interpreter start) and falls back to a one-shot
+python3 call when no server is running.
+
+Protocol: the client sends the argv joined by \\x1f and terminated by
+\\x1e\\n (arguments may contain newlines); the server answers
+"<exit code>\\n<output>" and closes the connection.
+"""
+
+import os
+import re
+import sys
+import json
+import socket
+import sqlite3
+import argparse
+import importlib
+
+journal_lib = importlib.import_module('2l-journal')
+learnings_db = importlib.import_module('2l-learnings-db')
+
+ARG_SEPARATOR = '\x1f'
+REQUEST_TERMINATOR = '\x1e\n'
+DEFAULT_IDLE_TIMEOUT = 600  # seconds
+
+
+class QueryError(Exception):
+    """Query could not be answered (missing file, key or item)."""
+
+
+class DocumentCache:
+    """
+    Parsed documents keyed by path, reused while (mtime, size) is unchanged.
+
+    One-shot runs load each file at most once; the server keeps documents
+    warm across requests.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._databases = {}
+
+    def load(self, path):
+        """
+        Load a JSON or YAML document (YAML via snapshot + journal replay).
+
+        Args:
+            path: File path (.yaml/.yml parsed as YAML, .db exported from
+                SQLite, anything else as JSON)
+
+        Returns:
+            data: Parsed document (shared; callers must not mutate it)
+
+        Raises:
+            QueryError: If the file does not exist
+        """
+        if learnings_db.is_database(path):
+            # WAL writes leave the main file's mtime alone: always read fresh
+            return self.database(path).export_document()
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise QueryError(f"File not found: {path}")
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._documents.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        if path.endswith(('.yaml', '.yml')):
+            data = journal_lib.load_learnings(path)
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+        self._documents[path] = (key, data)
+        return data
+
+    def database(self, path):
+        """
+        Open LearningsDB for a .db path (kept open for later queries).
+
+        Raises:
+            QueryError: If the file does not exist
+        """
+        db = self._databases.get(path)
+        if db is None:
+            try:
+                db = self._databases[path] = learnings_db.LearningsDB(path, create=False)
+            except FileNotFoundError:
+                raise QueryError(f"File not found: {path}")
+        return db
+
+
+def select_items(data, key):
+    """
+    Resolve a dotted key to a value (e.g., "patterns" or "plans").
+
+    Args:
+        data: Parsed document
+        key: Dotted key path, or None for the document itself
+
+    Returns:
+        value: The selected value
+    """
+    value = data
+    for part in (key.split('.') if key else []):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            raise QueryError(f"Key not found: {key}")
+    return value
+
+
+def with_computed_fields(item, index=None):
+    """Item fields plus project_count and (for top) a 1-based index."""
+    fields = dict(item)
+    if isinstance(item.get('projects'), list):
+        fields['project_count'] = len(item['projects'])
+    if index is not None:
+        fields['index'] = index
+    return fields
+
+
+def find_item(items, item_id, id_field):
+    for item in items:
+        if isinstance(item, dict) and str(item.get(id_field)) == item_id:
+            return item
+    return None
+
+
+def format_field(fields, spec):
+    """
+    Format one field spec: "name" or "name:format_spec" (e.g., "impact_score:.1f").
+    """
+    name, _, format_spec = spec.partition(':')
+    if name not in fields:
+        raise QueryError(f"Field not found: {name}")
+    value = fields[name]
+    if format_spec:
+        return format(value, format_spec)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def next_plan_id(state_dir):
+    """
+    Next unused plan ID in a .2L directory (plan-1 if none exist).
+
+    Args:
+        state_dir: Path to .2L
+
+    Returns:
+        plan_id: e.g. "plan-6"
+    """
+    try:
+        entries = os.listdir(state_dir)
+    except FileNotFoundError:
+        raise QueryError(f"Directory not found: {state_dir}")
+    plan_numbers = [int(m.group(1)) for m in (re.match(r'plan-(\d+)', d) for d in entries) if m]
+    return f"plan-{max(plan_numbers) + 1}" if plan_numbers else 'plan-1'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='2L Query - answer questions about 2L state files')
+    parser.add_argument('--socket', help='Query server socket (falls back to a local run if unreachable)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    count = sub.add_parser('count', help='Number of items under a key')
+    count.add_argument('path')
+    count.add_argument('--key', help='Dotted key of a list or dict (default: document root)')
+
+    get = sub.add_parser('get', help='Print the value under a key')
+    get.add_argument('path')
+    get.add_argument('--key', help='Dotted key (default: document root)')
+
+    for name, help_text in (('exists', 'Print 1 if an item with the ID exists, else 0'),
+                            ('get-fields', 'Print selected fields of one item, one per line'),
+                            ('extract', 'Write one item as JSON')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('path')
+        p.add_argument('--id', required=True, help='Item ID (e.g., PATTERN-003)')
+        p.add_argument('--key', default='patterns', help='Dotted key of the item list (default: patterns)')
+        p.add_argument('--id-field', default='pattern_id', help='ID field name (default: pattern_id)')
+        if name == 'get-fields':
+            p.add_argument('--fields', required=True,
+                           help='Comma-separated fields, optionally with format (e.g., impact_score:.1f)')
+        if name == 'extract':
+            p.add_argument('--output', default='-', help='Output file ("-" for stdout)')
+
+    top = sub.add_parser('top', help='Print the first N items of a ranked list')
+    top.add_argument('path')
+    top.add_argument('-n', type=int, default=1, help='Number of items (default: 1)')
+    top.add_argument('--key', default='patterns', help='Dotted key of the item list (default: patterns)')
+    top.add_argument('--template', default='{pattern_id}',
+                     help='str.format template per item; {index} and {project_count} are available')
+    top.add_argument('--separator', default='\n', help='Text between items (default: newline)')
+
+    plan = sub.add_parser('next-plan-id', help='Next unused plan-N in a .2L directory')
+    plan.add_argument('state_dir', nargs='?', default='.2L')
+
+    serve = sub.add_parser('serve', help='Serve queries on a Unix socket')
+    serve.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                       help=f'Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT})')
+
+    return parser
+
+
+def run_query(args, documents):
+    """
+    Execute one parsed query.
+
+    Args:
+        args: argparse namespace from build_parser()
+        documents: DocumentCache to load files through
+
+    Returns:
+        output: Text to print (without trailing newline)
+
+    Raises:
+        QueryError: If the query cannot be answered
+    """
+    if args.command == 'next-plan-id':
+        return next_plan_id(args.state_dir)
+
+    if learnings_db.is_database(args.path) and args.key == 'patterns':
+        # Indexed lookups instead of exporting the whole store
+        if args.command == 'count':
+            return str(documents.database(args.path).count_patterns())
+        if args.command in ('exists', 'get-fields', 'extract') and args.id_field == 'pattern_id':
+            return answer_item(args, documents.database(args.path).get_pattern(args.id))
+
+    data = documents.load(args.path)
+    items = select_items(data, args.key)
+
+    if args.command == 'count':
+        if not isinstance(items, (list, dict)):
+            raise QueryError(f"Not a list or mapping: {args.key}")
+        return str(len(items))
+
+    if args.command == 'get':
+        if isinstance(items, (dict, list)):
+            return json.dumps(items, indent=2)
+        return '' if items is None else str(items)
+
+    if not isinstance(items, list):
+        raise QueryError(f"Not a list: {args.key}")
+
+    if args.command == 'top':
+        return args.separator.join(
+            args.template.format(**with_computed_fields(item, i))
+            for i, item in enumerate(items[:args.n], 1)
+        )
+
+    return answer_item(args, find_item(items, args.id, args.id_field))
+
+
+def answer_item(args, item):
+    """Output of exists/get-fields/extract for the item found (or None)."""
+    if args.command == 'exists':
+        return '1' if item else '0'
+
+    if item is None:
+        raise QueryError(f"{args.id} not found under {args.key}")
+
+    if args.command == 'get-fields':
+        fields = with_computed_fields(item)
+        return '\n'.join(format_field(fields, spec) for spec in args.fields.split(','))
+
+    if args.command == 'extract':
+        text = json.dumps(item, indent=2)
+        if args.output == '-':
+            return text
+        with open(args.output, 'w') as f:
+            f.write(text)
+        return ''
+
+    raise QueryError(f"Unknown command: {args.command}")
+
+
+def execute(argv, parser, documents):
+    """
+    Parse and run one query, capturing errors instead of exiting.
+
+    Returns:
+        (exit_code, output): 0 and the answer, or 1 and an error message
+    """
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return (e.code or 0), ''
+    if args.command == 'serve':
+        return 1, "ERROR: serve cannot be run through a query server"
+    try:
+        return 0, run_query(args, documents)
+    except (QueryError, OSError, ValueError, KeyError, IndexError, sqlite3.Error) as e:
+        return 1, f"ERROR: {e}"
+
+
+def serve(socket_path, idle_timeout):
+    """
+    Serve queries on a Unix socket until idle for idle_timeout seconds.
+
+    Args:
+        socket_path: Socket file to create (removed on exit)
+        idle_timeout: Idle seconds before the server exits
+
+    Raises:
+        QueryError: If another server is already listening on socket_path
+    """
+    parser = build_parser()
+    documents = DocumentCache()
+
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.remove(socket_path)  # Stale socket from a server that died
+        else:
+            raise QueryError(f"A query server is already listening on {socket_path}")
+        finally:
+            probe.close()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(16)
+    server.settimeout(idle_timeout)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            with conn:
+                request = b''
+                terminator = REQUEST_TERMINATOR.encode('utf-8')
+                while not request.endswith(terminator):
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    request += chunk
+                if not request:
+                    continue  # Liveness probe (see above) or aborted client
+                argv = request.decode('utf-8').removesuffix(REQUEST_TERMINATOR).split(ARG_SEPARATOR)
+                if argv == ['shutdown']:
+                    conn.sendall(b'0\n')
+                    break
+                code, output = execute(argv, parser, documents)
+                try:
+                    conn.sendall(f"{code}\n{output}".encode('utf-8'))
+                except OSError:
+                    pass  # Client went away; keep serving
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def query_server(socket_path, argv):
+    """
+    Send one query to a running server.
+
+    Returns:
+        (exit_code, output), or None if no server is reachable
+    """
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+    except OSError:
+        return None
+    with client:
+        client.sendall((ARG_SEPARATOR.join(argv) + REQUEST_TERMINATOR).encode('utf-8'))
+        response = b''
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    code, _, output = response.decode('utf-8').partition('\n')
+    return int(code), output
+
+
+def main():
+    argv = sys.argv[1:]
+    parser = build_parser()
+
+    # Strip --socket so the remaining argv can be forwarded verbatim
+    socket_path = None
+    if len(argv) >= 2 and argv[0] == '--socket':
+        socket_path, argv = argv[1], argv[2:]
+
+    if argv[:1] == ['serve']:
+        args = parser.parse_args(argv)
+        if not socket_path:
+            parser.error('serve requires --socket')
+        try:
+            serve(socket_path, args.idle_timeout)
+        except QueryError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    result = query_server(socket_path, argv) if socket_path else None
+    if result is None:
+        result = execute(argv, parser, DocumentCache())
+
+    code, output = result
+    if output:
+        print(output, file=sys.stderr if code else sys.stdout)
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
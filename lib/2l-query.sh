@@ -0,0 +1,79 @@
+#!/usr/bin/env bash
+#
+# 2L Query Library
+# Provides query_2l for asking 2L state files small questions without
+# starting a new Python interpreter per question.
+#
+# Usage:
+#   source ~/.claude/lib/2l-query.sh
+#   start_2l_query_server              # optional: one warm process for this run
+#   count=$(query_2l count "$patterns_json" --key patterns)
+#   stop_2l_query_server
+#
+# With a server running (and nc supporting -U), queries go over the Unix
+# socket. Otherwise each query falls back to a one-shot python3 call.
+#
+
+QUERY_2L_SCRIPT="$HOME/.claude/lib/2l-query.py"
+QUERY_2L_SOCKET="${QUERY_2L_SOCKET:-.2L/.query.sock}"
+
+# Start the query server in the background (no-op if already running)
+start_2l_query_server() {
+  if [ -S "$QUERY_2L_SOCKET" ]; then
+    return 0
+  fi
+
+  mkdir -p "$(dirname "$QUERY_2L_SOCKET")" 2>/dev/null || true
+  python3 "$QUERY_2L_SCRIPT" --socket "$QUERY_2L_SOCKET" serve >/dev/null 2>&1 &
+
+  # Wait briefly for the socket to appear
+  local i
+  for i in 1 2 3 4 5 6 7 8 9 10; do
+    [ -S "$QUERY_2L_SOCKET" ] && return 0
+    sleep 0.05
+  done
+  return 1
+}
+
+# Stop the query server (removes the socket)
+stop_2l_query_server() {
+  if [ -S "$QUERY_2L_SOCKET" ]; then
+    _query_2l_socket shutdown >/dev/null 2>&1 || rm -f "$QUERY_2L_SOCKET"
+  fi
+}
+
+# Send one request over the socket; prints output, returns its exit code
+_query_2l_socket() {
+  # Join with \x1f without command substitution (it would strip trailing newlines)
+  local IFS=$'\x1f'
+  local request="$*"
+  unset IFS
+  local response
+  response=$(printf '%s\x1e\n' "$request" | nc -U "$QUERY_2L_SOCKET" 2>/dev/null) || return 255
+  [ -n "$response" ] || return 255
+
+  local code="${response%%$'\n'*}"
+  local output=""
+  if [ "$response" != "$code" ]; then
+    output="${response#*$'\n'}"
+  fi
+
+  if [ "$code" = "0" ]; then
+    [ -n "$output" ] && printf '%s\n' "$output"
+  else
+    [ -n "$output" ] && printf '%s\n' "$output" >&2
+  fi
+  return "$code"
+}
+
+# Run a query (see 2l-query.py --help for subcommands)
+# Arguments: subcommand and its options, e.g. count FILE --key patterns
+query_2l() {
+  if [ -S "$QUERY_2L_SOCKET" ] && command -v nc >/dev/null 2>&1; then
+    _query_2l_socket "$@"
+    local code=$?
+    # 255 = server unreachable: fall through to a local run
+    [ "$code" -ne 255 ] && return "$code"
+  fi
+  python3 "$QUERY_2L_SCRIPT" "$@"
+}
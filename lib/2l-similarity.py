@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+2L Similarity - Near-duplicate root cause matching with MinHash/LSH
+
+Root causes are normalized, split into character shingles and summarized
+as MinHash signatures. Signatures are banded into an LSH bucket index so
+candidate lookup touches only patterns that share a bucket, and each
+candidate is confirmed with the exact Jaccard similarity of its shingles.
+
+The index is persisted next to the learnings file (<file>.lsh.json) and
+updated incrementally, so only new or edited patterns are re-hashed.
+"""
+
+import os
+import re
+import json
+import random
+import tempfile
+import zlib
+
+INDEX_VERSION = 1
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_SEED = 1
+
+# Mersenne prime for universal hashing (a*x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def index_path_for(learnings_path):
+    """
+    Sidecar path for the LSH index of a learnings file.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+
+    Returns:
+        index_path: Path to the persisted index
+    """
+    return learnings_path + '.lsh.json'
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = re.sub(r'[^a-z0-9]+', ' ', str(text).lower())
+    return text.strip()
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """
+    Character shingles of normalized text.
+
+    Args:
+        text: Input string
+        size: Shingle length in characters
+
+    Returns:
+        shingle_set: Set of substrings (the whole text if shorter than size)
+    """
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def choose_bands(threshold, num_perm):
+    """
+    Pick LSH (bands, rows) whose S-curve midpoint is closest to threshold.
+
+    Two texts become candidates with probability 1 - (1 - s^rows)^bands,
+    which rises steeply around (1 / bands) ^ (1 / rows).
+
+    Args:
+        threshold: Target Jaccard similarity
+        num_perm: Signature length
+
+    Returns:
+        (bands, rows): Band layout with bands * rows <= num_perm
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        # Prefer the layout just below the threshold (fewer false negatives)
+        error = abs(midpoint - threshold) + (0.05 if midpoint > threshold else 0.0)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashLSH:
+    """
+    MinHash signatures with a banded LSH bucket index over patterns.
+
+    Patterns are keyed by pattern_id. Only patterns with matching severity
+    are considered similar, mirroring the exact-match rule.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=DEFAULT_SEED):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self.entries = {}      # pattern_id -> {'fingerprint', 'signature'}
+        self.buckets = {}      # (band, band_hash) -> [pattern_id, ...]
+        self.patterns = {}     # pattern_id -> pattern dict (current store)
+        self.dirty = False
+
+    def params(self):
+        """Parameters that must match for a persisted index to be reusable."""
+        return {
+            'version': INDEX_VERSION,
+            'num_perm': self.num_perm,
+            'shingle_size': self.shingle_size,
+            'seed': self.seed,
+        }
+
+    def signature(self, shingle_set):
+        """
+        MinHash signature of a shingle set.
+
+        Args:
+            shingle_set: Set of shingle strings
+
+        Returns:
+            signature: List of num_perm integer minimums
+        """
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+        return [
+            min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._coefficients
+        ]
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (band, hash(tuple(signature[start:start + self.rows])))
+
+    def _fingerprint(self, pattern):
+        key = f"{pattern['severity']}\0{pattern['root_cause']}"
+        return zlib.crc32(key.encode('utf-8'))
+
+    def _insert(self, pattern_id, signature):
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(pattern_id)
+
+    def add(self, pattern):
+        """
+        Index a pattern (new, or edited since the index was saved).
+
+        Args:
+            pattern: Pattern dict with pattern_id, root_cause, severity
+        """
+        pattern_id = pattern['pattern_id']
+        fingerprint = self._fingerprint(pattern)
+        entry = self.entries.get(pattern_id)
+        self.patterns[pattern_id] = pattern
+        if entry and entry['fingerprint'] == fingerprint:
+            return
+        signature = self.signature(shingles(pattern['root_cause'], self.shingle_size))
+        self.entries[pattern_id] = {'fingerprint': fingerprint, 'signature': signature}
+        self._insert(pattern_id, signature)
+        self.dirty = True
+
+    def sync(self, patterns):
+        """
+        Bring the index in line with the current pattern list.
+
+        Entries for removed or edited patterns are dropped; missing ones
+        are hashed. Cost is proportional to the number of changes plus one
+        fingerprint per pattern.
+
+        Args:
+            patterns: List of pattern dicts from global learnings
+        """
+        current = {}
+        for pattern in patterns:
+            current.setdefault(pattern['pattern_id'], pattern)
+
+        stale = [
+            pattern_id for pattern_id, entry in self.entries.items()
+            if pattern_id not in current
+            or entry['fingerprint'] != self._fingerprint(current[pattern_id])
+        ]
+        if stale:
+            for pattern_id in stale:
+                del self.entries[pattern_id]
+            self._rebuild_buckets()
+            self.dirty = True
+
+        self.patterns = {}
+        for pattern in current.values():
+            self.add(pattern)
+
+    def _rebuild_buckets(self):
+        self.buckets = {}
+        for pattern_id, entry in self.entries.items():
+            self._insert(pattern_id, entry['signature'])
+
+    def find(self, new_pattern):
+        """
+        Find the most similar indexed pattern above the threshold.
+
+        Args:
+            new_pattern: Pattern dict with root_cause and severity
+
+        Returns:
+            Existing pattern dict if similar, None otherwise
+        """
+        query = shingles(new_pattern['root_cause'], self.shingle_size)
+        signature = self.signature(query)
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best = None
+        for pattern_id in candidates:
+            pattern = self.patterns.get(pattern_id)
+            if pattern is None or pattern['severity'] != new_pattern['severity']:
+                continue
+            score = jaccard(query, shingles(pattern['root_cause'], self.shingle_size))
+            if score < self.threshold:
+                continue
+            # Highest similarity wins; ties go to the lowest pattern_id
+            rank = (-score, pattern_id)
+            if best is None or rank < best[0]:
+                best = (rank, pattern)
+        return best[1] if best else None
+
+    def save(self, index_path):
+        """
+        Persist signatures atomically (temp file + rename).
+
+        Args:
+            index_path: Sidecar path (see index_path_for)
+        """
+        data = dict(self.params(), entries=self.entries)
+        dir_path = os.path.dirname(index_path) or '.'
+        temp_fd, temp_path = tempfile.mkstemp(dir=dir_path, prefix='.tmp_', suffix='.json')
+        try:
+            with os.fdopen(temp_fd, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, index_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise e
+        self.dirty = False
+
+    def load(self, index_path):
+        """
+        Load persisted signatures if their parameters match.
+
+        A missing, unreadable or incompatible index is ignored; sync()
+        will rebuild whatever is needed.
+
+        Args:
+            index_path: Sidecar path (see index_path_for)
+
+        Returns:
+            loaded: True if entries were loaded
+        """
+        try:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if any(data.get(k) != v for k, v in self.params().items()):
+            return False
+
+        self.entries = data.get('entries', {})
+        self._rebuild_buckets()
+        return True
+
+
+def open_index(learnings_path, patterns, threshold=DEFAULT_THRESHOLD):
+    """
+    Load (or build) the LSH index for a learnings file and sync it.
+
+    Args:
+        learnings_path: Path to global-learnings.yaml
+        patterns: Current pattern list
+        threshold: Minimum Jaccard similarity to treat as a duplicate
+
+    Returns:
+        index: MinHashLSH ready for find()/add()
+    """
+    index = MinHashLSH(threshold=threshold)
+    index.load(index_path_for(learnings_path))
+    index.sync(patterns)
+    return index
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+2L State - Targeted updates to .2L/config.yaml and plan master-plan.yaml
+
+Orchestrator bookkeeping (completing an iteration, abandoning a plan,
+rolling back) changes a field or two in these files. A StateStore parses
+each file at most once per process, applies changes to the parsed
+records, and on save() rewrites only the files whose records actually
+changed, through atomic_write_yaml (temp + rename; see 2l-yaml-io.py).
+A setter given values a record already has changes nothing, and does
+not touch its timestamp field either, so repeating a command is free.
+
+Iterations in a master plan are matched on global_iteration_number (or
+global_iteration, used by older plans). Plans are ordered by their
+number (plan-10 after plan-9). A master plan may continue after its YAML
+with a "---" line and free text (an exploration summary); only the first
+document is parsed, and the rest is written back unchanged.
+
+Usage (from other lib/ scripts):
+    state = importlib.import_module('2l-state')
+    store = state.open_store('.2L/config.yaml')
+    store.set_iteration_status(7, 'COMPLETE', timestamp_field='completed_at', git_tag='2l-plan-5-iter-7')
+    store.save()
+
+Usage (CLI):
+    python3 2l-state.py current-plan
+    python3 2l-state.py complete-iteration --iteration 7 --commit HASH --tag TAG [--master-plan FILE]
+    python3 2l-state.py abandon-plan plan-5 --reason "Scope changed"
+    python3 2l-state.py rollback --plan plan-4 --iteration 5
+"""
+
+import os
+import re
+import sys
+import argparse
+import importlib
+from datetime import datetime
+
+yaml_io = importlib.import_module('2l-yaml-io')
+
+DEFAULT_CONFIG_FILE = '.2L/config.yaml'
+
+_PLAN_NUMBER = re.compile(r'plan-(\d+)$')
+_DOCUMENT_END = re.compile(r'^---[ \t]*$', re.MULTILINE)
+
+
+def plan_number(plan_id):
+    """Numeric part of a plan ID ("plan-12" -> 12), or None if malformed."""
+    match = _PLAN_NUMBER.match(str(plan_id or ''))
+    return int(match.group(1)) if match else None
+
+
+def iteration_number(iteration):
+    """Global iteration number of a master plan iteration record (or None)."""
+    number = iteration.get('global_iteration_number', iteration.get('global_iteration'))
+    try:
+        return int(number)
+    except (TypeError, ValueError):
+        return None
+
+
+class StateStore:
+    """
+    Parsed config.yaml and master plans, with change tracking.
+
+    Documents are parsed on first use and kept; records returned by the
+    getters are the live parsed dicts (change them through the setters so
+    the change is tracked).
+    """
+
+    def __init__(self, config_path=DEFAULT_CONFIG_FILE):
+        self.config_path = config_path
+        self._docs = {}     # path -> parsed document
+        self._trailers = {}  # path -> text after the first document
+        self._dirty = set()
+
+    def _document(self, path):
+        if path not in self._docs:
+            with open(path, 'r') as f:
+                text = f.read()
+            trailer = None
+            for match in _DOCUMENT_END.finditer(text):
+                if text[:match.start()].strip():
+                    text, trailer = text[:match.start()], text[match.start():]
+                    break
+            self._docs[path] = yaml_io.parse_yaml(text) or {}
+            self._trailers[path] = trailer
+        return self._docs[path]
+
+    def _update(self, path, record, fields, timestamp_field=None):
+        """Set fields on a record of a document; True if anything changed."""
+        changed = {key: value for key, value in fields.items() if record.get(key) != value or key not in record}
+        if not changed:
+            return False
+        record.update(changed)
+        if timestamp_field:
+            record[timestamp_field] = datetime.now().isoformat()
+        self._dirty.add(path)
+        return True
+
+    # -- config.yaml ----------------------------------------------------------
+
+    def config(self):
+        """Parsed config.yaml."""
+        return self._document(self.config_path)
+
+    def current_plan(self):
+        """ID of the current plan (e.g., "plan-5"), or None."""
+        return self.config().get('current_plan')
+
+    def global_iteration(self):
+        """Global iteration counter (0 if unset)."""
+        return int(self.config().get('global_iteration_counter') or 0)
+
+    def plans(self):
+        """Plan records from config.yaml, in file order."""
+        return self.config().get('plans') or []
+
+    def plan(self, plan_id=None):
+        """
+        Plan record by ID (default: the current plan).
+
+        Raises:
+            KeyError: If config.yaml has no such plan
+        """
+        plan_id = plan_id or self.current_plan()
+        for plan in self.plans():
+            if plan.get('plan_id') == plan_id:
+                return plan
+        raise KeyError(f"Plan {plan_id} not found in {self.config_path}")
+
+    def set_plan_status(self, plan_id, status, timestamp_field=None, **fields):
+        """
+        Set a plan's status (and other fields) in config.yaml.
+
+        Args:
+            plan_id: Plan ID (e.g., "plan-5")
+            status: New status (e.g., "ABANDONED", "ARCHIVED")
+            timestamp_field: Field stamped with the current time if anything
+                changed (e.g., "abandoned_at")
+            **fields: Further fields to set (e.g., abandoned_reason="...")
+
+        Returns:
+            changed: False if the plan already had these values
+        """
+        return self._update(self.config_path, self.plan(plan_id), dict(fields, status=status), timestamp_field)
+
+    def set_current(self, plan_id=None, global_iteration=None):
+        """
+        Set current_plan and/or global_iteration_counter.
+
+        Returns:
+            changed: False if both already had these values
+        """
+        fields = {}
+        if plan_id is not None:
+            fields['current_plan'] = plan_id
+        if global_iteration is not None:
+            fields['global_iteration_counter'] = global_iteration
+        return self._update(self.config_path, self.config(), fields)
+
+    # -- master-plan.yaml ------------------------------------------------------
+
+    def master_plan_path(self, plan_id=None):
+        """Master plan file of a plan (default: the current plan), or None."""
+        return self.plan(plan_id).get('master_plan_file')
+
+    def master_plan(self, plan_id=None, path=None):
+        """
+        Parsed master plan of a plan (default: the current plan).
+
+        Args:
+            plan_id: Plan ID
+            path: Master plan file (overrides the one in config.yaml)
+
+        Raises:
+            KeyError: If the plan has no master plan file
+        """
+        path = path or self.master_plan_path(plan_id)
+        if not path:
+            raise KeyError(f"Plan {plan_id or self.current_plan()} has no master_plan_file")
+        return self._document(path)
+
+    def iteration(self, number, plan_id=None, path=None):
+        """
+        Iteration record by global iteration number, or None.
+
+        Args:
+            number: Global iteration number
+            plan_id: Plan whose master plan to search (default: current)
+            path: Master plan file (overrides the one in config.yaml)
+        """
+        for iteration in self.master_plan(plan_id, path).get('iterations') or []:
+            if iteration_number(iteration) == number:
+                return iteration
+        return None
+
+    def set_iteration_status(self, number, status, plan_id=None, path=None, timestamp_field=None, **fields):
+        """
+        Set an iteration's status (and other fields) in its master plan.
+
+        Args:
+            number: Global iteration number
+            status: New status (e.g., "COMPLETE", "ARCHIVED")
+            plan_id: Plan whose master plan holds the iteration (default: current)
+            path: Master plan file (overrides the one in config.yaml)
+            timestamp_field: Field stamped with the current time if anything
+                changed (e.g., "completed_at")
+            **fields: Further fields to set (e.g., git_tag="...")
+
+        Returns:
+            changed: False if the iteration already had these values
+
+        Raises:
+            KeyError: If the master plan has no such iteration
+        """
+        path = path or self.master_plan_path(plan_id)
+        iteration = self.iteration(number, plan_id, path)
+        if iteration is None:
+            raise KeyError(f"Iteration {number} not found in {path}")
+        return self._update(path, iteration, dict(fields, status=status), timestamp_field)
+
+    def rollback(self, plan_id, number, reason=None):
+        """
+        Make (plan_id, iteration number) current and archive everything after it.
+
+        Later plans are marked ARCHIVED; in this and earlier plans,
+        iterations after number are ARCHIVED (git commit/tag cleared) and
+        iteration number is marked COMPLETE. Already-archived records are
+        left alone.
+
+        Args:
+            plan_id: Target plan ID
+            number: Target global iteration number
+            reason: archived_reason (default: "Rollback to iteration N")
+
+        Raises:
+            ValueError: If plan_id is not of the form plan-N
+        """
+        reason = reason or f"Rollback to iteration {number}"
+        target = plan_number(plan_id)
+        if target is None:
+            raise ValueError(f"Invalid plan ID: {plan_id}")
+        self.set_current(plan_id, number)
+
+        for plan in self.plans():
+            this = plan_number(plan.get('plan_id'))
+            if this is None:
+                continue
+            if this > target:
+                if plan.get('status') != 'ARCHIVED':
+                    self.set_plan_status(plan['plan_id'], 'ARCHIVED', timestamp_field='archived_at',
+                                         archived_reason=reason)
+                continue
+
+            path = plan.get('master_plan_file')
+            if not path or not os.path.exists(path):
+                continue
+            for iteration in self.master_plan(path=path).get('iterations') or []:
+                global_iter = iteration_number(iteration)
+                if global_iter is None:
+                    continue
+                if global_iter > number and iteration.get('status') != 'ARCHIVED':
+                    self._update(path, iteration, {'status': 'ARCHIVED', 'archived_reason': reason,
+                                                   'git_commit': None, 'git_tag': None}, 'archived_at')
+                elif global_iter == number:
+                    self._update(path, iteration, {'status': 'COMPLETE'})
+
+    # -- writing ---------------------------------------------------------------
+
+    def changed_paths(self):
+        """Files with unsaved changes."""
+        return sorted(self._dirty)
+
+    def save(self):
+        """
+        Write every changed file atomically.
+
+        Returns:
+            written: Paths rewritten (files whose new content is byte-identical
+            to what is on disk are not)
+        """
+        written = []
+        for path in self.changed_paths():
+            if yaml_io.atomic_write_yaml(path, self._docs[path], trailer=self._trailers.get(path)):
+                written.append(path)
+            self._dirty.discard(path)
+        return written
+
+
+_stores = {}
+
+
+def open_store(config_path=DEFAULT_CONFIG_FILE):
+    """Process-wide StateStore for a config.yaml (files are parsed once)."""
+    store = _stores.get(config_path)
+    if store is None:
+        store = _stores[config_path] = StateStore(config_path)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L State - update config.yaml and master plans')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help=f'Path to config.yaml (default: {DEFAULT_CONFIG_FILE})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('current-plan', help='Print the current plan ID')
+
+    complete = sub.add_parser('complete-iteration', help='Mark an iteration COMPLETE with its commit and tag')
+    complete.add_argument('--iteration', type=int, required=True, help='Global iteration number')
+    complete.add_argument('--commit', required=True, help='Git commit hash')
+    complete.add_argument('--tag', required=True, help='Git tag')
+    complete.add_argument('--plan', help='Plan ID (default: current plan)')
+    complete.add_argument('--master-plan', help='Master plan file (default: from config.yaml)')
+
+    abandon = sub.add_parser('abandon-plan', help='Mark a plan ABANDONED')
+    abandon.add_argument('plan_id')
+    abandon.add_argument('--reason', default='Plan abandoned by user', help='Recorded as abandoned_reason')
+
+    rollback = sub.add_parser('rollback', help='Make an iteration current and archive everything after it')
+    rollback.add_argument('--plan', required=True, help='Target plan ID (e.g., plan-4)')
+    rollback.add_argument('--iteration', type=int, required=True, help='Target global iteration number')
+    rollback.add_argument('--reason', help='Recorded as archived_reason (default: "Rollback to iteration N")')
+
+    args = parser.parse_args()
+    store = open_store(args.config)
+
+    try:
+        if args.command == 'current-plan':
+            print(store.current_plan() or '')
+            return
+
+        with yaml_io.locked(args.config):
+            if args.command == 'complete-iteration':
+                store.set_iteration_status(args.iteration, 'COMPLETE', plan_id=args.plan, path=args.master_plan,
+                                           timestamp_field='completed_at', git_commit=args.commit,
+                                           git_tag=args.tag)
+            elif args.command == 'abandon-plan':
+                store.set_plan_status(args.plan_id, 'ABANDONED', timestamp_field='abandoned_at',
+                                      abandoned_reason=args.reason)
+            elif args.command == 'rollback':
+                store.rollback(args.plan, args.iteration, args.reason)
+            written = store.save()
+
+    except (OSError, KeyError, ValueError, yaml_io.yaml.YAMLError) as e:
+        message = e.args[0] if isinstance(e, KeyError) else e
+        print(f"ERROR: {message}", file=sys.stderr)
+        sys.exit(1)
+
+    for path in written:
+        print(f"✅ Updated {path}")
+    if not written:
+        print("State unchanged, nothing written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+2L Timing - Where wall-clock time goes in an orchestration run
+
+Rebuilds agent, phase and iteration spans from events.jsonl in one pass
+and reports duration statistics as JSON that can be trended over time:
+
+- agents: spans from the first agent_spawn/agent_start of an agent ID to
+  its last agent_complete (the orchestrator often logs its own completion
+  after the agent's), with count/total/p50/p95/max per agent type
+  (agent ID without its number: builder-2 -> builder)
+- phases: spans from one phase_change to the next phase boundary, with
+  the same statistics per phase
+- iterations: per-iteration phase timeline and critical path (phases run
+  one after another; within a phase the path goes through the agent that
+  finished last, and the rest of the phase is orchestrator overhead)
+- open_agents: agents that never logged a completion before their
+  iteration ended or the log ran out
+
+Usage:
+    python3 2l-timing.py                          # all segments under .2L
+    python3 2l-timing.py --plan plan-5 --output .2L/timing.json
+    python3 2l-timing.py --events-file path/to/events.jsonl --spans
+"""
+
+import re
+import sys
+import json
+import math
+import argparse
+import importlib
+from datetime import datetime, timezone
+
+event_log_lib = importlib.import_module('2l-event-log')
+
+_AGENT_NUMBER = re.compile(r'-\d+[A-Za-z]*$')
+
+# Events that end the current phase (and iteration_start/plan_start, which also end the iteration)
+_PHASE_BOUNDARIES = ('phase_change', 'iteration_complete', 'iteration_start', 'plan_start')
+
+
+def parse_timestamp(value):
+    """ISO 8601 timestamp (Z or offset) to a UTC datetime, or None if unparseable."""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def agent_type(agent_id):
+    """Agent type from an agent ID (builder-2 -> builder, master-explorer-1 -> master-explorer)."""
+    return _AGENT_NUMBER.sub('', agent_id) or agent_id
+
+
+def normalize_phase(phase):
+    """Phase names appear as both master-exploration and master_exploration."""
+    return (phase or 'unknown').replace('-', '_')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(durations):
+    """count/total/p50/p95/max (seconds) for a list of durations."""
+    values = sorted(durations)
+    return {
+        'count': len(values),
+        'total': sum(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'max': values[-1] if values else None,
+    }
+
+
+class TimingAnalyzer:
+    """
+    Consume events in log order and rebuild spans.
+
+    Feed events with add(), then call report(). Memory is proportional to
+    the number of spans, not the number of events.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.skipped = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+        self.plan = None
+        self.iteration = None      # Current iteration record (None between iterations)
+        self.iterations = []
+        self.phase = None          # Current phase span (None outside phases)
+        self.phase_spans = []
+        self.agent_spans = []
+        self.open_agents = {}      # agent_id -> span still waiting for agent_complete
+        self.closed_agents = {}    # agent_id -> last closed span (later completions extend it)
+        self.left_open = []
+
+    # -- span bookkeeping ---------------------------------------------------
+
+    def _close_phase(self, at):
+        if self.phase is not None:
+            self.phase['end'] = at
+            self.phase = None
+
+    def _abandon_agents(self, at, reason):
+        """Agents still open at a boundary were left open; report and forget them."""
+        for span in self.open_agents.values():
+            self.left_open.append(dict(span, end=None, open_until=at, reason=reason))
+        self.open_agents = {}
+        self.closed_agents = {}
+
+    def _close_iteration(self, at, status):
+        self._close_phase(at)
+        self._abandon_agents(at, 'iteration ended')
+        if self.iteration is not None:
+            self.iteration['end'] = at
+            self.iteration['status'] = status
+            self.iteration = None
+
+    def add(self, event):
+        """Account for one event (events must arrive in log order)."""
+        self.events += 1
+        at = parse_timestamp(event.get('timestamp'))
+        if at is None:
+            self.skipped += 1
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp = at
+        self.last_timestamp = at
+
+        event_type = event.get('event_type')
+        agent_id = event.get('agent_id') or 'orchestrator'
+
+        if event_type in _PHASE_BOUNDARIES:
+            self._close_phase(at)
+
+        if event_type == 'plan_start':
+            if self.iteration is not None:
+                self._close_iteration(at, 'interrupted')
+            self._abandon_agents(at, 'plan restarted')
+            self.plan = event_log_lib.plan_from_event(event)
+
+        elif event_type == 'iteration_start':
+            if self.iteration is not None:
+                self._close_iteration(at, 'interrupted')
+            self.iteration = {
+                'plan': self.plan,
+                'iteration': event_log_lib.iteration_from_event(event),
+                'start': at,
+                'end': None,
+                'status': 'open',
+                'phases': [],
+            }
+            self.iterations.append(self.iteration)
+
+        elif event_type == 'iteration_complete':
+            self._close_iteration(at, 'complete')
+
+        elif event_type == 'phase_change':
+            self.phase = {
+                'plan': self.plan,
+                'iteration': self.iteration['iteration'] if self.iteration else None,
+                'phase': normalize_phase(event.get('phase')),
+                'start': at,
+                'end': None,
+                'agents': [],
+            }
+            self.phase_spans.append(self.phase)
+            if self.iteration is not None:
+                self.iteration['phases'].append(self.phase)
+
+        elif event_type in ('agent_spawn', 'agent_start'):
+            if agent_id in self.open_agents:
+                return  # agent_start after the orchestrator's agent_spawn
+            span = {
+                'agent_id': agent_id,
+                'type': agent_type(agent_id),
+                'plan': self.plan,
+                'iteration': self.iteration['iteration'] if self.iteration else None,
+                'phase': self.phase['phase'] if self.phase else normalize_phase(event.get('phase')),
+                'start': at,
+                'end': None,
+            }
+            self.open_agents[agent_id] = span
+            self.closed_agents.pop(agent_id, None)
+            if self.phase is not None:
+                self.phase['agents'].append(span)
+
+        elif event_type == 'agent_complete':
+            span = self.open_agents.pop(agent_id, None)
+            if span is not None:
+                span['end'] = at
+                self.agent_spans.append(span)
+                self.closed_agents[agent_id] = span
+            elif agent_id in self.closed_agents:
+                # Second completion (agent, then orchestrator): the span lasts until the last one
+                span = self.closed_agents[agent_id]
+                span['end'] = max(span['end'], at)
+
+    def finish(self):
+        """Close spans still open at the end of the log."""
+        if self.phase is not None:
+            self.phase['open'] = True
+            self._close_phase(self.last_timestamp)
+        if self.iteration is not None:
+            self.iteration['end'] = self.last_timestamp
+            self.iteration = None
+        for span in self.open_agents.values():
+            self.left_open.append(dict(span, end=None, open_until=self.last_timestamp, reason='log ended'))
+        self.open_agents = {}
+
+    # -- report ---------------------------------------------------------------
+
+    @staticmethod
+    def _duration(span):
+        if span.get('start') is None or span.get('end') is None:
+            return None
+        seconds = (span['end'] - span['start']).total_seconds()
+        return seconds if seconds >= 0 else None  # Out-of-order timestamps
+
+    def _critical_path(self, iteration):
+        path = []
+        for phase in iteration['phases']:
+            duration = self._duration(phase)
+            if duration is None:
+                continue
+            finished = [a for a in phase['agents'] if self._duration(a) is not None]
+            step = {'phase': phase['phase'], 'duration': duration, 'agent': None,
+                    'agent_duration': None, 'overhead': duration}
+            if finished:
+                last = max(finished, key=lambda a: a['end'])
+                agent_duration = self._duration(last)
+                step.update(agent=last['agent_id'], agent_duration=agent_duration,
+                            overhead=max(0.0, duration - agent_duration))
+            path.append(step)
+        return {
+            'total': sum(step['duration'] for step in path),
+            'agent_time': sum(step['agent_duration'] or 0 for step in path),
+            'steps': path,
+        }
+
+    @staticmethod
+    def _iso(value):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value else None
+
+    def _span_record(self, span, *fields):
+        record = {field: span.get(field) for field in fields}
+        record['start'] = self._iso(span.get('start'))
+        record['end'] = self._iso(span.get('end'))
+        record['duration'] = self._duration(span)
+        return record
+
+    def report(self, include_spans=False):
+        """
+        Timing report as a JSON-serializable dict.
+
+        Args:
+            include_spans: Also list every agent and phase span
+        """
+        self.finish()
+
+        by_type = {}
+        invalid = 0
+        for span in self.agent_spans:
+            duration = self._duration(span)
+            if duration is None:
+                invalid += 1
+                continue
+            by_type.setdefault(span['type'], []).append(duration)
+
+        by_phase = {}
+        for span in self.phase_spans:
+            duration = self._duration(span)
+            if duration is not None:
+                by_phase.setdefault(span['phase'], []).append(duration)
+
+        iterations = []
+        for iteration in self.iterations:
+            record = self._span_record(iteration, 'plan', 'iteration', 'status')
+            record['phases'] = [self._span_record(p, 'phase') for p in iteration['phases']]
+            record['critical_path'] = self._critical_path(iteration)
+            iterations.append(record)
+
+        open_agents = []
+        for span in self.left_open:
+            record = self._span_record(span, 'agent_id', 'type', 'plan', 'iteration', 'phase', 'reason')
+            record['open_until'] = self._iso(span['open_until'])
+            record['open_for'] = max(0.0, (span['open_until'] - span['start']).total_seconds())
+            del record['end'], record['duration']
+            open_agents.append(record)
+
+        report = {
+            'generated_at': self._iso(datetime.now(timezone.utc)),
+            'events': self.events,
+            'first_timestamp': self._iso(self.first_timestamp),
+            'last_timestamp': self._iso(self.last_timestamp),
+            'skipped_events': self.skipped,
+            'invalid_spans': invalid,
+            'agents': {name: summarize(values) for name, values in sorted(by_type.items())},
+            'phases': {name: summarize(values) for name, values in sorted(by_phase.items())},
+            'iterations': iterations,
+            'open_agents': open_agents,
+        }
+        if include_spans:
+            report['agent_spans'] = [
+                self._span_record(s, 'agent_id', 'type', 'plan', 'iteration', 'phase')
+                for s in self.agent_spans
+            ]
+            report['phase_spans'] = [
+                self._span_record(s, 'plan', 'iteration', 'phase') for s in self.phase_spans
+            ]
+        return report
+
+
+def iter_events_file(path):
+    """Events from a single JSONL file, skipping malformed lines."""
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def analyze(events, include_spans=False):
+    """
+    Timing report for an iterable of events (in log order).
+
+    Returns:
+        report: Dict (see TimingAnalyzer.report)
+    """
+    analyzer = TimingAnalyzer()
+    for event in events:
+        analyzer.add(event)
+    return analyzer.report(include_spans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Agent/phase timing analytics from 2L events')
+    parser.add_argument('--state-dir', default='.2L',
+                        help='2L state directory; all event segments are read (default: .2L)')
+    parser.add_argument('--events-file', help='Read a single events file instead of the segmented log')
+    parser.add_argument('--plan', help='Only this plan (e.g., plan-5)')
+    parser.add_argument('--since', help='Only events at or after this timestamp (ISO 8601)')
+    parser.add_argument('--spans', action='store_true', help='Include every agent and phase span')
+    parser.add_argument('--output', help='Write the report here instead of stdout')
+    args = parser.parse_args()
+
+    try:
+        if args.events_file:
+            events = iter_events_file(args.events_file)
+            if args.plan or args.since:
+                parser.error('--plan/--since need the segmented log (drop --events-file)')
+        else:
+            events = event_log_lib.EventLog(args.state_dir).read_events(plan=args.plan, since=args.since)
+
+        report = analyze(events, include_spans=args.spans)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+            print(f"Timing report written to {args.output}", file=sys.stderr)
+        else:
+            print(text)
+
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
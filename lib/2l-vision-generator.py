@@ -7,67 +7,305 @@ Usage:
                                    --template templates/improvement-vision.md \
                                    --output .2L/plan-6/vision.md \
                                    --plan-id plan-6
+
+    # Batch: one vision per detected pattern, plan IDs counting up from --plan-id
+    python3 2l-vision-generator.py --patterns-json patterns.json \
+                                   --template templates/improvement-vision.md \
+                                   --output-dir .2L \
+                                   --plan-id plan-6 --limit 5 --workers 4
 """
 
+import os
 import json
 import argparse
 import sys
 import re
+import importlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+yaml_io = importlib.import_module('2l-yaml-io')
+instrument = importlib.import_module('2l-instrument')
+
+DEFAULT_COMPONENT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2l-component-rules.yaml')
+PLACEHOLDER_PATTERN = re.compile(r'\{[A-Z_]+\}')
+
+
+def _trie_pattern(keywords):
+    """
+    Regex matching any keyword, with alternatives factored by common prefix.
+
+    At each position the longest keyword starting there wins.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of keyword
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy optional tail: prefer the longer keyword when both match
+        return f"(?:{body})?" if '' in node else body
 
-def infer_affected_components(root_cause):
+    return build(trie)
+
+
+class ComponentMatcher:
+    """
+    Keyword -> component rules compiled into one multi-pattern matcher.
+
+    All keywords go into a single regex, an alternation factored by common
+    prefix (a trie), so one scan of the lowercased root cause costs about
+    the same however many keywords there are. A rule fires when any of its
+    keywords is a substring of the root cause, exactly like a chain of `in`
+    checks: keywords hidden inside a longer match are implied by it, and
+    the few that can straddle the end of a match are checked directly.
+
+    Counters record how often each rule fired (and how often none did).
+    """
+
+    def __init__(self, rules, fallback):
+        """
+        Args:
+            rules: List of {'name', 'keywords', 'component'} dicts, in output order
+            fallback: Component used when no rule fires
+
+        Raises:
+            ValueError: If a rule is malformed
+        """
+        self.rules = []
+        for rule in rules:
+            keywords = [str(k).lower() for k in rule.get('keywords') or []]
+            if not keywords or not all(keywords) or not rule.get('component'):
+                raise ValueError(f"Component rule needs non-empty keywords and a component: {rule}")
+            self.rules.append({'name': rule.get('name') or rule['component'],
+                               'keywords': keywords, 'component': rule['component']})
+        self.fallback = fallback
+
+        # A matched keyword also implies every keyword it contains: at one
+        # position the regex reports only the longest alternative
+        owners = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule['keywords']:
+                owners.setdefault(keyword, set()).add(index)
+        self.implied = {
+            keyword: frozenset(i for other, rule_ids in owners.items() if other in keyword for i in rule_ids)
+            for keyword in owners
+        }
+        # Keywords that can start inside a match of this one and run past
+        # its end (suffix of one == prefix of other): the scan skips those
+        prefixes = {}
+        for keyword in owners:
+            for i in range(1, len(keyword)):
+                prefixes.setdefault(keyword[:i], set()).add(keyword)
+        self.straddling = {
+            keyword: frozenset(
+                other for i in range(1, len(keyword)) for other in prefixes.get(keyword[i:], ())
+                if other not in keyword
+            )
+            for keyword in owners
+        }
+
+        self.pattern = re.compile(_trie_pattern(owners))
+
+        self.hits = {rule['name']: 0 for rule in self.rules}
+        self.classified = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_file(cls, rules_path):
+        """
+        Load rules from a YAML file (see 2l-component-rules.yaml).
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file or a rule is malformed
+        """
+        data = yaml_io.load_yaml(rules_path)
+        if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+            raise ValueError(f"Component rules file has no 'rules' list: {rules_path}")
+        return cls(data['rules'], data.get('fallback', 'TBD - Requires manual analysis of root cause during planning'))
+
+    def classify(self, root_cause):
+        """
+        Components to modify for one root cause.
+
+        Args:
+            root_cause: Root cause string from pattern
+
+        Returns:
+            components: List of component descriptions, in rule order
+        """
+        text = root_cause.lower()
+        found = set(self.pattern.findall(text))
+
+        self.classified += 1
+        if not found:
+            self.fallbacks += 1
+            return [self.fallback]
+
+        fired = set()
+        for keyword in found:
+            fired |= self.implied[keyword]
+            for other in self.straddling[keyword]:
+                if other not in found and other in text:
+                    fired |= self.implied[other]
+
+        components = []
+        for index in sorted(fired):
+            rule = self.rules[index]
+            self.hits[rule['name']] += 1
+            components.append(rule['component'])
+        return components
+
+    def classify_many(self, root_causes):
+        """Classify a batch of root causes (one scan per string)."""
+        return [self.classify(root_cause) for root_cause in root_causes]
+
+    def stats(self):
+        """Rule-hit counters: per-rule hits, total classified, fallbacks."""
+        return {'classified': self.classified, 'fallbacks': self.fallbacks, 'rule_hits': dict(self.hits)}
+
+
+_default_matcher = None
+
+
+def get_component_matcher(rules_path=None):
+    """
+    Compiled matcher for a rules file (default: 2l-component-rules.yaml next
+    to this script). The default matcher is compiled once per process.
+    """
+    global _default_matcher
+    if rules_path is not None:
+        return ComponentMatcher.from_file(rules_path)
+    if _default_matcher is None:
+        _default_matcher = ComponentMatcher.from_file(DEFAULT_COMPONENT_RULES)
+    return _default_matcher
+
+
+def infer_affected_components(root_cause, matcher=None):
     """
     Infer which agents/commands to modify based on root cause keywords.
 
     Args:
         root_cause: Root cause string from pattern
+        matcher: Optional ComponentMatcher (default: rules from 2l-component-rules.yaml)
 
     Returns:
         components: List of component descriptions
     """
-    components = []
-    root_lower = root_cause.lower()
-
-    # Pattern matching on root cause keywords
-    if 'tsconfig' in root_lower or 'path' in root_lower or 'import' in root_lower:
-        components.append('agents/2l-planner.md - Add tsconfig validation step before builders start')
+    return (matcher or get_component_matcher()).classify(root_cause)
 
-    if 'duplicate' in root_lower:
-        components.append('agents/2l-iplanner.md - Add duplicate file detection across zones')
 
-    if 'integration' in root_lower or 'conflict' in root_lower:
-        components.append('agents/2l-integrator.md - Enhanced conflict detection')
+def _can_join(char, brace):
+    return char == brace or char == '_' or 'A' <= char <= 'Z'
 
-    if 'validation' in root_lower or 'test' in root_lower:
-        components.append('agents/2l-validator.md - Improve validation checks')
 
-    if 'builder' in root_lower:
-        components.append('agents/2l-builder.md - Add safety checks')
-
-    # Default fallback
-    if not components:
-        components.append('TBD - Requires manual analysis of root cause during planning')
+class VisionTemplate:
+    """
+    Vision template compiled into a single-pass substitution plan.
 
-    return components
+    The template is split once into literal text and placeholder slots, so
+    rendering is one join instead of a str.replace pass per placeholder.
+    Placeholders with no replacement are recorded at compile time.
 
+    Rendering matches the sequential str.replace path byte for byte. That
+    path can re-substitute inside inserted values (a value containing
+    "{PLAN_ID}", or braces that join with the template into a new
+    placeholder), so values with braces fall back to it.
+    """
 
-def generate_improvement_vision(pattern, plan_id, template_path):
+    def __init__(self, template, placeholders):
+        """
+        Args:
+            template: Template text
+            placeholders: Placeholder names in substitution order (e.g. "{PLAN_ID}")
+        """
+        self.template = template
+        self.placeholders = list(placeholders)
+        known = set(self.placeholders)
+
+        # Alternate literal / placeholder pieces: even indexes are literals
+        self.pieces = []
+        self.unreplaced = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(template):
+            if match.group() in known:
+                self.pieces.append(template[position:match.start()])
+                self.pieces.append(match.group())
+                position = match.end()
+            else:
+                self.unreplaced.append(match.group())
+        self.pieces.append(template[position:])
+
+        # A value of [A-Z_] characters in a slot touching "{", "}" or [A-Z_]
+        # could form a new placeholder-like token; rescan the output then
+        self.rescan = any(
+            _can_join(self.pieces[i - 1][-1:], '{') or _can_join(self.pieces[i + 1][:1], '}')
+            for i in range(1, len(self.pieces), 2)
+        )
+
+    @classmethod
+    def from_file(cls, template_path, placeholders):
+        with instrument.span('load'), open(template_path, 'r') as f:
+            return cls(f.read(), placeholders)
+
+    def render(self, replacements):
+        """
+        Fill the template.
+
+        Args:
+            replacements: Dict of placeholder -> value (str)
+
+        Returns:
+            (content, unreplaced): Rendered text and the list of placeholders
+            left in it (same as re.findall over the output)
+        """
+        if any('{' in value or '}' in value for value in replacements.values()):
+            content = self.template
+            for placeholder, value in replacements.items():
+                content = content.replace(placeholder, value)
+            return content, PLACEHOLDER_PATTERN.findall(content)
+
+        pieces = self.pieces[:]
+        for i in range(1, len(pieces), 2):
+            pieces[i] = replacements[pieces[i]]
+        content = ''.join(pieces)
+
+        if self.rescan:
+            return content, PLACEHOLDER_PATTERN.findall(content)
+        return content, list(self.unreplaced)
+
+
+# Placeholders filled by build_replacements, in substitution order
+VISION_PLACEHOLDERS = (
+    '{PATTERN_NAME}', '{ISO_TIMESTAMP}', '{PLAN_ID}', '{PATTERN_ID}', '{OCCURRENCES}',
+    '{PROJECT_COUNT}', '{PATTERN_ISSUE_DESCRIPTION}', '{PROJECT_LIST}', '{DISCOVERED_IN}',
+    '{SEVERITY}', '{RECURRENCE_RISK}', '{PATTERN_ROOT_CAUSE}', '{SOURCE_LEARNINGS_LIST}',
+    '{AVG_HEALING_ROUNDS}', '{AVG_FILES_MODIFIED}', '{AVG_DURATION_SECONDS}',
+    '{PATTERN_PROPOSED_SOLUTION}', '{SPECIFIC_IMPLEMENTATION}', '{DISCOVERED_AT}',
+    '{SOURCE_LEARNING_IDS}', '{AFFECTED_COMPONENTS_LIST}', '{INFERRED_COMPONENTS_TO_MODIFY}',
+    '{AFFECTED_FILES_FROM_PATTERN}', '{OCCURRENCE_DETAILS}',
+)
+
+
+def build_replacements(pattern, plan_id, affected_components=None):
     """
-    Generate vision.md from pattern using template.
+    Placeholder values for one pattern.
 
     Args:
         pattern: Pattern dict from global-learnings.yaml
         plan_id: Plan ID for this improvement (e.g., "plan-6")
-        template_path: Path to vision template
+        affected_components: Pre-classified components (default: infer from root cause)
 
     Returns:
-        vision_content: Generated vision markdown
+        replacements: Dict of placeholder -> value, in VISION_PLACEHOLDERS order
     """
-    # Read template
-    with open(template_path, 'r') as f:
-        template = f.read()
-
     # Extract iteration metadata for averages
     iteration_metadata = pattern.get('iteration_metadata', {})
     avg_healing_rounds = iteration_metadata.get('healing_rounds', 0)
@@ -102,7 +340,8 @@ def generate_improvement_vision(pattern, plan_id, template_path):
     }
 
     # Infer affected components
-    affected_components = infer_affected_components(pattern['root_cause'])
+    if affected_components is None:
+        affected_components = infer_affected_components(pattern['root_cause'])
     replacements['{AFFECTED_COMPONENTS_LIST}'] = '\n'.join(f"- {comp}" for comp in affected_components)
     replacements['{INFERRED_COMPONENTS_TO_MODIFY}'] = '\n'.join(f"- {comp}" for comp in affected_components)
 
@@ -117,44 +356,177 @@ def generate_improvement_vision(pattern, plan_id, template_path):
     )
     replacements['{OCCURRENCE_DETAILS}'] = occurrence_details
 
-    # Apply all replacements
-    vision_content = template
-    for placeholder, value in replacements.items():
-        vision_content = vision_content.replace(placeholder, value)
+    return replacements
+
 
-    # Quality validation: check for unreplaced placeholders
-    if '{' in vision_content and '}' in vision_content:
-        # Find unreplaced placeholders
-        unreplaced = re.findall(r'\{[A-Z_]+\}', vision_content)
-        if unreplaced:
-            print(f"WARNING: Unreplaced placeholders detected: {unreplaced}", file=sys.stderr)
+def generate_improvement_vision(pattern, plan_id, template_path, template=None, affected_components=None):
+    """
+    Generate vision.md from pattern using template.
+
+    Args:
+        pattern: Pattern dict from global-learnings.yaml
+        plan_id: Plan ID for this improvement (e.g., "plan-6")
+        template_path: Path to vision template
+        template: Optional pre-compiled VisionTemplate (skips reading template_path)
+        affected_components: Pre-classified components (default: infer from root cause)
+
+    Returns:
+        vision_content: Generated vision markdown
+    """
+    if template is None:
+        template = VisionTemplate.from_file(template_path, VISION_PLACEHOLDERS)
+
+    vision_content, unreplaced = template.render(build_replacements(pattern, plan_id, affected_components))
+
+    # Quality validation: unreplaced placeholders
+    if unreplaced:
+        print(f"WARNING: Unreplaced placeholders detected: {unreplaced}", file=sys.stderr)
 
     return vision_content
 
 
+def parse_plan_number(plan_id):
+    """Extract N from "plan-N" (raises ValueError otherwise)."""
+    match = re.fullmatch(r'plan-(\d+)', plan_id)
+    if not match:
+        raise ValueError(f"Invalid plan ID: {plan_id} (expected plan-N)")
+    return int(match.group(1))
+
+
+_worker_template = None
+
+
+def _init_worker(template):
+    global _worker_template
+    _worker_template = template
+
+
+def _write_vision(job):
+    """Render and write one vision (runs in the parent or a pool worker)."""
+    pattern, plan_id, output_path, affected_components = job
+    with instrument.span('render'):
+        vision_content = generate_improvement_vision(pattern, plan_id, None, template=_worker_template,
+                                                     affected_components=affected_components)
+    with instrument.span('write'):
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w') as f:
+            f.write(vision_content)
+    return output_path
+
+
+def generate_visions_batch(patterns, start_plan_id, template_path, output_dir, workers=1, matcher=None):
+    """
+    Generate one vision per pattern from a single compiled template.
+
+    Patterns get consecutive plan IDs starting at start_plan_id, and each
+    vision is written to <output_dir>/<plan-id>/vision.md.
+
+    Args:
+        patterns: List of pattern dicts (e.g., patterns.json "patterns")
+        start_plan_id: Plan ID for the first pattern (e.g., "plan-6")
+        template_path: Path to vision template
+        output_dir: Directory holding the plan directories (e.g., ".2L")
+        workers: Processes used to render and write (1 = in this process)
+        matcher: ComponentMatcher (default: rules from 2l-component-rules.yaml)
+
+    Returns:
+        results: List of (pattern_id, plan_id, output_path), in input order
+    """
+    global _worker_template
+
+    first = parse_plan_number(start_plan_id)
+    template = VisionTemplate.from_file(template_path, VISION_PLACEHOLDERS)
+
+    # Classify all root causes here so rule-hit counters cover every pattern
+    matcher = matcher or get_component_matcher()
+    with instrument.span('classify'):
+        all_components = matcher.classify_many(pattern['root_cause'] for pattern in patterns)
+
+    jobs = []
+    for offset, (pattern, components) in enumerate(zip(patterns, all_components)):
+        plan_id = f"plan-{first + offset}"
+        jobs.append((pattern, plan_id, os.path.join(output_dir, plan_id, 'vision.md'), components))
+
+    if workers > 1 and len(jobs) > 1:
+        # Workers do not report spans: the pool's wall time counts as render
+        with instrument.span('render'), ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                            initargs=(template,)) as pool:
+            paths = list(pool.map(_write_vision, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        _worker_template = template
+        paths = [_write_vision(job) for job in jobs]
+
+    return [(job[0]['pattern_id'], job[1], path) for job, path in zip(jobs, paths)]
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate improvement vision from pattern')
-    parser.add_argument('--pattern-json', required=True, help='Path to pattern JSON file')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--pattern-json', help='Path to pattern JSON file')
+    source.add_argument('--patterns-json', help='Batch: pattern detector output (patterns.json)')
     parser.add_argument('--template', required=True, help='Path to vision template')
-    parser.add_argument('--output', required=True, help='Output path for generated vision')
-    parser.add_argument('--plan-id', required=True, help='Plan ID (e.g., plan-6)')
+    parser.add_argument('--output', help='Output path for generated vision')
+    parser.add_argument('--output-dir', default='.2L',
+                        help='Batch: directory for <plan-id>/vision.md (default: .2L)')
+    parser.add_argument('--plan-id', required=True, help='Plan ID (e.g., plan-6; first plan ID in batch mode)')
+    parser.add_argument('--limit', type=int, help='Batch: only the first N patterns')
+    parser.add_argument('--workers', type=int, default=1, help='Batch: worker processes (default: 1)')
+    parser.add_argument('--component-rules', help='Component rules YAML (default: 2l-component-rules.yaml)')
+    parser.add_argument('--rule-stats', action='store_true', help='Print rule-hit counters (JSON) to stderr')
+    instrument.add_arguments(parser)
 
     args = parser.parse_args()
+    instrument.configure('2l-vision-generator', args)
+
+    try:
+        matcher = get_component_matcher(args.component_rules)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not load component rules: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.patterns_json:
+        with instrument.span('load'), open(args.patterns_json, 'r') as f:
+            patterns = json.load(f).get('patterns', [])
+        if args.limit is not None:
+            patterns = patterns[:args.limit]
+
+        try:
+            results = generate_visions_batch(patterns, args.plan_id, args.template,
+                                             args.output_dir, workers=args.workers, matcher=matcher)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        for pattern_id, plan_id, output_path in results:
+            print(f"Vision generated: {output_path} ({pattern_id})")
+        print(f"   {len(results)} vision(s) from {args.patterns_json}")
+        if args.rule_stats:
+            print(json.dumps(matcher.stats()), file=sys.stderr)
+        return
+
+    if not args.output:
+        parser.error('--output is required with --pattern-json')
 
     # Load pattern
-    with open(args.pattern_json, 'r') as f:
+    with instrument.span('load'), open(args.pattern_json, 'r') as f:
         pattern = json.load(f)
 
     # Generate vision
-    vision_content = generate_improvement_vision(pattern, args.plan_id, args.template)
+    with instrument.span('classify'):
+        affected_components = matcher.classify(pattern['root_cause'])
+    with instrument.span('render'):
+        vision_content = generate_improvement_vision(pattern, args.plan_id, args.template,
+                                                     affected_components=affected_components)
 
     # Write vision
-    with open(args.output, 'w') as f:
+    with instrument.span('write'), open(args.output, 'w') as f:
         f.write(vision_content)
 
     print(f"Vision generated: {args.output}")
     print(f"   Pattern: {pattern['pattern_id']} - {pattern['name']}")
     print(f"   Severity: {pattern['severity']} | Occurrences: {pattern['occurrences']}")
+    if args.rule_stats:
+        print(json.dumps(matcher.stats()), file=sys.stderr)
 
 
 if __name__ == '__main__':
@@ -5,21 +5,37 @@
 This library provides utilities for safely manipulating YAML files used in
 the 2L learning capture system, with emphasis on atomic writes to prevent
 corruption of global state.
+
+A --global-learnings path ending in .db (or .sqlite/.sqlite3) selects the
+SQLite backend (see 2l-learnings-db.py) for merges and status updates.
 """
 
 import os
 import sys
-import tempfile
-import shutil
-import yaml
+import re
+import glob
+import json
+import time
 import argparse
+import importlib
 from datetime import datetime
 
+yaml_io = importlib.import_module('2l-yaml-io')
+journal_lib = importlib.import_module('2l-journal')
+instrument = importlib.import_module('2l-instrument')
+learnings_db = importlib.import_module('2l-learnings-db')
+backup_lib = importlib.import_module('2l-backup')
+
+SIMILARITY_MODES = ('exact', 'minhash')
+
+# Top-level fields carried by journal 'meta' records
+META_FIELDS = ('aggregated_at', 'total_projects', 'total_learnings')
+
 
 def atomic_write_yaml(file_path, data):
     """
     Write YAML data atomically to prevent corruption.
-    Uses temp file + rename for atomic operation.
+    Uses temp file + rename for atomic operation (see 2l-yaml-io.py).
 
     Args:
         file_path: Target YAML file path
@@ -28,44 +44,43 @@ def atomic_write_yaml(file_path, data):
     Raises:
         Exception: If write fails (temp file cleaned up automatically)
     """
-    # Create temp file in same directory (ensures same filesystem)
-    dir_path = os.path.dirname(file_path) or '.'
-    temp_fd, temp_path = tempfile.mkstemp(
-        dir=dir_path,
-        prefix='.tmp_',
-        suffix='.yaml'
-    )
+    yaml_io.atomic_write_yaml(file_path, data)
 
-    try:
-        # Write YAML to temp file
-        with os.fdopen(temp_fd, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False, sort_keys=False)
 
-        # Atomic rename (replaces existing file)
-        shutil.move(temp_path, file_path)
+def backup_before_write(file_path):
+    """
+    Keep the file's current content as a backup generation before modifying.
+
+    Generations are hard links in <file>.backups/ (see 2l-backup.py), valid
+    because every write replaces the file via temp + rename. Writers here
+    pass backup=True to atomic_write_yaml instead, which links at rename
+    time and so skips writes that fail.
+
+    Args:
+        file_path: File to backup
 
-    except Exception as e:
-        # Clean up temp file on error
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise e
+    Returns:
+        backup_path: Path to the new generation, or None if file doesn't
+        exist (or is unchanged since the newest generation)
+    """
+    with instrument.span('backup'):
+        return backup_lib.snapshot(file_path)
 
 
-def backup_before_write(file_path):
+def parse_pattern_number(pattern_id):
     """
-    Create .bak backup of file before modifying.
+    Extract the numeric part of a PATTERN-NNN identifier.
 
     Args:
-        file_path: File to backup
+        pattern_id: Pattern identifier (e.g., "PATTERN-007")
 
     Returns:
-        backup_path: Path to backup file, or None if file doesn't exist
+        number: Integer ID, or None if the identifier is malformed
     """
-    if os.path.exists(file_path):
-        backup_path = file_path + '.bak'
-        shutil.copy2(file_path, backup_path)
-        return backup_path
-    return None
+    try:
+        return int(pattern_id.split('-')[1])
+    except (IndexError, ValueError):
+        return None
 
 
 def generate_pattern_id(existing_patterns):
@@ -81,13 +96,9 @@ def generate_pattern_id(existing_patterns):
     # Find highest existing ID
     max_id = 0
     for pattern in existing_patterns:
-        pattern_id = pattern.get('pattern_id', 'PATTERN-000')
-        # Extract number from PATTERN-NNN
-        try:
-            num = int(pattern_id.split('-')[1])
+        num = parse_pattern_number(pattern.get('pattern_id', 'PATTERN-000'))
+        if num is not None:
             max_id = max(max_id, num)
-        except (IndexError, ValueError):
-            continue
 
     # Next ID
     next_id = max_id + 1
@@ -114,47 +125,115 @@ def find_similar_pattern(existing_patterns, new_pattern):
     return None
 
 
-def merge_learnings(iteration_learnings_path, global_learnings_path,
-                   discovered_in, duration_seconds, healing_rounds, files_modified):
+class PatternIndex:
     """
-    Merge iteration learnings into global learnings file.
+    Lookup structures for merging, built in a single pass over patterns.
+
+    Maps (root_cause, severity) to the first pattern with that key (the scan
+    order of find_similar_pattern), tracks the highest PATTERN-NNN number
+    and the set of projects seen, and is kept current as patterns are added
+    so many iterations can be merged against one index.
+    """
+
+    def __init__(self, existing_patterns):
+        self.by_key = {}
+        self.max_id = 0
+        self.projects = set()
+        for pattern in existing_patterns:
+            self.by_key.setdefault((pattern['root_cause'], pattern['severity']), pattern)
+            num = parse_pattern_number(pattern.get('pattern_id', 'PATTERN-000'))
+            if num is not None:
+                self.max_id = max(self.max_id, num)
+            self.projects.update(pattern.get('projects', []))
+
+    def next_pattern_id(self):
+        """ID the next added pattern will get (e.g., "PATTERN-042")."""
+        return f"PATTERN-{self.max_id + 1:03d}"
+
+    def find(self, pattern):
+        """Existing pattern with the same (root_cause, severity), or None."""
+        return self.by_key.get((pattern['root_cause'], pattern['severity']))
+
+    def add(self, pattern):
+        """Register a pattern just appended with next_pattern_id()."""
+        self.by_key[(pattern['root_cause'], pattern['severity'])] = pattern
+        self.max_id += 1
+        self.projects.update(pattern.get('projects', []))
+
+
+class DatabasePatternIndex(PatternIndex):
+    """
+    PatternIndex over a learnings database (see 2l-learnings-db.py).
+
+    Matches are looked up with an indexed query when first needed instead
+    of indexing every pattern up front. Looked-up patterns are kept, so
+    repeated matches within one merge update the same dict.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.by_key = {}
+        self.max_id = db.max_pattern_number()
+        self.projects = db.projects()
+
+    def find(self, pattern):
+        key = (pattern['root_cause'], pattern['severity'])
+        if key not in self.by_key:
+            self.by_key[key] = self.db.find_pattern(*key)
+        return self.by_key[key]
+
+
+def new_global_learnings():
+    """
+    Create an empty global learnings document.
+
+    Returns:
+        global_data: Dict with schema metadata and no patterns
+    """
+    return {
+        'schema_version': '1.0',
+        'aggregated_at': datetime.now().isoformat(),
+        'total_projects': 0,
+        'total_learnings': 0,
+        'patterns': []
+    }
+
+
+def merge_learnings_data(global_data, iteration_data, discovered_in,
+                         duration_seconds, healing_rounds, files_modified,
+                         similarity_index=None, changed_patterns=None,
+                         pattern_index=None):
+    """
+    Merge parsed iteration learnings into parsed global learnings in place.
+
+    Runs in O(patterns + learnings): the similarity index and the highest
+    pattern ID are computed once, then maintained as patterns are added.
 
     Args:
-        iteration_learnings_path: Path to iteration learnings.yaml
-        global_learnings_path: Path to global-learnings.yaml
+        global_data: Parsed global-learnings.yaml dict (modified in place)
+        iteration_data: Parsed iteration learnings.yaml dict
         discovered_in: Iteration identifier (e.g., "plan-3-iter-2")
         duration_seconds: Iteration duration
         healing_rounds: Number of healing rounds
         files_modified: Number of files modified
-    """
-    # Read iteration learnings
-    with open(iteration_learnings_path, 'r') as f:
-        iteration_data = yaml.safe_load(f)
-
-    # Read or initialize global learnings
-    if os.path.exists(global_learnings_path):
-        # Backup before modification
-        backup_before_write(global_learnings_path)
-
-        with open(global_learnings_path, 'r') as f:
-            global_data = yaml.safe_load(f)
-    else:
-        # Initialize new global learnings file
-        global_data = {
-            'schema_version': '1.0',
-            'aggregated_at': datetime.now().isoformat(),
-            'total_projects': 0,
-            'total_learnings': 0,
-            'patterns': []
-        }
+        similarity_index: Optional near-duplicate index (2l-similarity.py),
+            consulted when no exact (root_cause, severity) match exists
+        changed_patterns: Optional list; every new or merged-into pattern
+            is appended to it (may repeat), e.g. for journaling
+        pattern_index: Optional PatternIndex over global_data['patterns'],
+            reused across calls when merging many iterations
 
-    # Merge iteration learnings
+    Returns:
+        global_data: The same dict, for convenience
+    """
+    if pattern_index is None:
+        pattern_index = PatternIndex(global_data['patterns'])
     project_name = iteration_data.get('project', 'unknown')
 
     for learning in iteration_data.get('learnings', []):
         # Convert to global pattern format
         pattern = {
-            'pattern_id': generate_pattern_id(global_data['patterns']),
+            'pattern_id': pattern_index.next_pattern_id(),
             'name': learning['issue'][:60],  # Truncate for readability
             'occurrences': 1,
             'projects': [project_name],
@@ -173,35 +252,358 @@ def merge_learnings(iteration_learnings_path, global_learnings_path,
         }
 
         # Check for similar patterns (basic similarity)
-        existing = find_similar_pattern(global_data['patterns'], pattern)
+        existing = pattern_index.find(pattern)
+        if existing is None and similarity_index is not None:
+            existing = similarity_index.find(pattern)
 
         if existing:
             # Merge into existing pattern
             existing['occurrences'] += 1
             if project_name not in existing['projects']:
                 existing['projects'].append(project_name)
+                pattern_index.projects.add(project_name)
             existing['source_learnings'].append(learning['id'])
+            changed = existing
         else:
             # Add new pattern
             global_data['patterns'].append(pattern)
             global_data['total_learnings'] += 1
+            pattern_index.add(pattern)
+            if similarity_index is not None:
+                similarity_index.add(pattern)
+            changed = pattern
+
+        if changed_patterns is not None:
+            changed_patterns.append(changed)
 
     # Update metadata
     global_data['aggregated_at'] = datetime.now().isoformat()
 
     # Track unique projects
-    all_projects = set()
-    for pattern in global_data['patterns']:
-        all_projects.update(pattern.get('projects', []))
-    global_data['total_projects'] = len(all_projects)
+    global_data['total_projects'] = len(pattern_index.projects)
+
+    return global_data
 
-    # Atomic write
-    atomic_write_yaml(global_learnings_path, global_data)
+
+def journal_changes(global_learnings_path, global_data, changed_patterns):
+    """
+    Append changed patterns and metadata to the journal as one transaction.
+
+    Args:
+        global_learnings_path: Path to global-learnings.yaml
+        global_data: Global learnings dict after the change
+        changed_patterns: Pattern dicts that were added or modified
+    """
+    records = []
+    seen = set()
+    for pattern in changed_patterns:
+        if pattern['pattern_id'] not in seen:
+            seen.add(pattern['pattern_id'])
+            records.append({'op': 'put', 'pattern': pattern})
+    records.append({
+        'op': 'meta',
+        'fields': {k: global_data[k] for k in META_FIELDS if k in global_data}
+    })
+    journal_lib.append_transaction(global_learnings_path, records)
+    journal_lib.compact(global_learnings_path)
+
+
+def merge_iterations(global_learnings_path, iterations, similarity='exact',
+                     similarity_threshold=None, journal=False):
+    """
+    Merge parsed iterations into global learnings in one load/merge/write cycle.
+
+    The caller must hold yaml_io.locked(global_learnings_path).
+
+    Args:
+        global_learnings_path: Path to global-learnings.yaml
+        iterations: List of (iteration_data, discovered_in, duration_seconds,
+            healing_rounds, files_modified) tuples, merged in order
+        similarity: 'exact' (root_cause string match) or 'minhash'
+            (near-duplicate root causes via MinHash/LSH)
+        similarity_threshold: Jaccard threshold for 'minhash' mode
+        journal: Append changes to the journal instead of rewriting the
+            file (see 2l-journal.py); the first write still creates it.
+            Not used for SQLite stores (see 2l-learnings-db.py)
+
+    Returns:
+        learnings_merged: Total number of learnings merged
+    """
+    if similarity not in SIMILARITY_MODES:
+        raise ValueError(f"Unknown similarity mode: {similarity}")
+    if learnings_db.is_database(global_learnings_path):
+        return _merge_iterations_database(global_learnings_path, iterations, similarity, similarity_threshold)
+
+    # Read or initialize global learnings
+    snapshot_exists = os.path.exists(global_learnings_path)
+    if snapshot_exists:
+        global_data = journal_lib.load_learnings(global_learnings_path)
+    else:
+        # Initialize new global learnings file
+        global_data = new_global_learnings()
+
+    # Near-duplicate index (persisted next to the learnings file)
+    similarity_index = None
+    if similarity == 'minhash':
+        similarity_lib = importlib.import_module('2l-similarity')
+        threshold = similarity_threshold or similarity_lib.DEFAULT_THRESHOLD
+        similarity_index = similarity_lib.open_index(
+            global_learnings_path, global_data['patterns'], threshold)
+
+    # Merge iteration learnings against one shared index
+    pattern_index = PatternIndex(global_data['patterns'])
+    changed_patterns, learnings_merged = _merge_all(global_data, iterations, similarity_index, pattern_index)
+
+    if journal and snapshot_exists:
+        journal_changes(global_learnings_path, global_data, changed_patterns)
+    else:
+        # Atomic write (retires any pending journal); the replaced file
+        # becomes a backup generation (the journal itself is the change log)
+        journal_lib.write_snapshot(global_learnings_path, global_data, backup=True)
+
+    if similarity_index is not None and similarity_index.dirty:
+        similarity_index.save(similarity_lib.index_path_for(global_learnings_path))
+
+    return learnings_merged
+
+
+def _merge_all(global_data, iterations, similarity_index, pattern_index):
+    """
+    Merge iterations in order against one index.
+
+    Returns:
+        (changed_patterns, learnings_merged): Patterns added or merged into
+        (may repeat), and the number of learnings merged
+    """
+    changed_patterns = []
+    learnings_merged = 0
+    with instrument.span('merge'):
+        for iteration_data, discovered_in, duration_seconds, healing_rounds, files_modified in iterations:
+            merge_learnings_data(global_data, iteration_data, discovered_in,
+                                 duration_seconds, healing_rounds, files_modified,
+                                 similarity_index, changed_patterns, pattern_index)
+            learnings_merged += len(iteration_data.get('learnings', []))
+    return changed_patterns, learnings_merged
+
+
+def _merge_iterations_database(global_learnings_path, iterations, similarity, similarity_threshold):
+    """
+    merge_iterations for a SQLite store: only the patterns a merge touches
+    are read and written, in one transaction.
+    """
+    similarity_index = None
+    with learnings_db.open_database(global_learnings_path) as db, db.transaction():
+        meta = db.get_meta()
+        global_data = dict(meta, patterns=[]) if meta else new_global_learnings()
+
+        if similarity == 'minhash':
+            # Any pattern can be an LSH candidate: load them all, as the YAML backend does
+            global_data['patterns'] = list(db.iter_patterns())
+            similarity_lib = importlib.import_module('2l-similarity')
+            threshold = similarity_threshold or similarity_lib.DEFAULT_THRESHOLD
+            similarity_index = similarity_lib.open_index(
+                global_learnings_path, global_data['patterns'], threshold)
+            pattern_index = PatternIndex(global_data['patterns'])
+        else:
+            pattern_index = DatabasePatternIndex(db)
+
+        changed_patterns, learnings_merged = _merge_all(global_data, iterations, similarity_index, pattern_index)
+
+        with instrument.span('write'):
+            db.put_patterns({p['pattern_id']: p for p in changed_patterns}.values())
+            db.set_meta(global_data)
+
+    if similarity_index is not None and similarity_index.dirty:
+        similarity_index.save(similarity_lib.index_path_for(global_learnings_path))
+
+    return learnings_merged
+
+
+def merge_learnings(iteration_learnings_path, global_learnings_path,
+                   discovered_in, duration_seconds, healing_rounds, files_modified,
+                   similarity='exact', similarity_threshold=None, journal=False):
+    """
+    Merge iteration learnings into global learnings file.
+
+    Args:
+        iteration_learnings_path: Path to iteration learnings.yaml
+        global_learnings_path: Path to global-learnings.yaml
+        discovered_in: Iteration identifier (e.g., "plan-3-iter-2")
+        duration_seconds: Iteration duration
+        healing_rounds: Number of healing rounds
+        files_modified: Number of files modified
+        similarity: 'exact' (root_cause string match) or 'minhash'
+            (near-duplicate root causes via MinHash/LSH)
+        similarity_threshold: Jaccard threshold for 'minhash' mode
+        journal: Append changes to the journal instead of rewriting the
+            file (see 2l-journal.py); the first write still creates it
+    """
+    # Read iteration learnings
+    iteration_data = yaml_io.load_yaml(iteration_learnings_path, use_cache=False)
+
+    with yaml_io.locked(global_learnings_path):
+        merge_iterations(
+            global_learnings_path,
+            [(iteration_data, discovered_in, duration_seconds, healing_rounds, files_modified)],
+            similarity, similarity_threshold, journal)
 
     print(f"Merged {len(iteration_data.get('learnings', []))} learnings into global knowledge base")
 
 
-def update_pattern_status(pattern_id, new_status, metadata=None, global_learnings_path='.2L/global-learnings.yaml'):
+def natural_sort_key(path):
+    """Sort key that orders iteration-2 before iteration-10."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)]
+
+
+def expand_learnings_paths(paths_or_globs):
+    """
+    Expand learnings file arguments (paths or glob patterns).
+
+    Args:
+        paths_or_globs: List of paths and/or glob patterns
+            (e.g., ".2L/plan-*/iteration-*/learnings.yaml")
+
+    Returns:
+        paths: De-duplicated paths in natural (plan/iteration) order
+    """
+    paths = set()
+    for item in paths_or_globs:
+        matches = glob.glob(item) if glob.has_magic(item) else [item]
+        paths.update(matches)
+    return sorted(paths, key=natural_sort_key)
+
+
+def infer_iteration_metadata(learnings_path, iteration_data):
+    """
+    Derive merge metadata for an iteration from its learnings file and directory.
+
+    Args:
+        learnings_path: Path to .2L/plan-N/iteration-M/learnings.yaml
+        iteration_data: Parsed learnings.yaml
+
+    Returns:
+        (discovered_in, duration_seconds, healing_rounds, files_modified)
+    """
+    iteration_dir = os.path.dirname(os.path.abspath(learnings_path))
+
+    # Plan/iteration from the file (validator writes both), else from the path
+    plan_id = iteration_data.get('plan') or os.path.basename(os.path.dirname(iteration_dir))
+    iteration_id = str(iteration_data.get('iteration') or os.path.basename(iteration_dir))
+    discovered_in = f"{plan_id}-{iteration_id.replace('iteration-', 'iter-')}"
+
+    # Healing rounds = healing-* directories next to the learnings file
+    healing_rounds = sum(
+        1 for d in glob.glob(os.path.join(iteration_dir, 'healing-*')) if os.path.isdir(d)
+    )
+
+    # Duration = learnings written at - iteration .start_time (if recorded)
+    duration_seconds = 0
+    start_time_file = os.path.join(iteration_dir, '.start_time')
+    if os.path.exists(start_time_file):
+        try:
+            with open(start_time_file, 'r') as f:
+                start_time = int(f.read().strip())
+            duration_seconds = max(0, int(os.path.getmtime(learnings_path)) - start_time)
+        except ValueError:
+            pass
+
+    # Files modified is only known at reflection time (git diff)
+    files_modified = 0
+
+    return discovered_in, duration_seconds, healing_rounds, files_modified
+
+
+def merge_learnings_batch(iteration_learnings_paths, global_learnings_path,
+                          similarity='exact', similarity_threshold=None, journal=False,
+                          duration_seconds=None, healing_rounds=None, files_modified=None):
+    """
+    Merge many iteration learnings files in a single locked load/merge/write.
+
+    Files are parsed before the lock is taken; the exclusive lock is only
+    held for the read-modify-write of global learnings.
+
+    Args:
+        iteration_learnings_paths: Paths and/or glob patterns of learnings.yaml files
+        global_learnings_path: Path to global-learnings.yaml
+        similarity: 'exact' or 'minhash' (see merge_learnings)
+        similarity_threshold: Jaccard threshold for 'minhash' mode
+        journal: Append changes to the journal instead of rewriting the file
+        duration_seconds: Override for every file (default: inferred)
+        healing_rounds: Override for every file (default: inferred)
+        files_modified: Override for every file (default: inferred)
+
+    Returns:
+        stats: Dict with files, learnings, lock_wait_seconds, merge_seconds,
+            elapsed_seconds and learnings_per_second
+
+    Raises:
+        FileNotFoundError: If no learnings files match
+    """
+    start = time.perf_counter()
+    paths = expand_learnings_paths(iteration_learnings_paths)
+    if not paths:
+        raise FileNotFoundError(f"No learnings files match: {' '.join(iteration_learnings_paths)}")
+
+    iterations = []
+    for path in paths:
+        iteration_data = yaml_io.load_yaml(path, use_cache=False) or {}
+        discovered_in, duration, healing, files = infer_iteration_metadata(path, iteration_data)
+        iterations.append((
+            iteration_data,
+            discovered_in,
+            duration if duration_seconds is None else duration_seconds,
+            healing if healing_rounds is None else healing_rounds,
+            files if files_modified is None else files_modified,
+        ))
+
+    with yaml_io.locked(global_learnings_path) as lock_wait_seconds:
+        merge_start = time.perf_counter()
+        learnings = merge_iterations(global_learnings_path, iterations,
+                                     similarity, similarity_threshold, journal)
+        merge_seconds = time.perf_counter() - merge_start
+
+    elapsed_seconds = time.perf_counter() - start
+    busy_seconds = elapsed_seconds - lock_wait_seconds
+    return {
+        'files': len(paths),
+        'learnings': learnings,
+        'lock_wait_seconds': lock_wait_seconds,
+        'merge_seconds': merge_seconds,
+        'elapsed_seconds': elapsed_seconds,
+        'learnings_per_second': learnings / busy_seconds if busy_seconds > 0 else 0.0,
+    }
+
+
+def apply_status(pattern, new_status, metadata=None):
+    """
+    Set a pattern's status and add metadata, in place.
+
+    IMPLEMENTED -> IMPLEMENTED is an idempotent no-op.
+
+    Args:
+        pattern: Pattern dict
+        new_status: New status ("IMPLEMENTED", "VERIFIED")
+        metadata: Optional dict of fields to add
+
+    Returns:
+        changed: False if the pattern was already IMPLEMENTED (nothing applied)
+    """
+    # Validate transition (simple: IDENTIFIED → IMPLEMENTED)
+    current_status = pattern.get('status', 'IDENTIFIED')
+    if current_status == 'IMPLEMENTED' and new_status == 'IMPLEMENTED':
+        return False
+
+    # Update status
+    pattern['status'] = new_status
+
+    # Add metadata if provided
+    if metadata:
+        pattern.update(metadata)
+    return True
+
+
+def update_pattern_status(pattern_id, new_status, metadata=None, global_learnings_path='.2L/global-learnings.yaml',
+                          journal=False):
     """
     Update single pattern status in global-learnings.yaml atomically.
 
@@ -210,6 +612,7 @@ def update_pattern_status(pattern_id, new_status, metadata=None, global_learning
         new_status: New status ("IMPLEMENTED", "VERIFIED")
         metadata: Optional dict of metadata to add (implemented_in_plan, implemented_at, vision_file)
         global_learnings_path: Path to global learnings file (default: .2L/global-learnings.yaml)
+        journal: Append the change to the journal instead of rewriting the file
 
     Returns:
         pattern: Updated pattern dict
@@ -223,61 +626,242 @@ def update_pattern_status(pattern_id, new_status, metadata=None, global_learning
     if not os.path.exists(global_learnings_path):
         raise FileNotFoundError(f"Global learnings file not found: {global_learnings_path}")
 
-    # Backup before modification
-    backup_before_write(global_learnings_path)
-
-    # Read current data
-    with open(global_learnings_path, 'r') as f:
-        global_data = yaml.safe_load(f)
+    with yaml_io.locked(global_learnings_path):
+        return _update_pattern_status_locked(pattern_id, new_status, metadata,
+                                             global_learnings_path, journal)
 
-    # Find pattern
-    pattern_found = False
-    updated_pattern = None
-    for pattern in global_data.get('patterns', []):
-        if pattern['pattern_id'] == pattern_id:
-            # Validate transition (simple: IDENTIFIED → IMPLEMENTED)
-            current_status = pattern.get('status', 'IDENTIFIED')
-            if current_status == 'IMPLEMENTED' and new_status == 'IMPLEMENTED':
-                # Idempotent - no-op if already IMPLEMENTED
-                print(f"Pattern {pattern_id} already {new_status}")
-                return pattern
 
-            # Update status
-            pattern['status'] = new_status
+def _update_pattern_status_locked(pattern_id, new_status, metadata, global_learnings_path, journal):
+    """update_pattern_status body; caller holds the global learnings lock."""
+    if learnings_db.is_database(global_learnings_path):
+        return _update_pattern_status_database(pattern_id, new_status, metadata, global_learnings_path)
 
-            # Add metadata if provided
-            if metadata:
-                pattern.update(metadata)
+    # Read current data (snapshot + pending journal)
+    global_data = journal_lib.load_learnings(global_learnings_path)
 
-            pattern_found = True
-            updated_pattern = pattern
-            break
+    # Find pattern
+    updated_pattern = None
+    with instrument.span('update'):
+        for pattern in global_data.get('patterns', []):
+            if pattern['pattern_id'] == pattern_id:
+                updated_pattern = pattern
+                break
 
-    if not pattern_found:
+    if updated_pattern is None:
         raise ValueError(f"Pattern {pattern_id} not found in global learnings")
 
+    if not apply_status(updated_pattern, new_status, metadata):
+        # Idempotent - no-op if already IMPLEMENTED
+        print(f"Pattern {pattern_id} already {new_status}")
+        return updated_pattern
+
     # Update aggregation timestamp
     global_data['aggregated_at'] = datetime.now().isoformat()
 
-    # Atomic write
-    atomic_write_yaml(global_learnings_path, global_data)
+    if journal:
+        journal_changes(global_learnings_path, global_data, [updated_pattern])
+    else:
+        # Atomic write (retires any pending journal), keeping a backup generation
+        journal_lib.write_snapshot(global_learnings_path, global_data, backup=True)
 
     print(f"Pattern {pattern_id} status updated: {new_status}")
     return updated_pattern
 
 
+def _update_pattern_status_database(pattern_id, new_status, metadata, global_learnings_path):
+    """update_pattern_status for a SQLite store: one indexed read, one transaction."""
+    with learnings_db.open_database(global_learnings_path, create=False) as db, db.transaction():
+        with instrument.span('update'):
+            pattern = db.get_pattern(pattern_id)
+        if pattern is None:
+            raise ValueError(f"Pattern {pattern_id} not found in global learnings")
+
+        if not apply_status(pattern, new_status, metadata):
+            print(f"Pattern {pattern_id} already {new_status}")
+            return pattern
+
+        with instrument.span('write'):
+            db.put_patterns([pattern])
+            db.set_meta({'aggregated_at': datetime.now().isoformat()})
+
+    print(f"Pattern {pattern_id} status updated: {new_status}")
+    return pattern
+
+
+def parse_status_transitions(text):
+    """
+    Parse status transitions from a JSON list or NDJSON (one object per line).
+
+    Each transition is {"pattern_id": ..., "status": ..., "metadata": {...}};
+    metadata is optional. Transitions are returned as given; they are
+    checked by update_pattern_statuses.
+
+    Args:
+        text: JSON or NDJSON text
+
+    Returns:
+        transitions: List of transition dicts, in input order
+
+    Raises:
+        ValueError: If the text is not valid JSON/NDJSON
+    """
+    stripped = text.strip()
+    if stripped.startswith('['):
+        try:
+            transitions = json.loads(stripped)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON transitions: {e}")
+        return transitions
+
+    transitions = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            transitions.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON transition on line {line_number}: {e}")
+    return transitions
+
+
+def _check_transition(transition):
+    """Error message for a malformed transition, or None."""
+    if not isinstance(transition, dict):
+        return "transition is not an object"
+    if not isinstance(transition.get('pattern_id'), str) or not transition['pattern_id']:
+        return "missing pattern_id"
+    if not isinstance(transition.get('status'), str) or not transition['status']:
+        return "missing status"
+    if transition.get('metadata') is not None and not isinstance(transition['metadata'], dict):
+        return "metadata is not an object"
+    return None
+
+
+def update_pattern_statuses(transitions, global_learnings_path='.2L/global-learnings.yaml', journal=False):
+    """
+    Apply many status transitions in one locked load/update/write.
+
+    Every transition is validated against an index of pattern IDs before
+    anything is changed; if any is malformed or names an unknown pattern,
+    none are applied. Transitions are then applied in order with
+    apply_status() (so IMPLEMENTED -> IMPLEMENTED stays a no-op, and
+    several transitions for one pattern behave like successive
+    update_pattern_status calls) and written once.
+
+    Args:
+        transitions: List of {"pattern_id", "status", "metadata"} dicts
+        global_learnings_path: Path to global learnings file (default: .2L/global-learnings.yaml)
+        journal: Append the changes to the journal instead of rewriting the file
+
+    Returns:
+        results: One dict per transition, in order, with pattern_id, status
+            and result: 'updated', 'unchanged' (already IMPLEMENTED),
+            'error' (with an 'error' message) or 'skipped' (valid, but not
+            applied because another transition failed)
+
+    Raises:
+        FileNotFoundError: If global learnings file not found
+        Exception: If write fails
+    """
+    if not os.path.exists(global_learnings_path):
+        raise FileNotFoundError(f"Global learnings file not found: {global_learnings_path}")
+
+    with yaml_io.locked(global_learnings_path):
+        if learnings_db.is_database(global_learnings_path):
+            return _update_pattern_statuses_database(transitions, global_learnings_path)
+
+        global_data = journal_lib.load_learnings(global_learnings_path)
+        with instrument.span('update'):
+            by_id = {pattern['pattern_id']: pattern for pattern in global_data.get('patterns', [])}
+            results, changed = _apply_transitions(transitions, by_id.get)
+        if not changed:
+            return results
+
+        global_data['aggregated_at'] = datetime.now().isoformat()
+        if journal:
+            journal_changes(global_learnings_path, global_data, changed)
+        else:
+            journal_lib.write_snapshot(global_learnings_path, global_data, backup=True)
+        return results
+
+
+def _update_pattern_statuses_database(transitions, global_learnings_path):
+    """update_pattern_statuses for a SQLite store: indexed reads, one transaction."""
+    with learnings_db.open_database(global_learnings_path, create=False) as db, db.transaction():
+        loaded = {}
+
+        def lookup(pattern_id):
+            if pattern_id not in loaded:
+                loaded[pattern_id] = db.get_pattern(pattern_id)
+            return loaded[pattern_id]
+
+        with instrument.span('update'):
+            results, changed = _apply_transitions(transitions, lookup)
+        if changed:
+            with instrument.span('write'):
+                db.put_patterns(changed)
+                db.set_meta({'aggregated_at': datetime.now().isoformat()})
+    return results
+
+
+def _apply_transitions(transitions, lookup):
+    """
+    Validate all transitions, then apply them if every one is valid.
+
+    Args:
+        transitions: Transition dicts
+        lookup: pattern_id -> pattern dict (or None)
+
+    Returns:
+        (results, changed): Per-transition results, and the distinct
+        patterns that changed (empty if anything failed validation)
+    """
+    results = []
+    failed = False
+    for transition in transitions:
+        error = _check_transition(transition)
+        if error is None and lookup(transition['pattern_id']) is None:
+            error = f"Pattern {transition['pattern_id']} not found in global learnings"
+        result = {'pattern_id': transition.get('pattern_id') if isinstance(transition, dict) else None,
+                  'status': transition.get('status') if isinstance(transition, dict) else None}
+        if error:
+            result.update(result='error', error=error)
+            failed = True
+        results.append(result)
+
+    if failed:
+        for result in results:
+            result.setdefault('result', 'skipped')
+        return results, []
+
+    changed = {}
+    for transition, result in zip(transitions, results):
+        pattern = lookup(transition['pattern_id'])
+        if apply_status(pattern, transition['status'], transition.get('metadata')):
+            result['result'] = 'updated'
+            changed[transition['pattern_id']] = pattern
+        else:
+            result['result'] = 'unchanged'
+    return results, list(changed.values())
+
+
 # Main CLI
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='2L YAML Helpers - Extended')
 
     # Command selection
-    parser.add_argument('command', choices=['merge_learnings', 'update_pattern_status'])
+    parser.add_argument('command', choices=['merge_learnings', 'merge_learnings_batch',
+                                            'update_pattern_status', 'update_pattern_statuses', 'compact'])
 
     # Arguments for update_pattern_status
     parser.add_argument('--pattern-id', help='Pattern ID (e.g., PATTERN-001)')
     parser.add_argument('--status', help='New status (IMPLEMENTED, VERIFIED)')
     parser.add_argument('--metadata-json', help='JSON string of metadata to add')
 
+    # Arguments for update_pattern_statuses
+    parser.add_argument('--transitions',
+                       help='JSON list or NDJSON file of {pattern_id, status, metadata} ("-" for stdin)')
+
     # Arguments for merge_learnings (from iteration 1)
     parser.add_argument('--iteration-learnings',
                        help='Path to iteration learnings.yaml')
@@ -292,14 +876,31 @@ if __name__ == '__main__':
     parser.add_argument('--files-modified', type=int,
                        help='Number of files modified')
 
+    # Arguments for merge_learnings_batch
+    parser.add_argument('--learnings-files', nargs='+',
+                       help='Learnings files or quoted globs (e.g., ".2L/plan-*/iteration-*/learnings.yaml")')
+    parser.add_argument('--similarity', choices=SIMILARITY_MODES, default='exact',
+                       help='Pattern matching: exact root_cause (default) or minhash near-duplicates')
+    parser.add_argument('--similarity-threshold', type=float,
+                       help='Jaccard threshold for --similarity minhash (default: 0.8)')
+
+    # Journaled mode and compaction
+    parser.add_argument('--journal', action='store_true',
+                       help='Append changes to <global-learnings>.journal instead of rewriting the file')
+    parser.add_argument('--threshold-bytes', type=int, default=journal_lib.DEFAULT_COMPACT_THRESHOLD,
+                       help='compact: minimum journal size to fold in (default: 262144)')
+    parser.add_argument('--force', action='store_true',
+                       help='compact: fold in the journal regardless of size')
+    instrument.add_arguments(parser)
+
     args = parser.parse_args()
+    instrument.configure(f"2l-yaml-helpers {args.command}", args)
 
     if args.command == 'update_pattern_status':
         try:
             # Parse metadata JSON
             metadata = None
             if args.metadata_json:
-                import json
                 metadata = json.loads(args.metadata_json)
 
             # Validate required arguments
@@ -311,13 +912,44 @@ if __name__ == '__main__':
             global_learnings_path = args.global_learnings if args.global_learnings else '.2L/global-learnings.yaml'
 
             # Update status
-            update_pattern_status(args.pattern_id, args.status, metadata, global_learnings_path)
+            update_pattern_status(args.pattern_id, args.status, metadata, global_learnings_path,
+                                  journal=args.journal)
             print(f"✅ Pattern {args.pattern_id} updated to {args.status}")
 
         except Exception as e:
             print(f"ERROR: {e}", file=sys.stderr)
             sys.exit(1)
 
+    elif args.command == 'update_pattern_statuses':
+        try:
+            if not args.transitions:
+                print("ERROR: --transitions is required for update_pattern_statuses", file=sys.stderr)
+                sys.exit(1)
+
+            if args.transitions == '-':
+                transitions = parse_status_transitions(sys.stdin.read())
+            else:
+                with open(args.transitions, 'r') as f:
+                    transitions = parse_status_transitions(f.read())
+            if not isinstance(transitions, list):
+                raise ValueError("Transitions must be a JSON list or NDJSON objects")
+
+            global_learnings_path = args.global_learnings if args.global_learnings else '.2L/global-learnings.yaml'
+            results = update_pattern_statuses(transitions, global_learnings_path, journal=args.journal)
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        for result in results:
+            detail = f" - {result['error']}" if result['result'] == 'error' else ''
+            print(f"{result['pattern_id']}: {result['result']} ({result['status']}){detail}")
+        counts = {name: sum(1 for r in results if r['result'] == name)
+                  for name in ('updated', 'unchanged', 'error', 'skipped')}
+        if counts['error']:
+            print(f"ERROR: {counts['error']} invalid transition(s); nothing was applied", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ {counts['updated']} pattern(s) updated, {counts['unchanged']} unchanged")
+
     elif args.command == 'merge_learnings':
         try:
             # Validate required arguments
@@ -332,8 +964,56 @@ if __name__ == '__main__':
                 args.discovered_in,
                 args.duration,
                 args.healing_rounds,
-                args.files_modified
+                args.files_modified,
+                similarity=args.similarity,
+                similarity_threshold=args.similarity_threshold,
+                journal=args.journal
+            )
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == 'merge_learnings_batch':
+        try:
+            if not args.learnings_files:
+                print("ERROR: --learnings-files is required for merge_learnings_batch", file=sys.stderr)
+                sys.exit(1)
+
+            global_learnings_path = args.global_learnings if args.global_learnings else '.2L/global-learnings.yaml'
+
+            stats = merge_learnings_batch(
+                args.learnings_files,
+                global_learnings_path,
+                similarity=args.similarity,
+                similarity_threshold=args.similarity_threshold,
+                journal=args.journal,
+                duration_seconds=args.duration,
+                healing_rounds=args.healing_rounds,
+                files_modified=args.files_modified
             )
+            print(f"Merged {stats['learnings']} learnings from {stats['files']} file(s) into global knowledge base")
+            print(f"   Throughput: {stats['learnings_per_second']:.1f} learnings/s "
+                  f"(merge {stats['merge_seconds']:.3f}s, total {stats['elapsed_seconds']:.3f}s)")
+            print(f"   Lock wait: {stats['lock_wait_seconds']:.3f}s")
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == 'compact':
+        try:
+            global_learnings_path = args.global_learnings if args.global_learnings else '.2L/global-learnings.yaml'
+            if not os.path.exists(global_learnings_path):
+                raise FileNotFoundError(f"Global learnings file not found: {global_learnings_path}")
+            if learnings_db.is_database(global_learnings_path):
+                raise ValueError("compact folds the YAML journal; SQLite stores need no compaction")
+
+            pending = journal_lib.journal_size(global_learnings_path)
+            with yaml_io.locked(global_learnings_path):
+                compacted = journal_lib.compact(global_learnings_path, args.threshold_bytes, args.force)
+            if compacted:
+                print(f"Compacted {compacted} journal transaction(s) into {global_learnings_path}")
+            else:
+                print(f"Journal below threshold ({pending} < {args.threshold_bytes} bytes), nothing to compact")
         except Exception as e:
             print(f"ERROR: {e}", file=sys.stderr)
             sys.exit(1)
@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+"""
+2L YAML I/O - Shared YAML loading/dumping for the lib/ Python tools
+
+All YAML reads and writes in lib/ go through this module so that:
+
+1. The LibYAML C loader and dumper (CSafeLoader/CSafeDumper) are used when
+   PyYAML was built with them, falling back to the pure-Python SafeLoader/
+   SafeDumper otherwise. Set TWOL_YAML_BACKEND=python to force the fallback.
+
+2. Output is byte-identical whichever backend is active. The C emitter folds
+   long double-quoted scalars and very long or empty mapping keys differently
+   from the Python emitter; documents containing such values are dumped with
+   the Python emitter (see c_dump_compatible).
+
+3. Parsing a multi-MB global-learnings.yaml is avoided when possible:
+   load_yaml() keeps a pickle snapshot of the parsed document next to the
+   source file (<file>.cache.pickle) and returns it when the source is
+   unchanged, re-parsing and refreshing it transparently when not.
+
+The snapshot is keyed on the source's size, mtime and content hash:
+    - size differs            -> stale (no hashing needed)
+    - content hash differs    -> stale
+    - hash matches, mtime not -> fresh (file was touched); key is refreshed
+Files under CACHE_MIN_BYTES are simply parsed; they get no sidecar.
+
+atomic_write_yaml() streams the document into a temp file in chunks
+(emitting large top-level lists a batch of items at a time), fsyncs it, renames it over the target with os.replace and fsyncs the
+directory (TWOL_DURABILITY=none|file|full picks how much of that is done;
+default full). A write whose output hashes the same as the file on disk
+is dropped before the rename.
+
+Usage (from other lib/ scripts):
+    yaml_io = importlib.import_module('2l-yaml-io')
+    data = yaml_io.load_yaml('.2L/global-learnings.yaml')
+    yaml_io.dump_yaml(data, f)
+
+Usage (CLI):
+    python3 2l-yaml-io.py backend
+    python3 2l-yaml-io.py stats .2L/global-learnings.yaml
+    python3 2l-yaml-io.py warm .2L/global-learnings.yaml
+
+Set TWOL_YAML_VERBOSE=1 to print the active backend to stderr at startup,
+and TWOL_CACHE_STATS=1 to print hit/miss counters to stderr at exit.
+"""
+
+import os
+import sys
+import time
+import atexit
+import contextlib
+import pickle
+import hashlib
+import tempfile
+import argparse
+import importlib
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: locking degrades to a no-op
+    fcntl = None
+
+instrument = importlib.import_module('2l-instrument')
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.cache.pickle'
+# Smaller files (config.yaml, master-plan.yaml) parse faster than a sidecar
+# round-trip is worth, and are not given one
+CACHE_MIN_BYTES = 64 * 1024
+
+# atomic_write_yaml: serialized output goes to the temp file in chunks of this size
+WRITE_CHUNK_BYTES = 1024 * 1024
+
+# List items handed to the emitter at a time by atomic_write_yaml()
+DUMP_BATCH_ITEMS = 500
+# none: no fsync; file: fsync the temp file before the rename (never a
+# truncated file after a crash); full: also fsync the directory after it
+# (the rename itself survives a crash)
+DURABILITY_LEVELS = ('none', 'file', 'full')
+DEFAULT_DURABILITY = 'full'
+
+# Matches the emitter's simple-key limit (keys >= 128 chars become "? key")
+_MAX_C_KEY_LENGTH = 100
+# Longest non-ASCII/non-printable string that can never fold at width 80
+# (each character escapes to at most 10 columns: \UXXXXXXXX)
+_MAX_C_ESCAPED_LENGTH = 6
+
+LIBYAML_AVAILABLE = bool(getattr(yaml, '__with_libyaml__', False)) and hasattr(yaml, 'CSafeLoader')
+
+if LIBYAML_AVAILABLE and os.environ.get('TWOL_YAML_BACKEND', 'auto') != 'python':
+    BACKEND = 'libyaml'
+    SafeLoader = yaml.CSafeLoader
+    CSafeDumper = yaml.CSafeDumper
+else:
+    BACKEND = 'python'
+    SafeLoader = yaml.SafeLoader
+    CSafeDumper = None
+
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'touched': 0,
+    'write_errors': 0,
+}
+
+
+def cache_path_for(yaml_path):
+    """
+    Sidecar path for the parsed snapshot of a YAML file.
+
+    Args:
+        yaml_path: Path to source YAML file
+
+    Returns:
+        cache_path: Path to pickle sidecar
+    """
+    return yaml_path + CACHE_SUFFIX
+
+
+def content_hash(raw):
+    """BLAKE2b digest of file bytes (hex)."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def cache_stats():
+    """
+    Hit/miss counters for this process.
+
+    Returns:
+        stats: Dict with hits, misses, touched, write_errors and hit_rate
+    """
+    lookups = _stats['hits'] + _stats['misses']
+    stats = dict(_stats)
+    stats['hit_rate'] = _stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def _read_header(cache_file):
+    """Read only the snapshot header; the data pickle follows it."""
+    try:
+        header = pickle.load(cache_file)
+    except Exception:
+        return None
+    if not isinstance(header, dict) or header.get('version') != CACHE_VERSION:
+        return None
+    return header
+
+
+def _write_cache(cache_path, header, data):
+    """Write header + data pickles atomically (temp file + rename)."""
+    dir_path = os.path.dirname(cache_path) or '.'
+    temp_path = None
+    try:
+        temp_fd, temp_path = tempfile.mkstemp(dir=dir_path, prefix='.tmp_', suffix='.pickle')
+        with os.fdopen(temp_fd, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # Cache is an optimization; a read-only directory must not break reads
+        _stats['write_errors'] += 1
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def backend_report():
+    """
+    One-line description of the active YAML backend.
+
+    Returns:
+        report: Human-readable backend summary
+    """
+    if BACKEND == 'libyaml':
+        return "YAML backend: libyaml (C loader, C dumper with Python fallback)"
+    if LIBYAML_AVAILABLE:
+        return "YAML backend: python (libyaml available, disabled by TWOL_YAML_BACKEND)"
+    return "YAML backend: python (libyaml not available)"
+
+
+def c_dump_compatible(data):
+    """
+    Check whether the C emitter will produce exactly the Python emitter's output.
+
+    The emitters differ only in how they fold long double-quoted scalars
+    (strings with non-printable or non-ASCII characters) and in when a
+    mapping key is written as a complex "? key" (empty or very long keys).
+
+    Args:
+        data: Python structure about to be dumped
+
+    Returns:
+        compatible: True if the C dumper is safe to use for data
+    """
+    if not isinstance(data, (dict, list)):
+        # Top-level scalars get a "..." document end marker only in Python
+        return False
+
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            if len(node) > _MAX_C_ESCAPED_LENGTH and not (node.isascii() and node.isprintable()):
+                return False
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(key, str):
+                    if (not key or len(key) > _MAX_C_KEY_LENGTH
+                            or not (key.isascii() and key.isprintable())):
+                        return False
+                elif isinstance(key, (dict, list, tuple)):
+                    return False
+                stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+    return True
+
+
+def parse_yaml(text):
+    """
+    Parse YAML text with the safe loader (C when available).
+
+    Args:
+        text: YAML document as str, bytes or an open file
+
+    Returns:
+        data: Parsed Python structure
+    """
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def dump_yaml(data, stream=None):
+    """
+    Dump data as block-style YAML, preserving key order.
+
+    Uses the C dumper when available and c_dump_compatible(data), so the
+    bytes written never depend on which backend is installed.
+
+    Args:
+        data: Python structure to dump
+        stream: Open text file to write to (None returns a string)
+
+    Returns:
+        text: YAML string if stream is None, else None
+    """
+    if CSafeDumper is not None and c_dump_compatible(data):
+        dumper = CSafeDumper
+    else:
+        dumper = yaml.SafeDumper
+    return yaml.dump(data, stream, Dumper=dumper, default_flow_style=False, sort_keys=False)
+
+
+def load_yaml(yaml_path, use_cache=True):
+    """
+    Load a YAML file, serving it from the sidecar snapshot when fresh.
+
+    Args:
+        yaml_path: Path to YAML file
+        use_cache: Set False to always parse (sidecar is left untouched)
+
+    Returns:
+        data: Parsed Python structure (a fresh copy on every call)
+
+    Raises:
+        FileNotFoundError: If yaml_path does not exist
+        yaml.YAMLError: If the file is not valid YAML
+    """
+    if not use_cache:
+        with instrument.span('load'), open(yaml_path, 'r') as f:
+            return parse_yaml(f)
+    return load_yaml_with_hash(yaml_path)[0]
+
+
+def load_yaml_with_hash(yaml_path):
+    """
+    Load a YAML file through the sidecar cache and report its content hash.
+
+    Files smaller than CACHE_MIN_BYTES are parsed directly.
+
+    Args:
+        yaml_path: Path to YAML file
+
+    Returns:
+        (data, digest): Parsed structure and content_hash() of the file bytes
+
+    Raises:
+        FileNotFoundError: If yaml_path does not exist
+        yaml.YAMLError: If the file is not valid YAML
+    """
+    with instrument.span('load'):
+        return _load_yaml_with_hash(yaml_path)
+
+
+def _load_yaml_with_hash(yaml_path):
+    with open(yaml_path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        raw = f.read()
+
+    if stat.st_size < CACHE_MIN_BYTES:
+        return parse_yaml(raw), content_hash(raw)
+
+    cache_path = cache_path_for(yaml_path)
+    digest = None
+
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            header = _read_header(cache_file)
+            if header and header['size'] == stat.st_size:
+                digest = content_hash(raw)
+                if header['sha'] == digest:
+                    data = pickle.load(cache_file)
+                    _stats['hits'] += 1
+                    if header['mtime_ns'] != stat.st_mtime_ns:
+                        # Same content, new mtime: refresh the key
+                        _stats['touched'] += 1
+                        header['mtime_ns'] = stat.st_mtime_ns
+                        _write_cache(cache_path, header, data)
+                    return data, digest
+    except (OSError, EOFError, ValueError, AttributeError, pickle.UnpicklingError):
+        # Unreadable snapshot is treated as a miss
+        pass
+
+    # Stale or missing snapshot: parse and rebuild
+    _stats['misses'] += 1
+    data = parse_yaml(raw)
+    digest = digest or content_hash(raw)
+    header = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha': digest,
+    }
+    _write_cache(cache_path, header, data)
+    return data, digest
+
+
+def file_hash(yaml_path):
+    """
+    content_hash() of a file on disk.
+
+    Args:
+        yaml_path: Path to file
+
+    Returns:
+        digest: Hex digest, or None if the file does not exist
+    """
+    try:
+        with open(yaml_path, 'rb') as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+class _ChunkedHashWriter:
+    """
+    Text stream for the YAML emitter that encodes, hashes and writes to a
+    file descriptor in WRITE_CHUNK_BYTES chunks, so the serialized document
+    is never held in memory whole.
+    """
+
+    def __init__(self, fd, chunk_bytes=WRITE_CHUNK_BYTES):
+        self.fd = fd
+        self.chunk_bytes = chunk_bytes
+        self.size = 0
+        self._hash = hashlib.blake2b(digest_size=16)  # Same digest as content_hash()
+        self._pending = []
+        self._pending_bytes = 0
+
+    def write(self, text):
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.chunk_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        chunk = b''.join(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(self.fd, view):]
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def durability_level(durability=None):
+    """
+    Resolve a durability level (argument, else TWOL_DURABILITY, else DEFAULT_DURABILITY).
+
+    Raises:
+        ValueError: If the level is not one of DURABILITY_LEVELS
+    """
+    level = durability or os.environ.get('TWOL_DURABILITY') or DEFAULT_DURABILITY
+    if level not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {level} (expected one of {', '.join(DURABILITY_LEVELS)})")
+    return level
+
+
+def current_hash(file_path):
+    """
+    content_hash() of a file as it is now.
+
+    A sidecar built from the file as it is now (same size and mtime)
+    already knows its hash, which saves reading the file.
+
+    Returns:
+        digest: Hex digest, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    try:
+        with open(cache_path_for(file_path), 'rb') as cache_file:
+            header = _read_header(cache_file)
+        if header and header['size'] == stat.st_size and header['mtime_ns'] == stat.st_mtime_ns:
+            return header['sha']
+    except OSError:
+        pass
+    return file_hash(file_path)
+
+
+def _hash_on_disk(file_path, size):
+    """current_hash() of file_path if it is exactly size bytes, else None."""
+    try:
+        if os.path.getsize(file_path) != size:
+            return None
+    except FileNotFoundError:
+        return None
+    return current_hash(file_path)
+
+
+def _fsync_directory(dir_path):
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return  # Platforms that cannot open directories (Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_yaml(file_path, data, backup=False, durability=None, trailer=None):
+    """
+    Write YAML data atomically to prevent corruption.
+    Uses temp file + rename for atomic operation.
+
+    The document is streamed into the temp file in chunks and hashed on
+    the way. If the result is identical to the file on disk, the temp file
+    is dropped and the target is left untouched (no rename, backup or
+    fsync).
+
+    Args:
+        file_path: Target YAML file path
+        data: Python dict to write as YAML
+        backup: Keep the replaced version as a backup generation
+            (hard link taken just before the rename, see 2l-backup.py)
+        durability: 'none', 'file' or 'full' (default: TWOL_DURABILITY,
+            else 'full'; see DURABILITY_LEVELS)
+        trailer: Optional text written verbatim after the document
+            (e.g., further "---" documents kept from the original file)
+
+    Returns:
+        written: False if the content was unchanged and nothing was replaced
+
+    Raises:
+        Exception: If write fails (temp file cleaned up automatically)
+    """
+    durability = durability_level(durability)
+    with instrument.span('atomic_write'):
+        return _atomic_write_yaml(file_path, data, backup, durability, trailer)
+
+
+def _has_shared_nodes(data):
+    """True if some dict or list appears twice in data (dumped as an &anchor)."""
+    seen = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            values = node.values()
+        elif isinstance(node, list):
+            values = node
+        else:
+            continue
+        if id(node) in seen:
+            return True
+        seen.add(id(node))
+        stack.extend(values)
+    return False
+
+
+def _dump_yaml_in_batches(data, stream):
+    """
+    dump_yaml(data, stream), but one top-level key, and DUMP_BATCH_ITEMS
+    items of a top-level list, at a time.
+
+    The emitter builds a node graph of everything it is given before
+    writing; handing it a batch at a time keeps that graph small. Block
+    style YAML indents neither top-level keys nor the items of a list
+    under them, so the pieces concatenate to exactly the bytes of a single
+    dump. Documents with shared nodes (anchors span the whole document)
+    are dumped in one go.
+    """
+    if not isinstance(data, dict) or not data or _has_shared_nodes(data):
+        dump_yaml(data, stream)
+        return
+
+    for key, value in data.items():
+        if not isinstance(value, list) or len(value) <= DUMP_BATCH_ITEMS:
+            dump_yaml({key: value}, stream)
+            continue
+        header = dump_yaml({key: [None]})
+        if not header.endswith('\n- null\n'):
+            dump_yaml({key: value}, stream)
+            continue
+        stream.write(header[:-len('- null\n')])
+        for start in range(0, len(value), DUMP_BATCH_ITEMS):
+            dump_yaml(value[start:start + DUMP_BATCH_ITEMS], stream)
+
+
+def _atomic_write_yaml(file_path, data, backup, durability, trailer=None):
+    # Create temp file in same directory (ensures same filesystem)
+    dir_path = os.path.dirname(file_path) or '.'
+    temp_fd, temp_path = tempfile.mkstemp(
+        dir=dir_path,
+        prefix='.tmp_',
+        suffix='.yaml'
+    )
+
+    try:
+        # Stream YAML into the temp file
+        try:
+            writer = _ChunkedHashWriter(temp_fd)
+            _dump_yaml_in_batches(data, writer)
+            if trailer:
+                writer.write(trailer)
+            writer.flush()
+            unchanged = _hash_on_disk(file_path, writer.size) == writer.hexdigest()
+            if not unchanged and durability != 'none':
+                os.fsync(temp_fd)
+        finally:
+            os.close(temp_fd)
+
+        if unchanged:
+            os.remove(temp_path)
+            return False
+
+        if backup:
+            with instrument.span('backup'):
+                importlib.import_module('2l-backup').snapshot(file_path)
+
+        # Atomic rename (replaces existing file)
+        os.replace(temp_path, file_path)
+        if durability == 'full':
+            _fsync_directory(dir_path)
+        return True
+
+    except Exception as e:
+        # Clean up temp file on error
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+
+def cache_status(yaml_path):
+    """
+    Describe whether the sidecar for yaml_path is fresh.
+
+    Args:
+        yaml_path: Path to YAML file
+
+    Returns:
+        status: Dict with source/sidecar sizes and a 'fresh' flag
+    """
+    cache_path = cache_path_for(yaml_path)
+    with open(yaml_path, 'rb') as f:
+        raw = f.read()
+    status = {
+        'source': yaml_path,
+        'source_bytes': len(raw),
+        'sidecar': cache_path,
+        'sidecar_bytes': None,
+        'fresh': False,
+    }
+    try:
+        status['sidecar_bytes'] = os.path.getsize(cache_path)
+        with open(cache_path, 'rb') as cache_file:
+            header = _read_header(cache_file)
+        status['fresh'] = bool(header) and header['sha'] == content_hash(raw)
+    except OSError:
+        pass
+    return status
+
+
+@contextlib.contextmanager
+def locked(file_path):
+    """
+    Hold an exclusive fcntl advisory lock on <file_path>.lock.
+
+    Concurrent writers (e.g. parallel /2l-mvp reflections) serialize their
+    read-modify-write cycles on this lock. Readers do not need it: writes
+    are atomic renames or journal appends.
+
+    Args:
+        file_path: File being protected (the lock file sits next to it)
+
+    Yields:
+        waited: Seconds spent waiting to acquire the lock
+    """
+    start = time.perf_counter()
+    fd = os.open(file_path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield time.perf_counter() - start
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _report_stats():
+    stats = cache_stats()
+    if stats['hits'] or stats['misses']:
+        print(f"yaml cache: {stats['hits']} hit(s), {stats['misses']} miss(es)", file=sys.stderr)
+
+
+if os.environ.get('TWOL_CACHE_STATS') == '1':
+    atexit.register(_report_stats)
+
+if os.environ.get('TWOL_YAML_VERBOSE') == '1':
+    print(backend_report(), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2L YAML I/O - backend and sidecar cache tools')
+    parser.add_argument('command', choices=['backend', 'stats', 'warm'])
+    parser.add_argument('yaml_path', nargs='?', help='Path to YAML file (e.g., .2L/global-learnings.yaml)')
+
+    args = parser.parse_args()
+
+    if args.command == 'backend':
+        print(backend_report())
+        return
+
+    if not args.yaml_path:
+        print(f"ERROR: {args.command} requires a YAML file path", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.command == 'warm':
+            load_yaml(args.yaml_path)
+            stats = cache_stats()
+            state = 'already fresh' if stats['hits'] else 'rebuilt'
+            print(f"Sidecar {state}: {cache_path_for(args.yaml_path)}")
+        else:
+            status = cache_status(args.yaml_path)
+            print(f"Source:  {status['source']} ({status['source_bytes']} bytes)")
+            if status['sidecar_bytes'] is None:
+                print(f"Sidecar: {status['sidecar']} (missing)")
+            else:
+                state = 'fresh' if status['fresh'] else 'stale'
+                print(f"Sidecar: {status['sidecar']} ({status['sidecar_bytes']} bytes, {state})")
+    except FileNotFoundError as e:
+        print(f"ERROR: File not found: {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()